@@ -1,11 +1,52 @@
 __all__ = [
-    "chat", "MAX_INPUT_LENGTH",
-    "embedding", "NUMBER_TOP_SOURCES", "NUMBER_OF_SOURCES_DISPLAY", "EMBEDDING_MODEL",
+    "cache", "QA_CACHE_MAX_SIZE", "QA_CACHE_TTL_SECONDS", "SEMANTIC_CACHE_THRESHOLD",
+    "QA_CACHE_BACKEND", "QA_CACHE_PERSISTENT_MAX_SIZE", "LLM_CACHE_MAX_SIZE", "LLM_CACHE_TTL_SECONDS",
+    "chat", "MAX_INPUT_LENGTH", "SESSION_COOKIE_NAME", "HISTORY_MAX_TURNS_PER_SESSION", "HISTORY_MAX_TOTAL_CHARS",
+    "HISTORY_SESSION_IDLE_SECONDS", "HISTORY_PAGE_SIZE", "HISTORY_MAX_PAGE_SIZE", "BATCH_MAX_QUERIES",
+    "BATCH_MAX_CONCURRENCY", "BATCH_BUSY_RETRIES", "BATCH_BUSY_RETRY_SECONDS",
+    "embedding", "NUMBER_TOP_SOURCES", "NUMBER_OF_SOURCES_DISPLAY", "EMBEDDING_MODEL", "EMBEDDING_BATCH_SIZE",
+    "INCREMENTAL_INDEXING", "STARTUP_FROM_SNAPSHOT",
+    "INGESTION_MAX_WORKERS", "INGESTION_FILE_TIMEOUT", "CPU_EXECUTOR_MAX_WORKERS", "INGESTION_QUEUE_MAX_JOBS",
+    "UPLOAD_MAX_BYTES", "INGESTION_JOBS_KEPT", "LOADER_SECTION_MAX_CHARS",
+    "VECTOR_STORE_BACKEND", "DENSE_INDEX_QUANTIZE", "DENSE_INDEX_IVF_MIN_VECTORS", "DENSE_INDEX_IVF_NPROBE",
+    "HYBRID_RRF_K", "HYBRID_WEIGHTS", "HYBRID_CANDIDATES_PER_RETRIEVER",
+    "RERANKER", "RERANK_CANDIDATES", "RERANK_TOP_N", "RERANK_BATCH_SIZE", "RERANK_LATENCY_BUDGET_SECONDS",
+    "RERANK_CROSS_ENCODER_MODEL",
+    "BM25_K1", "BM25_B", "BM25_EPSILON", "WARM_UP_EMBEDDING_MODEL", "LazyEmbeddings",
+    "llm", "OLLAMA_MODEL", "OLLAMA_BASE_URLS", "OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS",
+    "OLLAMA_HEALTH_CHECK_TIMEOUT_SECONDS", "OLLAMA_MAX_CONNECTIONS", "OLLAMA_MAX_KEEPALIVE_CONNECTIONS",
+    "OLLAMA_REQUEST_TIMEOUT_SECONDS", "OLLAMA_KEEP_ALIVE", "CONTEXT_MAX_TOKENS", "CONTEXT_CHARS_PER_TOKEN",
+    "LLM_MAX_CONCURRENT_GENERATIONS", "LLM_MAX_QUEUE_SIZE", "LLM_QUEUE_TIMEOUT_SECONDS",
+    "metrics", "METRICS_SECONDS_BUCKETS", "METRICS_TOKENS_BUCKETS", "METRICS_TOKENS_PER_SECOND_BUCKETS",
+    "METRICS_DOCUMENTS_BUCKETS", "PROFILING_ENABLED",
     "prompts", "PROMPT_TEMPLATE_PDF_QA",
-    "paths", "BASE_DIR", "DOCUMENTS_DEFAULT_DIRECTORY", "CHROMA_DB_DEFAULT_DIRECTORY", "TEMPLATES_DIR"
+    "paths", "BASE_DIR", "DOCUMENTS_DEFAULT_DIRECTORY", "CHROMA_DB_DEFAULT_DIRECTORY",
+    "SPARSE_INDEX_DEFAULT_DIRECTORY", "DENSE_INDEX_DEFAULT_DIRECTORY", "INDEX_SNAPSHOTS_DEFAULT_DIRECTORY",
+    "INDEX_MANIFEST_DEFAULT_PATH", "INDEX_SYNC_LOCK_DEFAULT_PATH", "UPLOADS_STAGING_DEFAULT_DIRECTORY",
+    "UPLOADS_DEFAULT_DIRECTORY", "ANSWER_CACHE_DEFAULT_PATH", "LLM_CACHE_DEFAULT_PATH", "PROFILES_DEFAULT_DIRECTORY",
+    "TEMPLATES_DIR"
 ]
 
-from .chat import MAX_INPUT_LENGTH
-from .embedding import NUMBER_TOP_SOURCES, NUMBER_OF_SOURCES_DISPLAY, EMBEDDING_MODEL
+from .cache import QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD, QA_CACHE_BACKEND, \
+    QA_CACHE_PERSISTENT_MAX_SIZE, LLM_CACHE_MAX_SIZE, LLM_CACHE_TTL_SECONDS
+from .chat import MAX_INPUT_LENGTH, SESSION_COOKIE_NAME, HISTORY_MAX_TURNS_PER_SESSION, HISTORY_MAX_TOTAL_CHARS, \
+    HISTORY_SESSION_IDLE_SECONDS, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE, BATCH_MAX_QUERIES, BATCH_MAX_CONCURRENCY, \
+    BATCH_BUSY_RETRIES, BATCH_BUSY_RETRY_SECONDS
+from .embedding import NUMBER_TOP_SOURCES, NUMBER_OF_SOURCES_DISPLAY, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, \
+    INCREMENTAL_INDEXING, INGESTION_MAX_WORKERS, INGESTION_FILE_TIMEOUT, CPU_EXECUTOR_MAX_WORKERS, BM25_K1, BM25_B, \
+    BM25_EPSILON, WARM_UP_EMBEDDING_MODEL, LazyEmbeddings, VECTOR_STORE_BACKEND, DENSE_INDEX_QUANTIZE, \
+    DENSE_INDEX_IVF_MIN_VECTORS, DENSE_INDEX_IVF_NPROBE, HYBRID_RRF_K, HYBRID_WEIGHTS, \
+    HYBRID_CANDIDATES_PER_RETRIEVER, RERANKER, RERANK_CANDIDATES, RERANK_TOP_N, RERANK_BATCH_SIZE, \
+    RERANK_LATENCY_BUDGET_SECONDS, RERANK_CROSS_ENCODER_MODEL, INGESTION_QUEUE_MAX_JOBS, UPLOAD_MAX_BYTES, \
+    INGESTION_JOBS_KEPT, STARTUP_FROM_SNAPSHOT, LOADER_SECTION_MAX_CHARS
+from .llm import OLLAMA_MODEL, OLLAMA_BASE_URLS, OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS, \
+    OLLAMA_HEALTH_CHECK_TIMEOUT_SECONDS, OLLAMA_MAX_CONNECTIONS, OLLAMA_MAX_KEEPALIVE_CONNECTIONS, \
+    OLLAMA_REQUEST_TIMEOUT_SECONDS, LLM_MAX_CONCURRENT_GENERATIONS, LLM_MAX_QUEUE_SIZE, LLM_QUEUE_TIMEOUT_SECONDS, \
+    CONTEXT_MAX_TOKENS, CONTEXT_CHARS_PER_TOKEN, OLLAMA_KEEP_ALIVE
+from .metrics import METRICS_SECONDS_BUCKETS, METRICS_TOKENS_BUCKETS, METRICS_TOKENS_PER_SECOND_BUCKETS, \
+    METRICS_DOCUMENTS_BUCKETS, PROFILING_ENABLED
 from .prompts import PROMPT_TEMPLATE_PDF_QA
-from .paths import BASE_DIR, DOCUMENTS_DEFAULT_DIRECTORY, CHROMA_DB_DEFAULT_DIRECTORY, TEMPLATES_DIR
+from .paths import BASE_DIR, DOCUMENTS_DEFAULT_DIRECTORY, CHROMA_DB_DEFAULT_DIRECTORY, SPARSE_INDEX_DEFAULT_DIRECTORY, \
+    DENSE_INDEX_DEFAULT_DIRECTORY, INDEX_SNAPSHOTS_DEFAULT_DIRECTORY, INDEX_MANIFEST_DEFAULT_PATH, \
+    INDEX_SYNC_LOCK_DEFAULT_PATH, ANSWER_CACHE_DEFAULT_PATH, LLM_CACHE_DEFAULT_PATH, PROFILES_DEFAULT_DIRECTORY, \
+    UPLOADS_STAGING_DEFAULT_DIRECTORY, UPLOADS_DEFAULT_DIRECTORY, TEMPLATES_DIR
@@ -0,0 +1,17 @@
+# Answer cache: maximum number of cached answers and how long an answer stays valid (seconds)
+QA_CACHE_MAX_SIZE = 100
+QA_CACHE_TTL_SECONDS = 60 * 60
+
+# Minimum cosine similarity between two normalized queries for a cached answer to be reused
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+# Where cached answers are stored: "sqlite" shares them between worker processes and keeps
+# them across restarts, "memory" keeps them per process
+QA_CACHE_BACKEND = "sqlite"
+
+# Maximum number of answers kept by the persistent backend (least recently used are evicted first)
+QA_CACHE_PERSISTENT_MAX_SIZE = 5000
+
+# LLM (prompt -> generation) cache: maximum number of entries and how long an entry stays valid (seconds)
+LLM_CACHE_MAX_SIZE = 5000
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
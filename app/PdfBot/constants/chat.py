@@ -1 +1,22 @@
 MAX_INPUT_LENGTH = 2000
+
+# Cookie identifying a browser's chat session
+SESSION_COOKIE_NAME = "pdfbot_session"
+
+# Chat history: turns kept per session (ring buffer), characters of text kept across all sessions,
+# and seconds after which an idle session expires
+HISTORY_MAX_TURNS_PER_SESSION = 200
+HISTORY_MAX_TOTAL_CHARS = 50_000_000
+HISTORY_SESSION_IDLE_SECONDS = 3600
+
+# Turns rendered per page of chat history (older turns are fetched with `?before=<cursor>`), and the largest page
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# Batch API: most queries accepted per request, and generations a batch runs at once (it also waits for the
+# LLM scheduler, so interactive requests keep their share). A generation turned away as busy is retried
+# after a delay doubling on every attempt (seconds)
+BATCH_MAX_QUERIES = 10_000
+BATCH_MAX_CONCURRENCY = 2
+BATCH_BUSY_RETRIES = 5
+BATCH_BUSY_RETRY_SECONDS = 2
@@ -1,9 +1,119 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import os
+import threading
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
 
 NUMBER_OF_SOURCES_DISPLAY = 3
 NUMBER_TOP_SOURCES = 6
 
-EMBEDDING_MODEL = HuggingFaceEmbeddings(
+# Number of chunks embedded and upserted into the vector store per batch
+EMBEDDING_BATCH_SIZE = 64
+
+# Sync new, changed and removed documents into an existing index on startup
+INCREMENTAL_INDEXING = True
+
+# Serve the last published index snapshot as soon as the app starts, syncing documents in the background,
+# instead of syncing (and validating the vector store) before serving
+STARTUP_FROM_SNAPSHOT = True
+
+# Parallel ingestion: worker processes parsing and splitting PDFs, and the per-file time limit (seconds)
+INGESTION_MAX_WORKERS = os.cpu_count() or 1
+INGESTION_FILE_TIMEOUT = 120
+
+# Longest section (characters) text, Markdown, HTML and Word loaders yield before cutting, so large files stream
+LOADER_SECTION_MAX_CHARS = 8000
+
+# Uploads: ingestion jobs waiting in the queue before uploads are turned away with a 503, largest accepted file
+# (bytes), and finished jobs whose status is kept for polling
+INGESTION_QUEUE_MAX_JOBS = 100
+UPLOAD_MAX_BYTES = 100 * 1024 * 1024
+INGESTION_JOBS_KEPT = 1000
+
+# Threads of the bounded executor running CPU-bound request work (query embedding, BM25 scoring)
+CPU_EXECUTOR_MAX_WORKERS = os.cpu_count() or 1
+
+# Vector search backend: "numpy" searches a memory-mapped dense index mirrored from the Chroma embeddings
+# (exact, or IVF-partitioned for large corpora) and frozen into every index snapshot with the BM25 index;
+# "chroma" queries the live Chroma collection, which a background re-index updates before the swap
+VECTOR_STORE_BACKEND = "numpy"
+
+# Dense index: int8 quantization (4x smaller, slightly lower recall), the corpus size from which
+# IVF partitioning is used instead of exact search, and the number of IVF lists scored per query
+DENSE_INDEX_QUANTIZE = False
+DENSE_INDEX_IVF_MIN_VECTORS = 200_000
+DENSE_INDEX_IVF_NPROBE = 8
+
+# Hybrid retrieval: reciprocal-rank fusion constant, weights of the BM25 and vector rankings, and the
+# candidates fetched from each before fusion (more than NUMBER_TOP_SOURCES, so overlaps can be deduplicated)
+HYBRID_RRF_K = 60
+HYBRID_WEIGHTS = (0.5, 0.5)
+HYBRID_CANDIDATES_PER_RETRIEVER = 2 * NUMBER_TOP_SOURCES
+
+# Optional re-ranking between retrieval and the LLM: "none", "lexical" (BM25 over the candidates, no model)
+# or "cross-encoder" (small local model). RERANK_CANDIDATES chunks are retrieved and the RERANK_TOP_N best kept;
+# candidates are scored in batches until the latency budget (seconds) is spent
+RERANKER = "none"
+RERANK_CANDIDATES = 12
+RERANK_TOP_N = 4
+RERANK_BATCH_SIZE = 16
+RERANK_LATENCY_BUDGET_SECONDS = 0.25
+RERANK_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# BM25 (Okapi) parameters for the persisted sparse index
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+# Load the embedding model in the background once the server has started
+WARM_UP_EMBEDDING_MODEL = True
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Process-wide HuggingFace embedding model that is only built on first use.
+
+    Importing torch and sentence-transformers and loading the model takes seconds,
+    so it is deferred until something actually embeds a document or a query.
+    Construction is guarded by a lock, so concurrent first calls share one model.
+    """
+
+    def __init__(self, model_name: str, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+        self._model: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def get_model(self) -> Embeddings:
+        """
+        Returns the underlying embedding model, building it on first call.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    self._model = HuggingFaceEmbeddings(model_name=self.model_name, **self.kwargs)
+        return self._model
+
+    def warm_up(self) -> None:
+        """
+        Builds the model and runs one query, so the first real request doesn't pay for it.
+        """
+        self.get_model().embed_query("warm up")
+        print(f"🔥 Embedding model {self.model_name} is warm.")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.get_model().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.get_model().embed_query(text)
+
+
+EMBEDDING_MODEL = LazyEmbeddings(
     model_name="all-MiniLM-L6-v2",
     encode_kwargs={"normalize_embeddings": True}
 )
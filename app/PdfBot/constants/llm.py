@@ -0,0 +1,39 @@
+import os
+
+# Model served by every Ollama node
+OLLAMA_MODEL = "mistral"
+
+# Ollama nodes requests are balanced over, as a comma-separated list in the OLLAMA_BASE_URLS environment variable.
+# The default ensures the container can reach the host's Ollama instance.
+OLLAMA_BASE_URLS = [
+    url.strip() for url in os.environ.get("OLLAMA_BASE_URLS", "http://host.docker.internal:11434").split(",")
+    if url.strip()
+]
+
+# How long a node keeps the model loaded after a request (Ollama duration string, or a negative number to keep it
+# loaded indefinitely). Keeping it loaded preserves the prompt cache holding the evaluated prompt template
+OLLAMA_KEEP_ALIVE = -1
+
+# Token budget of the retrieved context packed into a prompt. The rest of the model's context window
+# holds the prompt template, the question and the answer
+CONTEXT_MAX_TOKENS = 2048
+
+# Average characters per token, used to estimate token counts without loading the model's tokenizer
+CONTEXT_CHARS_PER_TOKEN = 4
+
+# Seconds between health probes of the Ollama nodes, and how long a probe may take
+OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS = 10
+OLLAMA_HEALTH_CHECK_TIMEOUT_SECONDS = 2
+
+# Pooled HTTP connections to Ollama shared by all in-flight requests of a worker
+OLLAMA_MAX_CONNECTIONS = 256
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = 32
+
+# Seconds to wait on Ollama for a response (CPU generation of a long answer can take minutes)
+OLLAMA_REQUEST_TIMEOUT_SECONDS = 300
+
+# Admission control: generations sent to Ollama at once, requests allowed to wait for one,
+# and how long a request may wait before it is turned away as "busy" (seconds)
+LLM_MAX_CONCURRENT_GENERATIONS = 2
+LLM_MAX_QUEUE_SIZE = 32
+LLM_QUEUE_TIMEOUT_SECONDS = 60
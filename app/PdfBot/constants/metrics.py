@@ -0,0 +1,10 @@
+# Histogram buckets of the Prometheus metrics served at /metrics: durations (seconds), prompt sizes (tokens),
+# generation speed (tokens per second) and numbers of retrieved chunks
+METRICS_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRICS_TOKENS_BUCKETS = (64, 128, 256, 512, 1024, 2048, 3072, 4096, 8192)
+METRICS_TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+METRICS_DOCUMENTS_BUCKETS = (0, 1, 2, 4, 6, 8, 12, 16, 24, 32)
+
+# Per-request profiling: when enabled, a request with `?profile=true` runs under cProfile and its stats are
+# written to PROFILES_DEFAULT_DIRECTORY. Off by default, as profiling slows down every concurrent request
+PROFILING_ENABLED = False
@@ -10,11 +10,52 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 DOCUMENTS_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "documents")
 # print(f"[paths.py] DOCUMENTS_DEFAULT_DIRECTORY: {DOCUMENTS_DEFAULT_DIRECTORY}")  # DEBUG
 
+# === Uploaded Documents ===
+# Uploaded PDFs wait in the staging directory until the ingestion worker moves them into the documents folder
+UPLOADS_DEFAULT_DIRECTORY = os.path.join(DOCUMENTS_DEFAULT_DIRECTORY, "uploads")
+UPLOADS_STAGING_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "databases", "uploads_staging")
+# print(f"[paths.py] UPLOADS_DEFAULT_DIRECTORY: {UPLOADS_DEFAULT_DIRECTORY}")  # DEBUG
+
 # === Chroma Vector DB Directory ===
 # Directory where the Chroma vector DB will be stored
 CHROMA_DB_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "databases", "chroma_db")
 # print(f"[paths.py] CHROMA_DB_DEFAULT_DIRECTORY: {CHROMA_DB_DEFAULT_DIRECTORY}")  # DEBUG
 
+# === Sparse (BM25) Index Directory ===
+# Directory where the persisted BM25 index and chunk store are kept, next to the Chroma DB
+SPARSE_INDEX_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "databases", "sparse_index")
+# print(f"[paths.py] SPARSE_INDEX_DEFAULT_DIRECTORY: {SPARSE_INDEX_DEFAULT_DIRECTORY}")  # DEBUG
+
+# === Dense (NumPy) Index Directory ===
+# Directory where the memory-mapped dense index and its chunk store are kept, when used instead of Chroma for search
+DENSE_INDEX_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "databases", "dense_index")
+# print(f"[paths.py] DENSE_INDEX_DEFAULT_DIRECTORY: {DENSE_INDEX_DEFAULT_DIRECTORY}")  # DEBUG
+
+# === Index Snapshots ===
+# Directory of the versioned, read-only copies of the sparse and dense indexes that are served, one per index version
+INDEX_SNAPSHOTS_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "databases", "index_snapshots")
+# print(f"[paths.py] INDEX_SNAPSHOTS_DEFAULT_DIRECTORY: {INDEX_SNAPSHOTS_DEFAULT_DIRECTORY}")  # DEBUG
+
+# === Ingestion Manifest ===
+# File recording size, mtime, content hash and chunk IDs of every indexed document
+INDEX_MANIFEST_DEFAULT_PATH = os.path.join(BASE_DIR, "databases", "manifest.json")
+# print(f"[paths.py] INDEX_MANIFEST_DEFAULT_PATH: {INDEX_MANIFEST_DEFAULT_PATH}")  # DEBUG
+
+# === Index Sync Lock ===
+# File locked by the worker process syncing the documents folder into the shared indexes and publishing a snapshot
+INDEX_SYNC_LOCK_DEFAULT_PATH = os.path.join(BASE_DIR, "databases", "index_sync.lock")
+
+# === Answer and LLM Caches ===
+# SQLite databases shared by worker processes, keeping cached answers and LLM generations across restarts
+ANSWER_CACHE_DEFAULT_PATH = os.path.join(BASE_DIR, "databases", "answer_cache.sqlite3")
+LLM_CACHE_DEFAULT_PATH = os.path.join(BASE_DIR, "databases", "llm_cache.sqlite3")
+# print(f"[paths.py] ANSWER_CACHE_DEFAULT_PATH: {ANSWER_CACHE_DEFAULT_PATH}")  # DEBUG
+
+# === Request Profiles ===
+# Directory where cProfile stats of profiled requests are written (see PROFILING_ENABLED)
+PROFILES_DEFAULT_DIRECTORY = os.path.join(BASE_DIR, "profiles")
+# print(f"[paths.py] PROFILES_DEFAULT_DIRECTORY: {PROFILES_DEFAULT_DIRECTORY}")  # DEBUG
+
 # === Templates Directory ===
 # Directory for HTML templates (used in FastAPI Jinja2Templates)
 TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "../../templates")
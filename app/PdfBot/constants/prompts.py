@@ -1,5 +1,7 @@
 from langchain.prompts import PromptTemplate
 
+# The fixed instructions come before any variable, so every prompt starts with the same prefix,
+# which Ollama evaluates once and then reuses from its prompt cache
 PROMPT_TEMPLATE_PDF_QA = PromptTemplate.from_template("""
 You are a helpful assistant answering questions about documents provided in the context below.
 
@@ -30,7 +32,7 @@ A: Let's think step by step. The context mentions increased access, then it note
 ---
 
 ### Context Formatting
-The retrieved context comes from chunked text extracted from one or more PDF documents. Some chunks may include page numbers, titles, or metadata.
+The retrieved context comes from text extracted from one or more PDF documents. It is grouped by source: each source starts with its name and metadata (title, author, subject), followed by excerpts marked with their page numbers.
 
 Context:
 {context}
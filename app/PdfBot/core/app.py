@@ -1,7 +1,41 @@
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from ..constants import EMBEDDING_MODEL, WARM_UP_EMBEDDING_MODEL
+from ..helpers.executor import use_cpu_executor_by_default
+from ..helpers.profiling import ProfilingMiddleware
+from ..helpers.readiness import readiness
+
+
+def warm_up_in_background() -> threading.Thread:
+    """
+    Loads the embedding model on a daemon thread, so the server can accept
+    requests while torch and the model weights are being loaded. The worker
+    reports ready (`GET /ready`) once the model is loaded.
+
+    Returns:
+        threading.Thread: The started warm-up thread.
+    """
+    return readiness.warm_up_in_background("embedding_model", EMBEDDING_MODEL.warm_up)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: bounds the event loop's default executor to the CPU executor
+    and optionally warms up the embedding model after startup.
+    """
+    use_cpu_executor_by_default()
+    if WARM_UP_EMBEDDING_MODEL:
+        if EMBEDDING_MODEL.is_loaded:
+            readiness.set_ready("embedding_model")
+        else:
+            warm_up_in_background()
+    yield
+
 
 def create_app() -> FastAPI:
     """
@@ -9,15 +43,25 @@ def create_app() -> FastAPI:
 
     - Mounts the '/static' route to serve static files like CSS, JS, etc.
     - Dynamically resolves the path to the static directory, regardless of where the app is run from.
+    - Warms up the embedding model in the background once the server starts.
+    - Expects the index snapshot (and the embedding model, if it is warmed up) before reporting ready.
+    - Profiles requests with `?profile=true` when `PROFILING_ENABLED` is set.
 
     Returns:
         FastAPI: A fully configured FastAPI application.
     """
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
+
+    # Not ready until these are warm, even before their warm-ups start.
+    # Without warm-up, the embedding model is loaded by the first request instead
+    readiness.expect("index_snapshot")
+    if WARM_UP_EMBEDDING_MODEL:
+        readiness.expect("embedding_model")
 
     # Dynamically resolve the absolute path to the 'static' directory
     # Assumes static folder lives at project_root/static
     static_dir = Path(__file__).resolve().parent.parent.parent / "static"
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.add_middleware(ProfilingMiddleware)
 
     return app
@@ -11,12 +11,12 @@ def initialize_components():
     - Creates the FastAPI app instance
     - Loads or builds the vector store (ChromaDB) and its retriever
     - Instantiates the Ollama LLM
-    - Builds the RetrievalQA chain using the retriever and LLM
+    - Builds the async QA pipeline using the retriever and LLM
 
     Returns:
         tuple: A tuple containing:
             - app (FastAPI): the web application instance
-            - qa_chain (RetrievalQA): the retrieval-augmented question-answering chain
+            - qa_chain (QAPipeline): the retrieval-augmented question-answering pipeline
     """
     app = create_app()
     retriever = load_vector_store()
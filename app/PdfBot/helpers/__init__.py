@@ -1,17 +1,77 @@
 __all__ = [
-    "get_cached_answer", "set_cached_answer", "get_or_cache_qa_result",
-    "build_qa_chain",
-    "render_chat_response", "process_chat_request", "safe_run_qa",
-    "embed_documents", "load_vector_store", "find_all_pdfs", "split_documents", "embed_and_store_documents",
-    "is_chroma_db_valid", "get_vector_store",
-    "enable_llm_cache", "get_ollama_llm",
-    "sanitize_text", "build_source_strings", "validate_and_sanitize_query"
+    "get_cached_answer", "set_cached_answer", "get_or_cache_qa_result", "set_index_version", "get_cache_stats",
+    "get_cache_namespace", "stream_or_join_qa", "SharedGeneration",
+    "CacheBackend", "MemoryCacheBackend", "SQLiteCacheBackend", "create_cache_backend",
+    "lookup_cached_answer", "lookup_cached_answers", "get_similar_answer",
+    "answer_batch", "embed_queries", "retrieve_batch", "stream_batch_response",
+    "build_qa_chain", "QAPipeline",
+    "cpu_executor", "run_cpu_bound", "use_cpu_executor_by_default",
+    "render_chat_response", "process_chat_request", "safe_run_qa", "stream_qa_events", "stream_chat_response",
+    "format_sse",
+    "embed_documents", "load_vector_store", "embed_and_store_documents",
+    "is_chroma_db_valid", "get_vector_store", "get_sparse_retriever", "sync_documents",
+    "open_vector_store", "write_chunks_in_batches", "get_dense_retriever", "get_stored_embeddings",
+    "build_snapshot_retriever", "publish_index_snapshot", "reindex_documents", "can_serve_snapshot",
+    "SnapshotRetriever", "publish_snapshot", "get_current_snapshot", "read_snapshot_version", "remove_snapshots",
+    "warm_up_snapshot", "hold_snapshot", "release_snapshot",
+    "IngestionQueue", "IngestionQueueFullError", "get_upload_name", "handle_upload", "stage_upload",
+    "estimate_tokens", "pack_context", "render_context",
+    "Reranker", "LexicalReranker", "CrossEncoderReranker", "RerankingRetriever", "create_reranker",
+    "HybridRetriever", "build_hybrid_retriever", "reciprocal_rank_fusion", "get_document_keys",
+    "DenseIndex", "DenseRetriever", "build_dense_index", "load_dense_index", "update_dense_index",
+    "is_dense_index_valid",
+    "find_all_documents", "find_all_pdfs", "split_documents", "compute_chunk_id", "find_document_paths",
+    "load_document", "ingest_document", "iter_ingested_documents",
+    "DocumentLoader", "PdfLoader", "TextLoader", "MarkdownLoader", "HtmlLoader", "DocxLoader", "DOCUMENT_LOADERS",
+    "register_loader", "get_loader",
+    "hash_file", "load_manifest", "save_manifest", "diff_against_manifest", "compute_index_version",
+    "ChunkStore",
+    "Counter", "Histogram", "MetricsRegistry", "metrics_registry", "render_metrics", "track_stage",
+    "ProfilingMiddleware",
+    "Readiness", "readiness",
+    "SemanticCache", "normalize_query",
+    "SparseIndex", "SparseRetriever", "build_sparse_index", "load_sparse_index", "is_sparse_index_valid", "tokenize",
+    "update_sparse_index",
+    "enable_llm_cache", "get_ollama_llm", "BackendLLMCache", "LLMScheduler", "LLMBusyError", "llm_scheduler",
+    "OllamaPool", "OllamaBackend",
+    "sanitize_text", "build_source_strings", "validate_and_sanitize_query", "atomic_open", "file_lock",
+    "atomic_directory"
 ]
 
-from .cache import get_cached_answer, set_cached_answer, get_or_cache_qa_result
-from .chain import build_qa_chain
-from .chat import render_chat_response, process_chat_request, safe_run_qa
-from .embedding import embed_documents, load_vector_store, find_all_pdfs, split_documents, embed_and_store_documents, \
-    is_chroma_db_valid, get_vector_store
-from .llm import enable_llm_cache, get_ollama_llm
-from .utils import sanitize_text, build_source_strings, validate_and_sanitize_query
+from .cache import get_cached_answer, set_cached_answer, get_or_cache_qa_result, set_index_version, get_cache_stats, \
+    get_cache_namespace, lookup_cached_answer, lookup_cached_answers, get_similar_answer, stream_or_join_qa, \
+    SharedGeneration
+from .batch import answer_batch, embed_queries, retrieve_batch, stream_batch_response
+from .cache_backend import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend, create_cache_backend
+from .chain import build_qa_chain, QAPipeline
+from .chat import render_chat_response, process_chat_request, safe_run_qa, stream_qa_events, stream_chat_response, \
+    format_sse
+from .chunk_store import ChunkStore
+from .context import estimate_tokens, pack_context, render_context
+from .readiness import Readiness, readiness
+from .rerank import Reranker, LexicalReranker, CrossEncoderReranker, RerankingRetriever, create_reranker
+from .hybrid import HybridRetriever, build_hybrid_retriever, reciprocal_rank_fusion, get_document_keys
+from .dense import DenseIndex, DenseRetriever, build_dense_index, load_dense_index, update_dense_index, \
+    is_dense_index_valid
+from .embedding import embed_documents, load_vector_store, embed_and_store_documents, is_chroma_db_valid, \
+    get_vector_store, get_sparse_retriever, sync_documents, open_vector_store, write_chunks_in_batches, \
+    get_dense_retriever, get_stored_embeddings, build_snapshot_retriever, publish_index_snapshot, reindex_documents, \
+    can_serve_snapshot
+from .executor import cpu_executor, run_cpu_bound, use_cpu_executor_by_default
+from .ingestion import find_all_documents, find_all_pdfs, split_documents, compute_chunk_id, find_document_paths, \
+    load_document, ingest_document, iter_ingested_documents
+from .loaders import DocumentLoader, PdfLoader, TextLoader, MarkdownLoader, HtmlLoader, DocxLoader, DOCUMENT_LOADERS, \
+    register_loader, get_loader
+from .llm import enable_llm_cache, get_ollama_llm, BackendLLMCache, LLMScheduler, LLMBusyError, llm_scheduler
+from .manifest import hash_file, load_manifest, save_manifest, diff_against_manifest, compute_index_version
+from .metrics import Counter, Histogram, MetricsRegistry, metrics_registry, render_metrics, track_stage
+from .ollama_pool import OllamaPool, OllamaBackend
+from .profiling import ProfilingMiddleware
+from .semantic_cache import SemanticCache, normalize_query
+from .snapshots import SnapshotRetriever, publish_snapshot, get_current_snapshot, read_snapshot_version, \
+    remove_snapshots, warm_up_snapshot, hold_snapshot, release_snapshot
+from .sparse import SparseIndex, SparseRetriever, build_sparse_index, load_sparse_index, is_sparse_index_valid, \
+    tokenize, update_sparse_index
+from .uploads import IngestionQueue, IngestionQueueFullError, get_upload_name, handle_upload, stage_upload
+from .utils import sanitize_text, build_source_strings, validate_and_sanitize_query, atomic_open, atomic_directory, \
+    file_lock
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.requests import Request
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import get_executor_for_config
+from langchain_core.vectorstores import VectorStoreRetriever
+from starlette.responses import JSONResponse, StreamingResponse
+
+from .cache import lookup_cached_answers, set_cached_answer
+from .chain import QAPipeline
+from .dense import DenseRetriever
+from .executor import run_cpu_bound
+from .hybrid import HybridRetriever, reciprocal_rank_fusion
+from .llm import LLMBusyError
+from .rerank import RerankingRetriever
+from .semantic_cache import normalize_query
+from .snapshots import SnapshotRetriever
+from .utils import sanitize_text, build_source_strings, validate_and_sanitize_query
+from ..constants import EMBEDDING_MODEL, BATCH_MAX_QUERIES, BATCH_MAX_CONCURRENCY, BATCH_BUSY_RETRIES, \
+    BATCH_BUSY_RETRY_SECONDS
+
+
+def embed_queries(queries: Sequence[str], embeddings: Embeddings = EMBEDDING_MODEL) -> np.ndarray:
+    """
+    Embeds a batch of queries with a single call to the embedding model.
+
+    Args:
+        queries (Sequence[str]): The queries.
+        embeddings (Embeddings): The embedding model.
+
+    Returns:
+        np.ndarray: A (num_queries, dim) float32 array.
+    """
+    return np.asarray(embeddings.embed_documents(list(queries)), dtype=np.float32).reshape(len(queries), -1)
+
+
+def _query_chroma(retriever: VectorStoreRetriever, query_vectors: np.ndarray) -> List[List[Document]]:
+    """
+    Answers all queries with one Chroma query when the store exposes its collection, as langchain-chroma
+    does today, and otherwise falls back to the public API, one query vector at a time.
+    """
+    search_kwargs = dict(retriever.search_kwargs)
+    k = search_kwargs.pop("k", 4)
+    collection = getattr(retriever.vectorstore, "_collection", None)
+    if collection is None or not callable(getattr(collection, "query", None)):
+        return [
+            retriever.vectorstore.similarity_search_by_vector(vector.tolist(), k=k, **search_kwargs)
+            for vector in query_vectors
+        ]
+
+    results = collection.query(
+        query_embeddings=query_vectors.tolist(),
+        n_results=k,
+        where=search_kwargs.get("filter"),
+        where_document=search_kwargs.get("where_document"),
+        include=["documents", "metadatas"]
+    )
+    return [
+        [Document(page_content=text, metadata=metadata or {}, id=doc_id) for text, metadata, doc_id in zip(*hits)]
+        for hits in zip(results["documents"], results["metadatas"], results["ids"])
+    ]
+
+
+def retrieve_batch(retriever: BaseRetriever, queries: Sequence[str], query_vectors: np.ndarray) -> List[List[Document]]:
+    """
+    Retrieves the documents of a batch of already embedded queries.
+
+    Vector search is vectorized across the batch: the dense index scores all queries
+    with one matrix product, and Chroma answers all of them in a single query. Hybrid
+    retrievers run their sub-retrievers concurrently over the whole batch, then fuse
+    every query's rankings; re-ranking retrievers re-rank every query's candidates. The whole batch is served
+    from the same index snapshot.
+    Other retrievers are invoked query by query.
+
+    Args:
+        retriever (BaseRetriever): The QA pipeline's retriever.
+        queries (Sequence[str]): The queries.
+        query_vectors (np.ndarray): The embedding of every query, in the same order.
+
+    Returns:
+        List[List[Document]]: The documents of every query, best first.
+    """
+    if isinstance(retriever, SnapshotRetriever):
+        with retriever.lease() as live:
+            return retrieve_batch(live, queries, query_vectors)
+
+    if isinstance(retriever, RerankingRetriever):
+        candidates = retrieve_batch(retriever.retriever, queries, query_vectors)
+        return [retriever.rerank(query, documents) for query, documents in zip(queries, candidates)]
+
+    if isinstance(retriever, HybridRetriever):
+        with get_executor_for_config(None) as executor:
+            rankings = list(executor.map(lambda sub: retrieve_batch(sub, queries, query_vectors), retriever.retrievers))
+        return [
+            reciprocal_rank_fusion(query_rankings, retriever.weights, retriever.k, retriever.rrf_k)
+            for query_rankings in zip(*rankings)
+        ]
+
+    if isinstance(retriever, DenseRetriever):
+        return retriever.retrieve_by_vectors(query_vectors)
+
+    if isinstance(retriever, VectorStoreRetriever) and isinstance(retriever.vectorstore, Chroma) \
+            and retriever.search_type == "similarity":
+        return _query_chroma(retriever, query_vectors)
+
+    return [retriever.invoke(query) for query in queries]
+
+
+def _retrieve_and_pack(qa_chain: QAPipeline, queries: List[str], query_vectors: np.ndarray) -> List[List[Document]]:
+    return [qa_chain.pack(documents)["documents"]
+            for documents in retrieve_batch(qa_chain.retriever, queries, query_vectors)]
+
+
+async def _generate(qa_chain: QAPipeline, query: str, documents: List[Document]) -> str:
+    # A batch yields to interactive traffic: when the scheduler turns it away, it waits and tries again
+    for attempt in range(BATCH_BUSY_RETRIES + 1):
+        try:
+            return await qa_chain.agenerate(query, documents)
+        except LLMBusyError:
+            if attempt == BATCH_BUSY_RETRIES:
+                raise
+            await asyncio.sleep(BATCH_BUSY_RETRY_SECONDS * 2 ** attempt)
+
+
+def _batch_results(members: List[Tuple[int, str]], result: Optional[dict], cached: bool = False,
+                   error: Optional[str] = None) -> List[dict]:
+    sources = build_source_strings(result["source_documents"]) if result else []
+    return [
+        {
+            "index": index,
+            "query": query,
+            "answer": result["result"] if result else None,
+            "sources": sources,
+            "cached": cached,
+            "error": error
+        }
+        for index, query in members
+    ]
+
+
+async def answer_batch(queries: Sequence[str], qa_chain: QAPipeline, max_concurrency: int = BATCH_MAX_CONCURRENCY,
+                       embeddings: Embeddings = EMBEDDING_MODEL) -> AsyncIterator[dict]:
+    """
+    Answers a batch of queries, yielding every result as soon as it is ready.
+
+    Queries are validated, and those with the same normalized text are answered once.
+    The remaining ones are embedded with a single call to the embedding model, looked
+    up in the answer cache (shared with the chat), and the cache misses are retrieved
+    as one vectorized batch. At most `max_concurrency` generations of the batch run at
+    once, each admitted by the pipeline's scheduler; answers are cached as they arrive.
+
+    Results are dicts with the query's `index` in the batch, the sanitized `query`,
+    the `answer` and its `sources`, whether it was `cached`, and an `error` (or None).
+    Invalid queries come first, then cached answers, then generated ones in completion order.
+
+    Args:
+        queries (Sequence[str]): Raw user queries.
+        qa_chain (QAPipeline): The QA pipeline.
+        max_concurrency (int): Generations of this batch running at once.
+        embeddings (Embeddings): The model embedding the queries.
+
+    Yields:
+        dict: The result of every query.
+    """
+    groups: Dict[str, List[Tuple[int, str]]] = {}
+    for index, query in enumerate(queries):
+        try:
+            query_clean = validate_and_sanitize_query(query)
+        except ValueError as e:
+            yield _batch_results([(index, sanitize_text(query))], None, error=str(e))[0]
+            continue
+        groups.setdefault(normalize_query(query_clean), []).append((index, query_clean))
+    if not groups:
+        return
+
+    members = list(groups.values())
+    unique = [group[0][1] for group in members]
+    vectors = await run_cpu_bound(embed_queries, unique, embeddings)
+
+    misses = []
+    for position, cached in enumerate(await run_cpu_bound(lookup_cached_answers, unique, vectors)):
+        if cached:
+            for result in _batch_results(members[position], cached, cached=True):
+                yield result
+        else:
+            misses.append(position)
+    if not misses:
+        return
+
+    try:
+        retrieved = await run_cpu_bound(_retrieve_and_pack, qa_chain, [unique[i] for i in misses], vectors[misses])
+    except Exception as e:
+        print(f"❌ Error during batch retrieval: {e}")
+        for position in misses:
+            for result in _batch_results(members[position], None, error=sanitize_text(str(e))):
+                yield result
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(position: int, documents: List[Document]) -> Tuple[int, Optional[dict], Optional[str]]:
+        query = unique[position]
+        try:
+            async with semaphore:
+                answer = await _generate(qa_chain, query, documents)
+            result = {"query": query, "result": answer, "source_documents": documents}
+            await run_cpu_bound(set_cached_answer, query, result, vectors[position])
+            return position, result, None
+        except Exception as e:
+            print(f"❌ Error during batch QA inference: {e}")
+            return position, None, sanitize_text(str(e))
+
+    tasks = [asyncio.ensure_future(run(position, documents)) for position, documents in zip(misses, retrieved)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            position, result, error = await next_done
+            for batch_result in _batch_results(members[position], result, error=error):
+                yield batch_result
+    finally:
+        # The client went away (or the batch is done): pending generations are not needed anymore
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_batch_results(queries: List[str], qa_chain: QAPipeline) -> AsyncIterator[str]:
+    """
+    Streams the results of `answer_batch` as JSON Lines, and logs a summary once the batch is done.
+    """
+    started = time.perf_counter()
+    counts = {"cached": 0, "errors": 0}
+    async for result in answer_batch(queries, qa_chain):
+        counts["cached"] += result["cached"]
+        counts["errors"] += result["error"] is not None
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    print(f"📦 Answered a batch of {len(queries)} queries in {time.perf_counter() - started:.2f}s "
+          f"({counts['cached']} cached, {counts['errors']} errors)")
+
+
+async def stream_batch_response(request: Request, qa_chain: QAPipeline):
+    """
+    Handles a batch request: a JSON body `{"queries": [...]}` of at most `BATCH_MAX_QUERIES`
+    strings, answered as a stream of JSON Lines (one result per query, as they complete).
+
+    Args:
+        request (Request): Incoming FastAPI request.
+        qa_chain (QAPipeline): The pipeline responsible for QA inference.
+
+    Returns:
+        Union[StreamingResponse, JSONResponse]: An `application/x-ndjson` response, or a 400 JSON error.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+
+    queries = payload.get("queries") if isinstance(payload, dict) else None
+    if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+        return JSONResponse(content={"error": "⚠️ Expected a JSON object with a list of `queries` strings."},
+                            status_code=400)
+    if not 0 < len(queries) <= BATCH_MAX_QUERIES:
+        return JSONResponse(content={"error": f"⚠️ A batch must hold between 1 and {BATCH_MAX_QUERIES} queries."},
+                            status_code=400)
+
+    return StreamingResponse(
+        stream_batch_results(queries, qa_chain),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,16 +1,116 @@
-from cachetools import LRUCache
-from typing import Optional
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from langchain.chains import RetrievalQA
-from starlette.concurrency import run_in_threadpool
+from langchain_core.documents import Document
 
-# In-memory LRU cache to store recent QA results
-qa_cache = LRUCache(maxsize=100)
+from .cache_backend import create_cache_backend
+from .chain import QAPipeline
+from .executor import run_cpu_bound
+from .metrics import CACHE_LOOKUPS, track_stage
+from .semantic_cache import SemanticCache, normalize_query
+from ..constants import EMBEDDING_MODEL, QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD, \
+    QA_CACHE_BACKEND, QA_CACHE_PERSISTENT_MAX_SIZE, ANSWER_CACHE_DEFAULT_PATH, PROMPT_TEMPLATE_PDF_QA
+
+# Answers depend on the prompt as much as on the documents: editing the template invalidates them too
+PROMPT_VERSION = hashlib.sha256(PROMPT_TEMPLATE_PDF_QA.template.encode("utf-8")).hexdigest()[:16]
+
+# Version of the document index the cached answers were computed against
+cached_index_version: Optional[str] = None
+
+
+def get_cache_namespace(index_version: Optional[str]) -> str:
+    """
+    Returns the namespace cached answers are stored under for a document index version
+    and the current prompt template.
+
+    Args:
+        index_version (Optional[str]): The index version, or None if unknown.
+
+    Returns:
+        str: The cache namespace.
+    """
+    return f"{index_version or 'unversioned'}:{PROMPT_VERSION}"
+
+
+# Semantic cache of QA results, keyed on normalized queries and their embeddings.
+# Answers are stored in a backend shared by worker processes and kept across restarts.
+qa_cache = SemanticCache(
+    EMBEDDING_MODEL,
+    maxsize=QA_CACHE_MAX_SIZE,
+    ttl=QA_CACHE_TTL_SECONDS,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    backend=create_cache_backend(
+        QA_CACHE_BACKEND, ANSWER_CACHE_DEFAULT_PATH, maxsize=QA_CACHE_PERSISTENT_MAX_SIZE, ttl=QA_CACHE_TTL_SECONDS
+    ),
+    namespace=get_cache_namespace(cached_index_version)
+)
+
+# Single-flight: normalized query -> future of the QA run currently computing its answer
+inflight_requests: Dict[str, asyncio.Future] = {}
+coalesced_requests = 0
+
+
+class SharedGeneration:
+    """
+    The sources and tokens of a streamed QA run, as they are produced, so callers that
+    join the run replay them instead of starting their own generation.
+    """
+
+    def __init__(self):
+        self.documents: Optional[List[Document]] = None
+        self.tokens: List[str] = []
+        self.finished = False
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_documents(self, documents: List[Document]) -> None:
+        self.documents = documents
+        self._notify()
+
+    def add_token(self, token: str) -> None:
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self) -> None:
+        self.finished = True
+        self._notify()
+
+    async def wait_for_documents(self) -> Optional[List[Document]]:
+        """
+        Returns the run's documents once retrieved, or None if it ended before retrieval.
+        """
+        while self.documents is None and not self.finished:
+            await self._changed.wait()
+        return self.documents
+
+    async def replay(self) -> AsyncIterator[str]:
+        """
+        Yields every token of the run, those already generated first, until it ends.
+        """
+        position = 0
+        while True:
+            if position < len(self.tokens):
+                token = self.tokens[position]
+                position += 1
+                yield token
+            elif self.finished:
+                return
+            else:
+                await self._changed.wait()
+
+
+# Normalized query -> streamed run currently computing its answer (also registered in `inflight_requests`)
+inflight_streams: Dict[str, SharedGeneration] = {}
 
 
 def get_cached_answer(query: str) -> Optional[dict]:
     """
     Retrieve a cached result for a query, if available.
+    Only the normalized query is looked up; no embedding is computed.
 
     Args:
         query (str): The user query string.
@@ -18,36 +118,250 @@ def get_cached_answer(query: str) -> Optional[dict]:
     Returns:
         Optional[dict]: Cached result if present, otherwise None.
     """
-    return qa_cache.get(query)
+    with track_stage("cache_exact"):
+        cached = qa_cache.get_exact(query)
+    if cached is not None:
+        CACHE_LOOKUPS.inc(result="exact_hit")
+    return cached
+
+
+def get_similar_answer(query: str, vector: Optional[Sequence[float]] = None) -> Optional[dict]:
+    """
+    Retrieve the cached result of a semantically equivalent query, embedding the query
+    unless its embedding is given. Counts the lookup as a near hit or a miss.
 
+    Args:
+        query (str): The user query string.
+        vector (Optional[Sequence[float]]): The query's embedding, if already computed.
 
-def set_cached_answer(query: str, result: dict) -> None:
+    Returns:
+        Optional[dict]: Cached result if present, otherwise None.
+    """
+    with track_stage("cache_semantic"):
+        cached = qa_cache.get_similar(query, vector=vector)
+    CACHE_LOOKUPS.inc(result="near_hit" if cached is not None else "miss")
+    return cached
+
+
+def set_cached_answer(query: str, result: dict, vector: Optional[Sequence[float]] = None) -> None:
     """
     Cache the result of a query.
 
     Args:
         query (str): The user query string.
         result (dict): The result dictionary to cache.
+        vector (Optional[Sequence[float]]): The query's embedding, if already computed.
+    """
+    qa_cache.set(query, result, vector=vector)
+
+
+def lookup_cached_answers(queries: Sequence[str], vectors: Sequence[Sequence[float]]) -> List[Optional[dict]]:
+    """
+    Looks up cached answers for a batch of already embedded queries: every normalized
+    query first, then a semantically equivalent cached query using its embedding.
+
+    Args:
+        queries (Sequence[str]): The user queries.
+        vectors (Sequence[Sequence[float]]): The embedding of every query, in the same order.
+
+    Returns:
+        List[Optional[dict]]: The cached result of every query, or None on a miss.
+    """
+    return [get_cached_answer(query) or get_similar_answer(query, vector) for query, vector in zip(queries, vectors)]
+
+
+def set_index_version(version: Optional[str]) -> None:
+    """
+    Records the version of the live document index. Answers are namespaced by it,
+    so those computed against another version are no longer served.
+
+    Args:
+        version (Optional[str]): The index version, or None if unknown.
+    """
+    global cached_index_version
+    if version != cached_index_version:
+        if cached_index_version is not None:
+            print("🧹 Document index changed. Answers cached for the previous version will no longer be served.")
+        qa_cache.set_namespace(get_cache_namespace(version))
+        cached_index_version = version
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns answer cache counters: exact hits, near (semantic) hits, misses, current size,
+    requests coalesced onto an in-flight run of the same query, and runs still in flight.
+
+    Returns:
+        dict: The cache statistics.
     """
-    qa_cache[query] = result
+    return {
+        **qa_cache.stats,
+        "size": len(qa_cache),
+        "coalesced": coalesced_requests,
+        "in_flight": len(inflight_requests),
+    }
 
 
-async def get_or_cache_qa_result(query: str, qa_chain: RetrievalQA) -> dict:
+async def lookup_cached_answer(query: str) -> Optional[dict]:
+    """
+    Looks up a cached answer without running the chain: the normalized query first,
+    then (embedding it on the CPU executor) a semantically equivalent cached query.
+
+    Args:
+        query (str): The user's question.
+
+    Returns:
+        Optional[dict]: The cached result, or None on a miss.
+    """
+    # The cache backend may block on disk I/O (SQLite), so even exact lookups run off the event loop
+    cached = await asyncio.to_thread(get_cached_answer, query)
+    if cached:
+        return cached
+    return await run_cpu_bound(get_similar_answer, query)
+
+
+async def get_or_cache_qa_result(query: str, qa_chain: QAPipeline) -> dict:
     """
     Returns a cached QA result if it exists, otherwise runs the chain and caches it.
 
+    Exact (normalized) matches are served without touching the embedding model, but off
+    the event loop, as the cache backend may block on disk I/O (SQLite); otherwise the
+    query is embedded to look for a semantically equivalent cached query.
+    Concurrent callers asking the same (normalized) question share a single run:
+    they await the in-flight result instead of starting their own generation. The run
+    keeps going (and is cached) when callers disconnect. Errors propagate to every
+    waiter and are never cached.
+
     Args:
         query (str): The user's question.
-        qa_chain (RetrievalQA): The QA chain to invoke if result isn't cached.
+        qa_chain (QAPipeline): The QA pipeline to run if result isn't cached.
 
     Returns:
         dict: The result from cache or from chain execution.
     """
-    cached = get_cached_answer(query)
+    global coalesced_requests
+
+    cached = await asyncio.to_thread(get_cached_answer, query)
+    if cached:
+        return cached
+
+    key = normalize_query(query)
+    inflight = inflight_requests.get(key)
+    if inflight is not None:
+        coalesced_requests += 1
+    else:
+        # The run is a task of its own, owned by no caller: the first one disconnecting doesn't cancel the others
+        inflight = asyncio.create_task(_lookup_or_run_qa(query, qa_chain))
+        inflight_requests[key] = inflight
+
+        def forget(task: asyncio.Task) -> None:
+            if inflight_requests.get(key) is task:
+                del inflight_requests[key]
+            if not task.cancelled():
+                task.exception()  # Mark as retrieved: if every caller left, asyncio would log it as unhandled
+
+        inflight.add_done_callback(forget)
+
+    try:
+        # Shielded, so a caller disconnecting doesn't cancel the shared run
+        return await asyncio.shield(inflight)
+    except asyncio.CancelledError:
+        # Only a joined streamed run is cancelled along with its caller (see `stream_or_join_qa`)
+        if inflight.cancelled():
+            raise RuntimeError("The answer to this question was cancelled while it was generated. "
+                               "Please try again.") from None
+        raise
+
+
+async def _lookup_or_run_qa(query: str, qa_chain: QAPipeline) -> dict:
+    """
+    Semantic cache lookup followed, on a miss, by a pipeline run whose result is cached.
+    """
+    # Embedding the query is CPU-bound, so the semantic lookup runs on the CPU executor
+    cached = await run_cpu_bound(get_similar_answer, query)
     if cached:
         return cached
 
-    # Run chain in a background thread and cache the result
-    result = await run_in_threadpool(qa_chain.invoke, query)
-    set_cached_answer(query, result)
+    # Retrieval and generation are awaited natively; only caching (which embeds the query) is offloaded
+    result = await qa_chain.ainvoke(query)
+    await run_cpu_bound(set_cached_answer, query, result)
     return result
+
+
+async def stream_or_join_qa(query: str, qa_chain: QAPipeline) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streams the answer to a query that missed the answer cache, as ("sources", documents)
+    and ("token", text) events followed by a final ("result", result) event.
+
+    Concurrent callers asking the same (normalized) question share a single run, as in
+    `get_or_cache_qa_result`: the first one streams the generation and caches it, later
+    ones replay its sources and tokens as they are generated. A caller joining a
+    non-streamed run gets its answer as a single token once it is done.
+    Must be closed (e.g. with `contextlib.aclosing`) if abandoned, so joined callers are released.
+
+    Args:
+        query (str): The sanitized user question.
+        qa_chain (QAPipeline): The QA pipeline.
+
+    Yields:
+        Tuple[str, Any]: The event name and its payload.
+
+    Raises:
+        LLMBusyError: If the generation is not admitted by the scheduler.
+    """
+    global coalesced_requests
+
+    key = normalize_query(query)
+    inflight = inflight_requests.get(key)
+    if inflight is not None:
+        coalesced_requests += 1
+        shared = inflight_streams.get(key)
+        documents = await shared.wait_for_documents() if shared else None
+        if documents is not None:
+            yield "sources", documents
+            async for token in shared.replay():
+                yield "token", token
+        try:
+            # Shielded, so a caller disconnecting doesn't cancel the shared run
+            result = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if inflight.cancelled():
+                raise RuntimeError("The answer to this question was cancelled while it was generated. "
+                                   "Please try again.") from None
+            raise
+        if documents is None:
+            yield "sources", result["source_documents"]
+            yield "token", result["result"]
+        yield "result", result
+        return
+
+    future = asyncio.get_running_loop().create_future()
+    shared = SharedGeneration()
+    inflight_requests[key] = future
+    inflight_streams[key] = shared
+    try:
+        qa_chain.check_capacity()
+        documents = await qa_chain.aretrieve(query)
+        shared.set_documents(documents)
+        yield "sources", documents
+
+        async for token in qa_chain.astream(query, documents):
+            shared.add_token(token)
+            yield "token", token
+
+        result = {"query": query, "result": "".join(shared.tokens), "source_documents": documents}
+        await run_cpu_bound(set_cached_answer, query, result)
+    except BaseException as e:
+        if isinstance(e, (asyncio.CancelledError, GeneratorExit)):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved: with no waiters, asyncio would log it as unhandled
+        raise
+    else:
+        future.set_result(result)
+    finally:
+        shared.finish()
+        del inflight_requests[key]
+        del inflight_streams[key]
+    yield "result", result
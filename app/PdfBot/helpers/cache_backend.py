@@ -0,0 +1,190 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from cachetools import TTLCache
+from langchain_core.documents import Document
+
+DOCUMENT_MARKER = "__document__"
+
+
+def _encode_value(value: Any) -> str:
+    """
+    Serializes a cached value to JSON; LangChain documents (e.g. QA sources) are tagged so they can be restored.
+    """
+    def default(obj: Any) -> dict:
+        if isinstance(obj, Document):
+            return {DOCUMENT_MARKER: True, "page_content": obj.page_content, "metadata": obj.metadata}
+        raise TypeError(f"Cannot cache a value of type {type(obj).__name__}")
+
+    return json.dumps(value, default=default, ensure_ascii=False)
+
+
+def _decode_value(payload: str) -> Any:
+    """
+    Restores a value serialized by `_encode_value`.
+    """
+    def object_hook(obj: dict) -> Any:
+        if obj.get(DOCUMENT_MARKER):
+            return Document(page_content=obj["page_content"], metadata=obj["metadata"])
+        return obj
+
+    return json.loads(payload, object_hook=object_hook)
+
+
+class CacheBackend(ABC):
+    """
+    Key-value storage behind the answer and LLM caches, with a size cap and a TTL.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the live value stored under the key, or None.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries beyond the size cap.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Drops every stored entry.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Returns the number of stored entries.
+        """
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process, in-memory backend: an LRU cache whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk backend stored in a SQLite database, shared by every worker process
+    and kept across restarts.
+
+    The database runs in WAL mode, so readers never block on a writer. Values are
+    stored as JSON together with their expiry time and last access time; once more
+    than `maxsize` entries are stored, expired entries and then the least recently
+    used ones are deleted. Each thread (and process) opens its own connection lazily.
+    """
+
+    def __init__(self, path: str, maxsize: int, ttl: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_last_access ON cache_entries (last_access)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+        return _decode_value(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        payload = _encode_value(value)
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl, now)
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            if count > self.maxsize:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries ORDER BY last_access "
+                    "LIMIT max(0, (SELECT COUNT(*) FROM cache_entries) - ?))",
+                    (self.maxsize,)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        return count
+
+
+def create_cache_backend(kind: str, path: str, maxsize: int, ttl: float) -> CacheBackend:
+    """
+    Creates the cache backend selected in the constants.
+
+    Args:
+        kind (str): "sqlite" for the shared on-disk backend, "memory" for a per-process one.
+        path (str): Database path of the SQLite backend.
+        maxsize (int): Maximum number of entries.
+        ttl (float): Time-to-live of an entry, in seconds.
+
+    Returns:
+        CacheBackend: The cache backend.
+    """
+    if kind == "sqlite":
+        return SQLiteCacheBackend(path, maxsize=maxsize, ttl=ttl)
+    if kind == "memory":
+        return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {kind!r}")
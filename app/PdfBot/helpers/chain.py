@@ -1,31 +1,170 @@
-from langchain.chains import RetrievalQA
+import contextlib
+from typing import AsyncIterator, Callable, List, Optional
+
+from langchain_core.documents import Document
 from langchain_core.language_models import BaseLanguageModel
+from langchain_core.prompts import BasePromptTemplate
 from langchain_core.retrievers import BaseRetriever
-from langchain_core.vectorstores import VectorStoreRetriever
 
-from ..constants import PROMPT_TEMPLATE_PDF_QA
+from .context import estimate_tokens, pack_context, render_context
+from .llm import LLMScheduler, llm_scheduler
+from .metrics import PROMPT_TOKENS, RETRIEVED_DOCUMENTS, track_stage
+from ..constants import PROMPT_TEMPLATE_PDF_QA, CONTEXT_MAX_TOKENS
+
+
+class QAPipeline:
+    """
+    Retrieval-augmented QA pipeline with a native asyncio path.
+
+    Retrieval and generation are awaited rather than run in a worker thread:
+    the retriever's async API runs its sub-retrievers concurrently, and the LLM
+    is called through its async (pooled HTTP) client, so a request waiting on
+    Ollama holds no thread. Results have the same shape as RetrievalQA's
+    (`query`, `result`, `source_documents`).
+
+    Async generations are admitted by the `scheduler`, if any, which bounds how
+    many run at once and raises `LLMBusyError` when too many are waiting.
+
+    Retrieved chunks are packed into a context of at most `max_context_tokens`
+    tokens (see `pack_context`), so prompt evaluation stays cheap and within the
+    model's context window.
+    """
+
+    def __init__(self, llm: BaseLanguageModel, retriever: BaseRetriever,
+                 prompt: BasePromptTemplate = PROMPT_TEMPLATE_PDF_QA, scheduler: Optional[LLMScheduler] = None,
+                 max_context_tokens: int = CONTEXT_MAX_TOKENS, count_tokens: Callable[[str], int] = estimate_tokens):
+        self.llm = llm
+        self.retriever = retriever
+        self.prompt = prompt
+        self.scheduler = scheduler
+        self.max_context_tokens = max_context_tokens
+        self.count_tokens = count_tokens
+
+    def pack(self, documents: List[Document]) -> dict:
+        """
+        Packs the most relevant documents that fit into the context budget (see `pack_context`).
+        """
+        return pack_context(documents, self.max_context_tokens, self.count_tokens)
+
+    def format_prompt(self, query: str, documents: List[Document]) -> str:
+        """
+        Renders the prompt sent to the LLM and logs its token count. Documents already packed
+        (as `aretrieve` returns them) are rendered once as they are; others are packed first.
+
+        Args:
+            query (str): The user's question.
+            documents (List[Document]): The retrieved documents, most relevant first.
+
+        Returns:
+            str: The formatted prompt.
+        """
+        with track_stage("prompt"):
+            context = render_context(documents)
+            packed = {"context": context, "documents": documents, "tokens": self.count_tokens(context)}
+            if packed["tokens"] > self.max_context_tokens:
+                packed = self.pack(documents)
+            prompt = self.prompt.format(context=packed["context"], question=query)
+            prompt_tokens = self.count_tokens(prompt)
+        PROMPT_TOKENS.observe(prompt_tokens)
+        print(f"🧮 Prompt: ~{prompt_tokens} tokens, {packed['tokens']} of them context "
+              f"({len(packed['documents'])}/{len(documents)} chunks)")
+        return prompt
+
+    async def aretrieve(self, query: str) -> List[Document]:
+        """
+        Retrieves the documents relevant to a query, keeping those that fit into the context budget.
+        """
+        with track_stage("retrieval"):
+            documents = await self.retriever.ainvoke(query)
+        packed = self.pack(documents)["documents"]
+        RETRIEVED_DOCUMENTS.observe(len(documents), kind="retrieved")
+        RETRIEVED_DOCUMENTS.observe(len(packed), kind="packed")
+        return packed
+
+    async def astream(self, query: str, documents: List[Document]) -> AsyncIterator[str]:
+        """
+        Streams the answer to a query, token by token, from already retrieved documents.
+        The generation slot is held until the stream ends.
+        """
+        prompt = self.format_prompt(query, documents)
+        async with self._generation_slot():
+            with track_stage("generation"):
+                async for token in self.llm.astream(prompt):
+                    yield token
+
+    def is_busy(self) -> bool:
+        """
+        Returns True if a new generation would be rejected right away.
+        """
+        return self.scheduler is not None and self.scheduler.is_full()
+
+    def check_capacity(self) -> None:
+        """
+        Rejects a request before any retrieval work is done if its generation could not be admitted.
+
+        Raises:
+            LLMBusyError: If the scheduler's queue is full.
+        """
+        if self.scheduler is not None:
+            self.scheduler.check_capacity()
+
+    def _generation_slot(self):
+        return self.scheduler.slot() if self.scheduler else contextlib.nullcontext()
+
+    async def ainvoke(self, query: str) -> dict:
+        """
+        Retrieves the relevant documents and generates an answer.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            dict: The query, the answer (`result`) and the `source_documents`.
+
+        Raises:
+            LLMBusyError: If the generation is not admitted by the scheduler.
+        """
+        self.check_capacity()
+        documents = await self.aretrieve(query)
+        answer = await self.agenerate(query, documents)
+        return {"query": query, "result": answer, "source_documents": documents}
+
+    async def agenerate(self, query: str, documents: List[Document]) -> str:
+        """
+        Generates the answer to a query from already retrieved documents, holding a generation slot.
+
+        Raises:
+            LLMBusyError: If the generation is not admitted by the scheduler.
+        """
+        prompt = self.format_prompt(query, documents)
+        async with self._generation_slot():
+            with track_stage("generation"):
+                return await self.llm.ainvoke(prompt)
+
+    def invoke(self, query: str) -> dict:
+        """
+        Synchronous counterpart of `ainvoke`, for scripts and other non-async callers.
+        It bypasses the (asyncio) scheduler.
+        """
+        documents = self.pack(self.retriever.invoke(query))["documents"]
+        answer = self.llm.invoke(self.format_prompt(query, documents))
+        return {"query": query, "result": answer, "source_documents": documents}
 
 
-def build_qa_chain(llm: BaseLanguageModel, retriever: BaseRetriever) -> RetrievalQA:
+def build_qa_chain(llm: BaseLanguageModel, retriever: BaseRetriever,
+                   scheduler: Optional[LLMScheduler] = llm_scheduler) -> QAPipeline:
     """
-    Builds a RetrievalQA chain using the provided language model and retriever.
+    Builds the QA pipeline using the provided language model and retriever.
 
-    The chain uses the 'stuff' strategy to combine retrieved documents into a single prompt,
+    The pipeline packs the retrieved documents into a single prompt under a token budget,
     and applies a custom prompt template for grounded PDF-based QA.
 
     Args:
         llm (BaseLanguageModel): The language model to use for answering questions.
-        retriever (VectorStoreRetriever): The retriever to fetch relevant documents.
+        retriever (BaseRetriever): The retriever to fetch relevant documents.
+        scheduler (Optional[LLMScheduler]): Admission control for generations; the process-wide one by default.
 
     Returns:
-        RetrievalQA: A configured RetrievalQA chain that returns answers and source documents.
+        QAPipeline: A configured QA pipeline that returns answers and source documents.
     """
-    return RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
-        return_source_documents=True,
-        chain_type="stuff",
-        chain_type_kwargs={
-            "prompt": PROMPT_TEMPLATE_PDF_QA
-        }
-    )
+    return QAPipeline(llm, retriever, scheduler=scheduler)
@@ -1,63 +1,129 @@
+import asyncio
+import json
+import time
+from contextlib import aclosing
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
-from langchain.chains import RetrievalQA
-from typing import Optional
+from typing import Any, AsyncIterator, Optional, Tuple
 
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
-from .cache import get_or_cache_qa_result
+from .cache import get_or_cache_qa_result, lookup_cached_answer, stream_or_join_qa
+from .chain import QAPipeline
+from .history import ChatHistoryStore, is_valid_session_id, new_session_id
+from .llm import LLMBusyError
+from .metrics import REQUEST_SECONDS, track_stage
 from .utils import sanitize_text, build_source_strings, validate_and_sanitize_query
+from ..constants import SESSION_COOKIE_NAME, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
 from ..constants.paths import TEMPLATES_DIR
 
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
-chat_history = []
+chat_history = ChatHistoryStore()
 
+NO_SOURCES_WARNING = "\n\n⚠️ There were no supporting sources retrieved."
 
-def render_chat_response(request: Request, error: Optional[str] = None):
+# Seconds a client is told to wait before retrying a request rejected as busy
+BUSY_RETRY_AFTER_SECONDS = 5
+
+
+def get_session_id(request: Request) -> Tuple[str, bool]:
+    """
+    Returns the chat session of a request, read from its session cookie.
+
+    Args:
+        request (Request): Incoming FastAPI request.
+
+    Returns:
+        Tuple[str, bool]: The session ID, and whether it is new (and must be set as a cookie).
+    """
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    if is_valid_session_id(session_id):
+        return session_id, False
+    return new_session_id(), True
+
+
+def set_session_cookie(response: Response, session_id: str) -> None:
+    """
+    Stores the chat session ID in the client's session cookie.
+    """
+    response.set_cookie(SESSION_COOKIE_NAME, session_id, httponly=True, samesite="lax")
+
+
+def _int_query_param(request: Request, name: str) -> Optional[int]:
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def render_chat_response(request: Request, error: Optional[str] = None, status_code: int = 200,
+                         session: Optional[Tuple[str, bool]] = None):
     """
     Returns either a rendered HTML page or JSON response based on `?json=true`.
 
+    Only one page of the session's chat history is rendered: the latest turns, or
+    the turns before the `?before=<cursor>` query parameter. The response carries
+    the cursor of the next older page (`next_cursor`), if any. `?limit=` sets the
+    page size.
+
     Args:
         request (Request): Incoming FastAPI request.
         error (Optional[str]): Optional error message.
+        status_code (int): HTTP status of the response (503 when the LLM is busy).
+        session (Optional[Tuple[str, bool]]): The session, as returned by `get_session_id`;
+            read from the request by default.
 
     Returns:
         Union[TemplateResponse, JSONResponse]: HTML or JSON output.
     """
+    session_id, is_new_session = session or get_session_id(request)
+    before = _int_query_param(request, "before")
+    limit = min(max(_int_query_param(request, "limit") or HISTORY_PAGE_SIZE, 1), HISTORY_MAX_PAGE_SIZE)
+    page, next_cursor = chat_history.get_page(session_id, before=before, limit=limit)
+
     error_sanitized = sanitize_text(error) if error else None
     response_payload = {
-        "chat_history": chat_history,
+        "chat_history": page,
+        "next_cursor": next_cursor,
         "error": error_sanitized
     }
 
+    headers = {"Retry-After": str(BUSY_RETRY_AFTER_SECONDS)} if status_code == 503 else None
     if request.query_params.get("json") == "true":
-        return JSONResponse(content=response_payload)
+        response = JSONResponse(content=response_payload, status_code=status_code, headers=headers)
+    else:
+        response = templates.TemplateResponse(
+            request,
+            "chat.html",
+            {**response_payload, "before": before},
+            status_code=status_code,
+            headers=headers
+        )
 
-    return templates.TemplateResponse(
-        request,
-        "chat.html",
-        response_payload
-    )
+    if is_new_session:
+        set_session_cookie(response, session_id)
+    return response
 
 
-async def safe_run_qa(query: str, qa_chain: RetrievalQA) -> dict:
+async def safe_run_qa(query: str, qa_chain: QAPipeline) -> dict:
     """
     Executes the QA chain safely, handling validation and fallback messaging.
 
     Args:
         query (str): Raw user query string.
-        qa_chain (RetrievalQA): The QA chain object.
+        qa_chain (QAPipeline): The QA pipeline.
 
     Returns:
         dict: Contains sanitized query, final answer, and source strings.
     """
-    query_clean = validate_and_sanitize_query(query)
+    with track_stage("validate"):
+        query_clean = validate_and_sanitize_query(query)
     result = await get_or_cache_qa_result(query_clean, qa_chain)
     answer = result["result"]
 
     sources = build_source_strings(result["source_documents"])
     if not sources:
-        answer += "\n\n⚠️ There were no supporting sources retrieved."
+        answer += NO_SOURCES_WARNING
 
     return {
         "query": query_clean,
@@ -66,30 +132,171 @@ async def safe_run_qa(query: str, qa_chain: RetrievalQA) -> dict:
     }
 
 
-async def process_chat_request(query: str, qa_chain: RetrievalQA, request: Request):
+async def process_chat_request(query: str, qa_chain: QAPipeline, request: Request):
     """
     Handles a full chat request: runs QA, updates chat history, and renders output.
     Returns either a rendered HTML page or JSON response based on `?json=true`.
 
     Args:
         query (str): User query string.
-        qa_chain (RetrievalQA): The chain responsible for QA inference.
+        qa_chain (QAPipeline): The pipeline responsible for QA inference.
         request (Request): Incoming FastAPI request object.
 
     Returns:
         Union[TemplateResponse, JSONResponse]: HTML or JSON output.
     """
+    started = time.perf_counter()
+    session = get_session_id(request)
+    outcome = "ok"
     try:
         result = await safe_run_qa(query, qa_chain)
 
-        chat_history.append({
-            "user": result["query"],
-            "agent": result["answer"],
-            "sources": result["sources"]
-        })
+        session_id, _ = session
+        chat_history.append(session_id, user=result["query"], agent=result["answer"], sources=result["sources"])
 
-        return render_chat_response(request)
+        return render_chat_response(request, session=session)
+
+    except LLMBusyError as e:
+        outcome = "busy"
+        print(f"⏳ Rejected a query, the LLM is busy: {e}")
+        return render_chat_response(request, error=str(e), status_code=503, session=session)
 
     except Exception as e:
+        outcome = "error"
         print(f"❌ Error during QA inference: {e}")
-        return render_chat_response(request, error=str(e))
+        return render_chat_response(request, error=str(e), session=session)
+
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="chat", outcome=outcome)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats one Server-Sent Event with a JSON payload.
+
+    Args:
+        event (str): The event name.
+        data (Any): JSON-serializable payload.
+
+    Returns:
+        str: The encoded event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_qa_events(query: str, qa_chain: QAPipeline, session_id: str) -> AsyncIterator[str]:
+    """
+    Answers a query as a stream of Server-Sent Events:
+
+    - `sources`: the sanitized query and its source strings, sent as soon as retrieval is done
+    - `token`: a piece of the answer, sent as the LLM generates it
+    - `done`: the full answer and the time to first token, once generation finished
+    - `error`: a validation or inference error (`busy` if the LLM could not take the request), ending the stream
+
+    Cached answers are replayed as a single token. Concurrent streams of the same question
+    share one generation (see `stream_or_join_qa`). A finished generation is cached and
+    recorded in the session's chat history like a regular request.
+
+    Args:
+        query (str): Raw user query string.
+        qa_chain (QAPipeline): The QA pipeline.
+        session_id (str): The chat session the turn is recorded in.
+
+    Yields:
+        str: Encoded Server-Sent Events.
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        with track_stage("validate"):
+            query_clean = validate_and_sanitize_query(query)
+        result = await lookup_cached_answer(query_clean)
+
+        first_token_at = None
+        if result:
+            sources = build_source_strings(result["source_documents"])
+            yield format_sse("sources", {"query": query_clean, "sources": sources})
+            answer = result["result"]
+            first_token_at = time.perf_counter()
+            yield format_sse("token", {"text": answer})
+        else:
+            async with aclosing(stream_or_join_qa(query_clean, qa_chain)) as events:
+                async for event, value in events:
+                    if event == "sources":
+                        sources = build_source_strings(value)
+                        yield format_sse("sources", {"query": query_clean, "sources": sources})
+                    elif event == "token":
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            print(f"⏱️ Time to first token: {first_token_at - started:.2f}s")
+                        yield format_sse("token", {"text": value})
+                    else:
+                        answer = value["result"]
+
+        if not sources:
+            answer += NO_SOURCES_WARNING
+            yield format_sse("token", {"text": NO_SOURCES_WARNING})
+
+        chat_history.append(session_id, user=query_clean, agent=answer, sources=sources)
+
+        time_to_first_token = (first_token_at or time.perf_counter()) - started
+        yield format_sse("done", {"answer": answer, "time_to_first_token_ms": round(time_to_first_token * 1000)})
+
+    except LLMBusyError as e:
+        outcome = "busy"
+        print(f"⏳ Rejected a streamed query, the LLM is busy: {e}")
+        yield format_sse("error", {"error": sanitize_text(str(e)), "busy": True})
+
+    except Exception as e:
+        outcome = "error"
+        print(f"❌ Error during streamed QA inference: {e}")
+        yield format_sse("error", {"error": sanitize_text(str(e))})
+
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"  # The client went away
+        raise
+
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="stream", outcome=outcome)
+
+
+async def _has_cached_answer(query: str) -> bool:
+    try:
+        return bool(await lookup_cached_answer(validate_and_sanitize_query(query)))
+    except ValueError:
+        return True  # Invalid queries never reach the LLM; the stream reports the validation error
+
+
+async def stream_chat_response(query: str, qa_chain: QAPipeline, request: Request):
+    """
+    Handles a streaming chat request: sources first, then answer tokens as they are generated.
+    When the LLM is saturated, queries without a cached answer are rejected up front with a 503.
+
+    Args:
+        query (str): User query string.
+        qa_chain (QAPipeline): The pipeline responsible for QA inference.
+        request (Request): Incoming FastAPI request object, carrying the session cookie.
+
+    Returns:
+        Union[StreamingResponse, JSONResponse]: A `text/event-stream` response, or a 503 JSON error.
+    """
+    try:
+        if qa_chain.is_busy() and not await _has_cached_answer(query):
+            qa_chain.check_capacity()
+    except LLMBusyError as e:
+        print(f"⏳ Rejected a streamed query, the LLM is busy: {e}")
+        return JSONResponse(
+            content={"error": sanitize_text(str(e)), "busy": True},
+            status_code=503,
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_SECONDS)}
+        )
+
+    session_id, is_new_session = get_session_id(request)
+    response = StreamingResponse(
+        stream_qa_events(query, qa_chain, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    if is_new_session:
+        set_session_cookie(response, session_id)
+    return response
@@ -0,0 +1,159 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .utils import atomic_open
+
+CHUNK_IDS_FILE = "chunk_ids.json"
+CHUNK_METADATA_FILE = "chunk_metadata.json"
+CHUNK_TEXTS_FILE = "chunk_texts.bin"
+CHUNK_OFFSETS_FILE = "chunk_offsets.npy"
+
+
+class ChunkStore:
+    """
+    Compact, read-optimized store of text chunks keyed by chunk ID.
+
+    Texts are kept in a single UTF-8 blob addressed by an offsets array, so the
+    store can be memory-mapped from disk instead of being parsed on startup.
+    Row positions are shared with the indexes built on top of the store.
+    """
+
+    def __init__(self, ids: List[str], texts: np.ndarray, offsets: np.ndarray, metadatas: List[dict]):
+        self.ids = ids
+        self.texts = texts
+        self.offsets = offsets
+        self.metadatas = metadatas
+        self._positions: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document], ids: Optional[Iterable[str]] = None) -> "ChunkStore":
+        """
+        Builds a chunk store from LangChain documents.
+
+        Args:
+            documents (Iterable[Document]): Chunked documents to store.
+            ids (Optional[Iterable[str]]): Chunk IDs; defaults to each document's `chunk_id` metadata.
+
+        Returns:
+            ChunkStore: An in-memory chunk store.
+        """
+        documents = list(documents)
+        ids = list(ids) if ids is not None else [doc.metadata["chunk_id"] for doc in documents]
+
+        encoded = [doc.page_content.encode("utf-8") for doc in documents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            offsets[1:] = np.cumsum([len(text) for text in encoded])
+        texts = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        return cls(ids, texts, offsets, [dict(doc.metadata) for doc in documents])
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkStore":
+        """
+        Loads a chunk store from disk, memory-mapping the text blob and offsets.
+
+        Args:
+            directory (str): Directory the store was saved to.
+
+        Returns:
+            ChunkStore: The loaded chunk store.
+        """
+        with open(os.path.join(directory, CHUNK_IDS_FILE), encoding="utf-8") as f:
+            ids = json.load(f)
+        with open(os.path.join(directory, CHUNK_METADATA_FILE), encoding="utf-8") as f:
+            metadatas = json.load(f)
+
+        offsets = np.load(os.path.join(directory, CHUNK_OFFSETS_FILE), mmap_mode="r")
+        texts_path = os.path.join(directory, CHUNK_TEXTS_FILE)
+        if os.path.getsize(texts_path) > 0:
+            texts = np.memmap(texts_path, dtype=np.uint8, mode="r")
+        else:
+            texts = np.zeros(0, dtype=np.uint8)
+
+        return cls(ids, texts, offsets, metadatas)
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the chunk store to a directory.
+        Files are replaced atomically, so readers that memory-mapped a previous
+        version keep a consistent view.
+
+        Args:
+            directory (str): Target directory (created if missing).
+        """
+        os.makedirs(directory, exist_ok=True)
+        with atomic_open(os.path.join(directory, CHUNK_IDS_FILE), "w") as f:
+            json.dump(self.ids, f)
+        with atomic_open(os.path.join(directory, CHUNK_METADATA_FILE), "w") as f:
+            json.dump(self.metadatas, f)
+        with atomic_open(os.path.join(directory, CHUNK_OFFSETS_FILE), "wb") as f:
+            np.save(f, np.asarray(self.offsets, dtype=np.int64))
+        with atomic_open(os.path.join(directory, CHUNK_TEXTS_FILE), "wb") as f:
+            f.write(np.asarray(self.texts, dtype=np.uint8).tobytes())
+
+    def update(self, removed_rows: Iterable[int], documents: Iterable[Document]) -> "ChunkStore":
+        """
+        Returns a new chunk store with some rows removed and new chunks appended.
+        Remaining rows keep their relative order, followed by the new chunks.
+
+        Args:
+            removed_rows (Iterable[int]): Rows to drop.
+            documents (Iterable[Document]): New chunks carrying `chunk_id` metadata.
+
+        Returns:
+            ChunkStore: The updated chunk store.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.fromiter(removed_rows, dtype=np.int64)] = False
+
+        lengths = np.diff(self.offsets)
+        kept_texts = np.asarray(self.texts)[np.repeat(keep, lengths)]
+        added = ChunkStore.from_documents(documents)
+
+        offsets = np.zeros(int(keep.sum()) + len(added) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.concatenate([lengths[keep], np.diff(added.offsets)]))
+
+        return ChunkStore(
+            [chunk_id for chunk_id, kept in zip(self.ids, keep) if kept] + added.ids,
+            np.concatenate([kept_texts, added.texts]),
+            offsets,
+            [metadata for metadata, kept in zip(self.metadatas, keep) if kept] + added.metadatas,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, chunk_id: str) -> Optional[int]:
+        """
+        Returns the row position of a chunk ID, or None if unknown.
+        """
+        if self._positions is None:
+            self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        return self._positions.get(chunk_id)
+
+    def get_text(self, position: int) -> str:
+        """
+        Returns the text of the chunk stored at the given row position.
+        """
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return bytes(self.texts[start:end]).decode("utf-8")
+
+    def get_document(self, position: int) -> Document:
+        """
+        Returns the chunk stored at the given row position as a LangChain document.
+        """
+        metadata = dict(self.metadatas[position])
+        metadata.setdefault("chunk_id", self.ids[position])
+        return Document(page_content=self.get_text(position), metadata=metadata)
+
+    def iter_documents(self) -> Iterable[Document]:
+        """
+        Yields every stored chunk as a LangChain document, in row order.
+        """
+        for position in range(len(self)):
+            yield self.get_document(position)
@@ -0,0 +1,133 @@
+import math
+import re
+from typing import Callable, Dict, List
+
+from langchain_core.documents import Document
+
+from .ingestion import get_metadata_lines, strip_injected_metadata
+from ..constants import CONTEXT_MAX_TOKENS, CONTEXT_CHARS_PER_TOKEN
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SOURCE_SEPARATOR = "\n\n"
+EXCERPT_SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text without loading the model's tokenizer:
+    every punctuation mark counts as one token, every word as one token per
+    `CONTEXT_CHARS_PER_TOKEN` characters (at least one).
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return sum(math.ceil(len(token) / CONTEXT_CHARS_PER_TOKEN) for token in TOKEN_PATTERN.findall(text))
+
+
+def _source_key(doc: Document) -> str:
+    return str(doc.metadata.get("path") or doc.metadata.get("source") or "")
+
+
+def _merge_excerpts(documents: List[Document]) -> List[dict]:
+    """
+    Orders the chunks of one source by page, section and position, merging chunks of the same
+    page and section that overlap or touch (consecutive splitter chunks share `chunk_overlap`
+    characters). `start_index` restarts in every section, so chunks of different sections never merge.
+    """
+    def position(doc: Document) -> tuple:
+        page, section, start = (doc.metadata.get(key) for key in ("page", "section", "start_index"))
+        return page is None, page or 0, section is None, section or 0, start is None, start or 0
+
+    excerpts: List[dict] = []
+    for doc in sorted(documents, key=position):
+        text = strip_injected_metadata(doc)
+        page, section, start = (doc.metadata.get(key) for key in ("page", "section", "start_index"))
+        previous = excerpts[-1] if excerpts else None
+        if (previous and start is not None and previous["end"] is not None and previous["page"] == page
+                and previous["section"] == section and start <= previous["end"]):
+            previous["text"] += text[previous["end"] - start:]
+            previous["end"] = max(previous["end"], start + len(text))
+            continue
+        excerpts.append({"page": page, "section": section, "text": text,
+                         "end": None if start is None else start + len(text)})
+    return excerpts
+
+
+def render_context(documents: List[Document]) -> str:
+    """
+    Renders chunks as prompt context, grouped by source document.
+
+    Every source is introduced once with its name and metadata (title, author, subject),
+    followed by its excerpts in page order; overlapping chunks of a page are merged.
+    Sources appear in the order of their most relevant chunk.
+
+    Args:
+        documents (List[Document]): The chunks, most relevant first.
+
+    Returns:
+        str: The rendered context.
+    """
+    by_source: Dict[str, List[Document]] = {}
+    for doc in documents:
+        by_source.setdefault(_source_key(doc), []).append(doc)
+
+    sections = []
+    for source, source_documents in by_source.items():
+        header = [f"Source: {source_documents[0].metadata.get('source') or source or 'unknown'}"]
+        header += get_metadata_lines(source_documents[0].metadata)
+        excerpts = [
+            (f"[Page {excerpt['page']}]\n" if excerpt["page"] is not None else "") + excerpt["text"]
+            for excerpt in _merge_excerpts(source_documents)
+        ]
+        sections.append("\n".join(header) + EXCERPT_SEPARATOR + EXCERPT_SEPARATOR.join(excerpts))
+    return SOURCE_SEPARATOR.join(sections)
+
+
+def pack_context(
+    documents: List[Document],
+    max_tokens: int = CONTEXT_MAX_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> dict:
+    """
+    Packs the most relevant chunks that fit into a token budget.
+
+    Chunks are considered in relevance order and kept if the rendered context still
+    fits; a chunk that does not fit is skipped in favor of smaller, less relevant ones,
+    until the budget is used up. If even the most relevant chunk does not fit on its
+    own, it is truncated (and left out if not even its source header fits).
+
+    Args:
+        documents (List[Document]): Retrieved chunks, most relevant first.
+        max_tokens (int): Token budget of the rendered context.
+        count_tokens (Callable[[str], int]): Token counter; `estimate_tokens` by default.
+
+    Returns:
+        dict: The rendered `context`, the `documents` it contains (in relevance order)
+            and its token count (`tokens`).
+    """
+    selected: List[Document] = []
+    context, tokens = "", 0
+    for doc in documents:
+        candidate = render_context(selected + [doc])
+        candidate_tokens = count_tokens(candidate)
+        if candidate_tokens <= max_tokens:
+            selected.append(doc)
+            context, tokens = candidate, candidate_tokens
+            if tokens >= max_tokens:
+                break
+
+    if not selected and documents:
+        text = strip_injected_metadata(documents[0])
+        while len(text) > 1:
+            text = text[:min(len(text) - 1, int(len(text) * 0.9))]
+            truncated = Document(page_content=text, metadata=documents[0].metadata)
+            candidate = render_context([truncated])
+            if count_tokens(candidate) <= max_tokens:
+                selected.append(truncated)
+                context, tokens = candidate, count_tokens(candidate)
+                break
+
+    return {"context": context, "documents": selected, "tokens": tokens}
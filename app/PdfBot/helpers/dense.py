@@ -0,0 +1,479 @@
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from .chunk_store import ChunkStore, CHUNK_IDS_FILE, CHUNK_METADATA_FILE, CHUNK_TEXTS_FILE, CHUNK_OFFSETS_FILE
+from .utils import atomic_open, atomic_directory
+from ..constants import DENSE_INDEX_QUANTIZE, DENSE_INDEX_IVF_MIN_VECTORS, DENSE_INDEX_IVF_NPROBE
+
+DENSE_PARAMS_FILE = "dense_params.json"
+DENSE_VECTORS_FILE = "vectors.npy"
+DENSE_SCALES_FILE = "scales.npy"
+DENSE_CENTROIDS_FILE = "centroids.npy"
+DENSE_LIST_OFFSETS_FILE = "list_offsets.npy"
+DENSE_LIST_ROWS_FILE = "list_rows.npy"
+
+# Rows scored per matrix product when assigning vectors to IVF lists, bounding temporary memory
+ASSIGN_BLOCK_SIZE = 65536
+
+# Scores computed per matrix product when searching a batch of queries (queries x vectors), bounding temporary memory
+SEARCH_BLOCK_SCORES = 16 * 1024 * 1024
+
+# int8 rows converted to float32 per matrix product when scoring, so a search never upcasts the whole matrix
+QUANTIZED_SCORE_BLOCK_ROWS = 8192
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalizes vectors row by row, so inner products are cosine similarities.
+
+    Args:
+        vectors (np.ndarray): A (n, dim) array.
+
+    Returns:
+        np.ndarray: The normalized float32 vectors.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def quantize_vectors(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantizes normalized vectors to int8 with one scale per row (symmetric, max-abs).
+
+    Args:
+        vectors (np.ndarray): Normalized float32 vectors.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The int8 codes and the float32 scale of every row.
+    """
+    scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales > 0, scales, 1).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the most similar centroid of every vector.
+    """
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_SIZE], dtype=np.float32)
+        assignments[start:start + ASSIGN_BLOCK_SIZE] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(vectors: np.ndarray, num_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Trains IVF centroids with spherical k-means on a sample of the vectors.
+
+    Args:
+        vectors (np.ndarray): Normalized float32 vectors.
+        num_lists (int): Number of centroids (inverted lists).
+        iterations (int): Number of k-means iterations.
+        seed (int): Seed of the sampling and initialization.
+
+    Returns:
+        np.ndarray: A (num_lists, dim) array of normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), num_lists * 64)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, num_lists, replace=False)]
+
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        # Centroids left without members keep their previous position
+        filled = np.bincount(assignments, minlength=num_lists) > 0
+        centroids[filled] = normalize_vectors(sums[filled])
+
+    return centroids
+
+
+class DenseIndex:
+    """
+    Exact or IVF-partitioned inner-product index over normalized embeddings.
+
+    Vectors are stored as one contiguous float32 matrix, scored against a query with a
+    single matrix-vector product, or as int8 codes with a float32 scale per row, scored
+    in blocks of rows. In IVF mode, rows are grouped into inverted lists around k-means
+    centroids (`list_rows[list_offsets[c]:list_offsets[c + 1]]` for centroid `c`)
+    and only the `nprobe` lists closest to the query are scored. Rows match the
+    rows of the `ChunkStore` the index was built with.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+        list_rows: Optional[np.ndarray] = None,
+        nprobe: int = DENSE_INDEX_IVF_NPROBE,
+    ):
+        self.vectors = vectors
+        self.scales = scales
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+    @property
+    def is_ivf(self) -> bool:
+        return self.centroids is not None
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        quantize: bool = DENSE_INDEX_QUANTIZE,
+        num_lists: Optional[int] = None,
+        nprobe: int = DENSE_INDEX_IVF_NPROBE,
+    ) -> "DenseIndex":
+        """
+        Builds an index from embeddings.
+
+        Args:
+            vectors (np.ndarray): A (n, dim) array of embeddings, normalized here.
+            quantize (bool): Whether to store int8 codes instead of float32 vectors.
+            num_lists (Optional[int]): Number of IVF lists; by default about 4 * sqrt(n) once the corpus
+                reaches `DENSE_INDEX_IVF_MIN_VECTORS` vectors, and exact search below that. 0 disables IVF.
+            nprobe (int): Number of IVF lists scored per query.
+
+        Returns:
+            DenseIndex: The built index.
+        """
+        vectors = normalize_vectors(vectors)
+        if num_lists is None:
+            num_lists = int(4 * np.sqrt(len(vectors))) if len(vectors) >= DENSE_INDEX_IVF_MIN_VECTORS else 0
+
+        centroids = train_centroids(vectors, num_lists) if num_lists else None
+        return cls._from_normalized(vectors, quantize, centroids, nprobe)
+
+    @classmethod
+    def _from_normalized(cls, vectors: np.ndarray, quantize: bool, centroids: Optional[np.ndarray],
+                         nprobe: int) -> "DenseIndex":
+        scales = None
+        if quantize:
+            vectors, scales = quantize_vectors(vectors)
+
+        list_offsets = list_rows = None
+        if centroids is not None:
+            assignments = assign_to_centroids(normalize_vectors(cls._dequantize(vectors, scales)), centroids)
+            list_rows = np.argsort(assignments, kind="stable").astype(np.int32)
+            list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+            list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=len(centroids)))
+
+        return cls(vectors, scales, centroids, list_offsets, list_rows, nprobe=nprobe)
+
+    @staticmethod
+    def _dequantize(vectors: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        if scales is None:
+            return np.asarray(vectors, dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32) * np.asarray(scales)[:, None]
+
+    def update(self, removed_rows: Iterable[int], vectors: np.ndarray) -> "DenseIndex":
+        """
+        Returns a new index with some rows removed and new embeddings appended.
+        In IVF mode, new vectors join the lists of the existing centroids (no re-training).
+        Remaining rows keep their relative order, followed by the new rows.
+
+        Args:
+            removed_rows (Iterable[int]): Rows to drop.
+            vectors (np.ndarray): Embeddings to append.
+
+        Returns:
+            DenseIndex: The updated index.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.fromiter(removed_rows, dtype=np.int64)] = False
+
+        kept = self._dequantize(np.asarray(self.vectors)[keep], None if self.scales is None else self.scales[keep])
+        added = normalize_vectors(vectors).reshape(-1, kept.shape[1]) if len(vectors) else kept[:0]
+        combined = np.concatenate([kept, added])
+        centroids = None if self.centroids is None else np.asarray(self.centroids)
+        return DenseIndex._from_normalized(combined, self.quantized, centroids, self.nprobe)
+
+    @classmethod
+    def load(cls, directory: str) -> "DenseIndex":
+        """
+        Loads a dense index from disk, memory-mapping its arrays.
+
+        Args:
+            directory (str): Directory the index was saved to.
+
+        Returns:
+            DenseIndex: The loaded index.
+        """
+        with open(os.path.join(directory, DENSE_PARAMS_FILE), encoding="utf-8") as f:
+            params = json.load(f)
+
+        def load_array(name: str) -> Optional[np.ndarray]:
+            path = os.path.join(directory, name)
+            return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+        return cls(
+            load_array(DENSE_VECTORS_FILE),
+            load_array(DENSE_SCALES_FILE) if params["quantized"] else None,
+            load_array(DENSE_CENTROIDS_FILE) if params["ivf"] else None,
+            load_array(DENSE_LIST_OFFSETS_FILE) if params["ivf"] else None,
+            load_array(DENSE_LIST_ROWS_FILE) if params["ivf"] else None,
+            nprobe=params.get("nprobe", DENSE_INDEX_IVF_NPROBE),
+        )
+
+    def save(self, directory: str, index_version: Optional[str] = None) -> None:
+        """
+        Writes the index arrays to a directory.
+        Files are replaced atomically, so readers that memory-mapped a previous
+        version keep a consistent view.
+
+        Args:
+            directory (str): Target directory (created if missing).
+            index_version (Optional[str]): Version of the document index the vectors cover.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            DENSE_VECTORS_FILE: self.vectors,
+            DENSE_SCALES_FILE: self.scales,
+            DENSE_CENTROIDS_FILE: self.centroids,
+            DENSE_LIST_OFFSETS_FILE: self.list_offsets,
+            DENSE_LIST_ROWS_FILE: self.list_rows,
+        }
+        for name, array in arrays.items():
+            if array is not None:
+                with atomic_open(os.path.join(directory, name), "wb") as f:
+                    np.save(f, np.asarray(array))
+
+        with atomic_open(os.path.join(directory, DENSE_PARAMS_FILE), "w") as f:
+            json.dump({
+                "quantized": self.quantized,
+                "ivf": self.is_ivf,
+                "nprobe": self.nprobe,
+                "num_vectors": len(self),
+                "index_version": index_version,
+            }, f)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _score_rows(self, rows: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+        """
+        Scores rows (all if None) against a query (dim,) or a block of queries (num_queries, dim).
+        int8 codes are converted to float32 `QUANTIZED_SCORE_BLOCK_ROWS` rows at a time, into a
+        preallocated score array.
+        """
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if self.scales is None:
+            return queries @ vectors.T
+
+        scores = np.empty(queries.shape[:-1] + (len(vectors),), dtype=np.float32)
+        for start in range(0, len(vectors), QUANTIZED_SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + QUANTIZED_SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[..., start:start + QUANTIZED_SCORE_BLOCK_ROWS] = queries @ block.T
+        scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+    def search(self, query_vector: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[List[int], List[float]]:
+        """
+        Returns the rows of the k vectors most similar to the query, best first.
+
+        Args:
+            query_vector (np.ndarray): The query embedding (normalized here).
+            k (int): Maximum number of rows to return.
+            nprobe (Optional[int]): IVF lists to score; the index default if omitted.
+
+        Returns:
+            Tuple[List[int], List[float]]: Rows and cosine similarities, sorted by descending similarity.
+        """
+        if not len(self) or k <= 0:
+            return [], []
+        query = normalize_vectors(query_vector)
+
+        rows = None
+        if self.is_ivf:
+            probes = min(nprobe or self.nprobe, len(self.centroids))
+            closest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+            rows = np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in closest])
+
+        scores = np.asarray(self._score_rows(rows, query), dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        found = top if rows is None else rows[top]
+        return [int(row) for row in found], [float(score) for score in scores[top]]
+
+    def search_batch(
+        self, query_vectors: np.ndarray, k: int, nprobe: Optional[int] = None
+    ) -> List[Tuple[List[int], List[float]]]:
+        """
+        Searches several queries at once. In exact mode, a block of queries is scored
+        with a single matrix product; IVF queries probe different lists, so they are
+        searched one by one.
+
+        Args:
+            query_vectors (np.ndarray): A (num_queries, dim) array of query embeddings.
+            k (int): Maximum number of rows to return per query.
+            nprobe (Optional[int]): IVF lists to score; the index default if omitted.
+
+        Returns:
+            List[Tuple[List[int], List[float]]]: The `search` result of every query, in order.
+        """
+        queries = normalize_vectors(np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1))
+        if self.is_ivf or not len(self) or k <= 0:
+            return [self.search(query, k, nprobe) for query in queries]
+
+        results = []
+        block_size = max(1, SEARCH_BLOCK_SCORES // len(self))
+        for start in range(0, len(queries), block_size):
+            scores = self._score_rows(None, queries[start:start + block_size])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else \
+                np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            for row_scores, row_top in zip(scores, top):
+                row_top = row_top[np.argsort(-row_scores[row_top], kind="stable")]
+                results.append(([int(row) for row in row_top], [float(score) for score in row_scores[row_top]]))
+        return results
+
+
+class DenseRetriever(BaseRetriever):
+    """
+    LangChain retriever over a persisted `DenseIndex` and its `ChunkStore`.
+    """
+
+    index: DenseIndex
+    chunk_store: ChunkStore
+    embeddings: Embeddings
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        rows, _ = self.index.search(np.asarray(self.embeddings.embed_query(query), dtype=np.float32), self.k)
+        return [self.chunk_store.get_document(row) for row in rows]
+
+    def retrieve_by_vectors(self, query_vectors: np.ndarray) -> List[List[Document]]:
+        """
+        Returns the k most similar chunks of every already embedded query, searched as one batch.
+        """
+        return [[self.chunk_store.get_document(row) for row in rows]
+                for rows, _ in self.index.search_batch(query_vectors, self.k)]
+
+
+def is_dense_index_valid(directory: str, index_version: Optional[str] = None) -> bool:
+    """
+    Checks whether a complete dense index and chunk store exist in a directory and,
+    if `index_version` is given, whether they cover that version of the document index.
+
+    Args:
+        directory (str): Directory to check.
+        index_version (Optional[str]): The expected document index version.
+
+    Returns:
+        bool: True if the index can be loaded as is, else False.
+    """
+    required = [DENSE_PARAMS_FILE, DENSE_VECTORS_FILE, CHUNK_IDS_FILE, CHUNK_METADATA_FILE, CHUNK_TEXTS_FILE,
+                CHUNK_OFFSETS_FILE]
+    if not all(os.path.exists(os.path.join(directory, name)) for name in required):
+        return False
+    if index_version is None:
+        return True
+    with open(os.path.join(directory, DENSE_PARAMS_FILE), encoding="utf-8") as f:
+        return json.load(f).get("index_version") == index_version
+
+
+def build_dense_index(
+    documents: Iterable[Document],
+    vectors: np.ndarray,
+    directory: str,
+    embeddings: Embeddings,
+    index_version: Optional[str] = None
+) -> DenseRetriever:
+    """
+    Builds and persists a dense index plus chunk store from already computed embeddings.
+
+    Args:
+        documents (Iterable[Document]): Chunked documents carrying `chunk_id` metadata.
+        vectors (np.ndarray): The embedding of every document, in the same order.
+        directory (str): Where to persist the index.
+        embeddings (Embeddings): The model used to embed queries.
+        index_version (Optional[str]): Version of the document index the vectors cover.
+
+    Returns:
+        DenseRetriever: A retriever over the freshly built index.
+    """
+    chunk_store = ChunkStore.from_documents(documents)
+    index = DenseIndex.build(np.asarray(vectors, dtype=np.float32).reshape(len(chunk_store), -1))
+
+    with atomic_directory(directory) as staging_directory:
+        chunk_store.save(staging_directory)
+        index.save(staging_directory, index_version=index_version)
+    mode = ("IVF" if index.is_ivf else "exact") + (", int8" if index.quantized else "")
+    print(f"📐 Dense index with {len(chunk_store)} vectors ({mode}) saved at: {directory}")
+
+    return load_dense_index(directory, embeddings)
+
+
+def update_dense_index(
+    directory: str,
+    removed_ids: Iterable[str],
+    documents: Iterable[Document],
+    vectors: np.ndarray,
+    embeddings: Embeddings,
+    index_version: Optional[str] = None
+) -> DenseRetriever:
+    """
+    Removes chunks from and appends chunks (with their embeddings) to a persisted dense index.
+    The chunk store and the index are swapped in together (see `atomic_directory`).
+
+    Args:
+        directory (str): Directory of the persisted index.
+        removed_ids (Iterable[str]): Chunk IDs to remove; unknown IDs are ignored.
+        documents (Iterable[Document]): New chunks carrying `chunk_id` metadata.
+        vectors (np.ndarray): The embedding of every new chunk, in the same order.
+        embeddings (Embeddings): The model used to embed queries.
+        index_version (Optional[str]): Version of the document index after the update.
+
+    Returns:
+        DenseRetriever: A retriever over the updated index.
+    """
+    documents = list(documents)
+    chunk_store = ChunkStore.load(directory)
+    index = DenseIndex.load(directory)
+
+    positions = (chunk_store.position(chunk_id) for chunk_id in removed_ids)
+    removed_rows = sorted({position for position in positions if position is not None})
+
+    new_store = chunk_store.update(removed_rows, documents)
+    new_index = index.update(removed_rows, np.asarray(vectors, dtype=np.float32))
+
+    with atomic_directory(directory) as staging_directory:
+        new_store.save(staging_directory)
+        new_index.save(staging_directory, index_version=index_version)
+    print(f"📐 Dense index updated: -{len(removed_rows)} / +{len(documents)} vectors ({len(new_store)} total)")
+
+    return load_dense_index(directory, embeddings)
+
+
+def load_dense_index(directory: str, embeddings: Embeddings) -> DenseRetriever:
+    """
+    Loads a persisted dense index and chunk store as a retriever.
+
+    Args:
+        directory (str): Directory the index was saved to.
+        embeddings (Embeddings): The model used to embed queries.
+
+    Returns:
+        DenseRetriever: A retriever over the memory-mapped index.
+    """
+    return DenseRetriever(index=DenseIndex.load(directory), chunk_store=ChunkStore.load(directory),
+                          embeddings=embeddings)
@@ -1,157 +1,337 @@
 import os
-from typing import List
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-from PyPDF2 import PdfReader
-from langchain.retrievers import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.retrievers import BaseRetriever
 
-from ..constants import NUMBER_TOP_SOURCES, EMBEDDING_MODEL
-from ..constants.paths import DOCUMENTS_DEFAULT_DIRECTORY, CHROMA_DB_DEFAULT_DIRECTORY
-
-
-def find_all_pdfs(root_dir: str) -> List[Document]:
+from .cache import set_index_version
+from .hybrid import build_hybrid_retriever
+from .readiness import readiness
+from .rerank import RerankingRetriever, create_reranker
+from .snapshots import SnapshotRetriever, publish_snapshot, get_current_snapshot, read_snapshot_version, \
+    remove_snapshots, warm_up_snapshot, hold_snapshot
+from .utils import file_lock
+from .dense import DenseRetriever, build_dense_index, load_dense_index, is_dense_index_valid, update_dense_index
+from .ingestion import find_document_paths, iter_ingested_documents
+from .manifest import load_manifest, save_manifest, new_manifest, build_manifest_entry, diff_against_manifest, \
+    compute_index_version
+from .metrics import EMBEDDED_CHUNKS, STAGE_SECONDS
+from .sparse import SparseRetriever, build_sparse_index, load_sparse_index, is_sparse_index_valid, \
+    update_sparse_index
+from ..constants import NUMBER_TOP_SOURCES, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, INCREMENTAL_INDEXING, \
+    VECTOR_STORE_BACKEND, HYBRID_WEIGHTS, HYBRID_CANDIDATES_PER_RETRIEVER, RERANKER, RERANK_CANDIDATES, RERANK_TOP_N, \
+    STARTUP_FROM_SNAPSHOT
+from ..constants.paths import DOCUMENTS_DEFAULT_DIRECTORY, CHROMA_DB_DEFAULT_DIRECTORY, \
+    SPARSE_INDEX_DEFAULT_DIRECTORY, DENSE_INDEX_DEFAULT_DIRECTORY, INDEX_MANIFEST_DEFAULT_PATH, \
+    INDEX_SNAPSHOTS_DEFAULT_DIRECTORY, INDEX_SYNC_LOCK_DEFAULT_PATH
+
+
+def open_vector_store(persist_directory: str) -> Chroma:
     """
-    Recursively finds all PDFs in a directory and loads them as LangChain documents.
-    Adds page number and extracted PDF metadata (title, author, etc.) to each document.
+    Opens (or creates) the Chroma vector DB persisted at the given directory.
 
     Args:
-        root_dir (str): Root folder to recursively search for PDF files.
+        persist_directory (str): Path to the Chroma DB persistence directory.
 
     Returns:
-        List[Document]: A list of documents with enriched metadata from all found PDFs.
+        Chroma: The Chroma vector DB.
     """
-    all_docs = []
-
-    for root, _, files in os.walk(root_dir):
-        for file in files:
-            if file.endswith(".pdf"):
-                full_path = os.path.join(root, file)
-
-                # Extract metadata
-                try:
-                    reader = PdfReader(full_path)
-                    metadata = reader.metadata or {}
-                except Exception as e:
-                    metadata = {}
-                    print(f"⚠️ Couldn't extract PDF metadata from {file}: {e}")
-
-                loader = PyMuPDFLoader(full_path)
-                docs = loader.load()
-
-                for doc in docs:
-                    doc.metadata["source"] = os.path.basename(doc.metadata.get("source", full_path))
-                    doc.metadata["page"] = doc.metadata.get("page", None)
-
-                    # Add cleaned and stringified metadata fields
-                    doc.metadata["title"] = str(metadata.get("/Title", ""))
-                    doc.metadata["author"] = str(metadata.get("/Author", ""))
-                    doc.metadata["subject"] = str(metadata.get("/Subject", ""))
-                    doc.metadata["creation_date"] = str(metadata.get("/CreationDate", ""))
-                    doc.metadata["mod_date"] = str(metadata.get("/ModDate", ""))
-
-                print(f"📄 Loaded {len(docs)} docs from: {full_path}")
-                all_docs.extend(docs)
-
-    print(f"✅ Total documents loaded: {len(all_docs)}")
-    return all_docs
+    return Chroma(
+        persist_directory=persist_directory,
+        embedding_function=EMBEDDING_MODEL
+    )
 
 
-def inject_metadata(doc: Document) -> str:
+def write_chunks_in_batches(
+    vector_db: Chroma,
+    ingested: Iterable[Tuple[str, Optional[List[Document]]]],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    on_files_committed: Optional[Callable[[Dict[str, List[str]]], None]] = None,
+    collect_chunks: bool = False
+) -> dict:
     """
-    Appends select metadata fields into the content of the document
-    to give the language model extra reasoning context during retrieval.
+    Streams chunks from the ingestion stage into the vector DB in fixed-size batches.
+
+    Each batch is embedded through `EMBEDDING_MODEL.embed_documents` and upserted into
+    Chroma under the chunks' deterministic IDs, so peak memory is bounded by the batch
+    size and re-writing a chunk after an interruption is harmless. Once every chunk of a
+    file has been written, `on_files_committed` is called so callers can checkpoint.
 
     Args:
-        doc (Document): A LangChain Document object with metadata.
+        vector_db (Chroma): The vector DB to write to.
+        ingested (Iterable[Tuple[str, Optional[List[Document]]]]): Relative path and chunks
+            per file, with None for files that failed to ingest.
+        batch_size (int): Number of chunks embedded and upserted per batch.
+        on_files_committed (Optional[Callable]): Called with {relative path: chunk IDs} of
+            files whose chunks are all written.
+        collect_chunks (bool): Whether to keep and return the written chunks.
 
     Returns:
-        str: The document's text prefixed with selected metadata.
+        dict: "files" (relative path -> chunk IDs), "failed" paths, "chunks" (if collected),
+              "num_chunks", "seconds" spent embedding/writing and "chunks_per_second".
     """
-    metadata = doc.metadata
-    metadata_lines = []
-    if metadata.get("title"):
-        metadata_lines.append(f"Title: {metadata['title']}")
-    if metadata.get("author"):
-        metadata_lines.append(f"Author: {metadata['author']}")
-    if metadata.get("subject"):
-        metadata_lines.append(f"Subject: {metadata['subject']}")
-    return "\n".join(metadata_lines + [doc.page_content])
+    result = {"files": {}, "failed": [], "chunks": [], "num_chunks": 0, "seconds": 0.0, "chunks_per_second": 0.0}
+    buffer: List[Document] = []
+    unwritten: Dict[str, int] = {}
+    file_chunk_ids: Dict[str, List[str]] = {}
+
+    def commit(relative_paths: List[str]) -> None:
+        committed = {relative_path: file_chunk_ids.pop(relative_path) for relative_path in relative_paths}
+        result["files"].update(committed)
+        if committed and on_files_committed:
+            on_files_committed(committed)
+
+    def flush() -> None:
+        batch = buffer[:batch_size]
+        del buffer[:batch_size]
+
+        start = time.perf_counter()
+        vector_db.add_texts(
+            texts=[doc.page_content for doc in batch],
+            metadatas=[doc.metadata for doc in batch],
+            ids=[doc.metadata["chunk_id"] for doc in batch]
+        )
+        seconds = time.perf_counter() - start
+        result["seconds"] += seconds
+        result["num_chunks"] += len(batch)
+        STAGE_SECONDS.observe(seconds, stage="embedding_batch")
+        EMBEDDED_CHUNKS.inc(len(batch))
+        if collect_chunks:
+            result["chunks"].extend(batch)
+
+        done = []
+        for doc in batch:
+            relative_path = doc.metadata["path"]
+            unwritten[relative_path] -= 1
+            if not unwritten[relative_path]:
+                del unwritten[relative_path]
+                done.append(relative_path)
+        commit(done)
+
+        print(f"🧠 Embedded {result['num_chunks']} chunks "
+              f"({result['num_chunks'] / max(result['seconds'], 1e-9):.1f} chunks/sec)")
+
+    for relative_path, chunks in ingested:
+        if chunks is None:
+            result["failed"].append(relative_path)
+            continue
+
+        file_chunk_ids[relative_path] = [doc.metadata["chunk_id"] for doc in chunks]
+        if not chunks:
+            commit([relative_path])
+            continue
+
+        unwritten[relative_path] = len(chunks)
+        buffer.extend(chunks)
+        while len(buffer) >= batch_size:
+            flush()
+
+    while buffer:
+        flush()
+
+    result["chunks_per_second"] = round(result["num_chunks"] / result["seconds"], 1) if result["seconds"] else 0.0
+    return result
 
 
-def split_documents(documents: List[Document], chunk_size: int = 1024, chunk_overlap: int = 256) -> List[Document]:
+def embed_and_store_documents(split_docs: List[Document], persist_directory: str) -> Chroma:
     """
-    Splits documents into overlapping chunks using recursive character splitting.
-    Injects metadata directly into the page content for better context.
+    Embeds document chunks using a HuggingFace model and stores them in a Chroma vector DB,
+    keyed by their `chunk_id`, in batches of `EMBEDDING_BATCH_SIZE`.
 
     Args:
-        documents (List[Document]): A list of documents to split.
-        chunk_size (int): Size of each chunk in characters.
-        chunk_overlap (int): Number of overlapping characters between chunks.
+        split_docs (List[Document]): Chunked and metadata-injected documents to embed.
+        persist_directory (str): Path to the Chroma DB persistence directory.
 
     Returns:
-        List[Document]: List of chunked documents with metadata injected into their text.
+        Chroma: Initialized Chroma vector store with embedded documents.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ".", " ", ""]
-        # splitter tries preserving paragraphs, then lines, then sentences, then words, then characters
-    )
-    chunks = splitter.split_documents(documents)
-    print(f"✂️ Split into {len(chunks)} text chunks.")
-
-    docs_with_metadata = [
-        Document(page_content=inject_metadata(doc), metadata=doc.metadata)
-        for doc in chunks
-    ]
+    by_path: Dict[str, List[Document]] = {}
+    for doc in split_docs:
+        by_path.setdefault(doc.metadata["path"], []).append(doc)
 
-    return docs_with_metadata
+    vector_db = open_vector_store(persist_directory)
+    write_chunks_in_batches(vector_db, by_path.items())
+    print(f"🧠 Vector store created at: {persist_directory}")
+    return vector_db
 
 
-def embed_and_store_documents(split_docs: List[Document], persist_directory: str) -> Chroma:
+def is_build_checkpoint(manifest: Optional[dict]) -> bool:
     """
-    Embeds document chunks using a HuggingFace model and stores them in a Chroma vector DB.
+    Checks whether a manifest is the checkpoint of an interrupted full build.
 
     Args:
-        split_docs (List[Document]): Chunked and metadata-injected documents to embed.
-        persist_directory (str): Path to the Chroma DB persistence directory.
+        manifest (Optional[dict]): The ingestion manifest, if any.
 
     Returns:
-        Chroma: Initialized Chroma vector store with embedded documents.
+        bool: True if a full build started but never completed.
     """
-    vector_db = Chroma.from_documents(
-        documents=split_docs,
-        embedding=EMBEDDING_MODEL,
-        persist_directory=persist_directory
-    )
-    print(f"🧠 Vector store created at: {persist_directory}")
-    return vector_db
+    return manifest is not None and not manifest.get("complete", True)
 
 
 def embed_documents(
     root_dir: str = DOCUMENTS_DEFAULT_DIRECTORY,
-    persist_directory: str = CHROMA_DB_DEFAULT_DIRECTORY
+    persist_directory: str = CHROMA_DB_DEFAULT_DIRECTORY,
+    sparse_directory: str = SPARSE_INDEX_DEFAULT_DIRECTORY,
+    manifest_path: str = INDEX_MANIFEST_DEFAULT_PATH,
+    resume: bool = True,
+    batch_size: int = EMBEDDING_BATCH_SIZE
 ) -> Chroma:
     """
     Full pipeline to load, split, embed, and persist documents into a vector store.
 
+    Documents are parsed and split in parallel worker processes, and their chunks are streamed
+    into Chroma in batches. The manifest doubles as a checkpoint: it is saved as files
+    are committed, so an interrupted build resumes with the files it had not finished.
+    The sparse (BM25) index is then built from the stored chunks, so every document is parsed
+    once. Files that fail to ingest are left out of the manifest and retried on the next sync.
+
     Args:
-        root_dir (str): Root directory containing PDFs.
+        root_dir (str): Root directory containing documents.
         persist_directory (str): Where to save the Chroma vector DB.
+        sparse_directory (str): Where to save the sparse index.
+        manifest_path (str): Where to save the ingestion manifest.
+        resume (bool): Whether to continue from the checkpoint of an interrupted build.
+        batch_size (int): Number of chunks embedded and upserted per batch.
 
     Returns:
         Chroma: The resulting vector database.
     """
-    raw_docs = find_all_pdfs(root_dir)
-    split_docs = split_documents(raw_docs)
-    vector_db = embed_and_store_documents(split_docs, persist_directory)
+    document_paths = find_document_paths(root_dir)
+    vector_db = open_vector_store(persist_directory)
+
+    manifest = load_manifest(manifest_path)
+    if resume and is_build_checkpoint(manifest):
+        print(f"⏯️ Resuming interrupted build ({len(manifest['files'])} files already embedded)...")
+    else:
+        manifest = new_manifest()
+        vector_db.delete_collection()
+        vector_db = open_vector_store(persist_directory)
+    manifest["complete"] = False
+    changes = diff_against_manifest(manifest, document_paths)
+
+    stale_ids = [
+        chunk_id
+        for relative_path in changes["changed"] + changes["removed"]
+        for chunk_id in manifest["files"].pop(relative_path)["chunk_ids"]
+    ]
+    if stale_ids:
+        vector_db.delete(ids=stale_ids)
+
+    def checkpoint(committed: Dict[str, List[str]]) -> None:
+        for relative_path, chunk_ids in committed.items():
+            manifest["files"][relative_path] = build_manifest_entry(
+                document_paths[relative_path], chunk_ids, sha256=changes["hashes"].get(relative_path)
+            )
+        save_manifest(manifest, manifest_path)
+
+    save_manifest(manifest, manifest_path)
+    to_ingest = {
+        relative_path: document_paths[relative_path] for relative_path in changes["added"] + changes["changed"]
+    }
+    written = write_chunks_in_batches(
+        vector_db, iter_ingested_documents(to_ingest, root_dir), batch_size=batch_size, on_files_committed=checkpoint
+    )
+    print(f"🧠 Vector store created at: {persist_directory} "
+          f"({written['num_chunks']} chunks, {written['chunks_per_second']} chunks/sec)")
+
+    get_sparse_retriever(vector_db, sparse_directory, force_rebuild=True)
+
+    manifest["complete"] = True
+    save_manifest(manifest, manifest_path)
     return vector_db
 
 
+def sync_documents(
+    vector_db: Chroma,
+    root_dir: str = DOCUMENTS_DEFAULT_DIRECTORY,
+    sparse_directory: str = SPARSE_INDEX_DEFAULT_DIRECTORY,
+    manifest_path: str = INDEX_MANIFEST_DEFAULT_PATH,
+    dense_directory: str = DENSE_INDEX_DEFAULT_DIRECTORY
+) -> dict:
+    """
+    Incrementally brings the vector DB, sparse index and (if present) dense index in line
+    with the documents folder.
+
+    Only new or changed documents are parsed and embedded. Chunks of changed or removed documents
+    are deleted from Chroma and the other indexes, so the work scales with the change
+    set rather than with the corpus size. The dense index reuses the embeddings just
+    stored in Chroma.
+
+    Args:
+        vector_db (Chroma): The vector DB to update in place.
+        root_dir (str): Root directory containing documents.
+        sparse_directory (str): Where the sparse index is persisted.
+        manifest_path (str): Path of the ingestion manifest.
+        dense_directory (str): Where the dense index is persisted, if one was built.
+
+    Returns:
+        dict: A report with the added/changed/removed/failed file paths, chunk counts,
+              embedding throughput and elapsed seconds.
+    """
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path) or new_manifest()
+    previous_version = compute_index_version(manifest)
+    document_paths = find_document_paths(root_dir)
+    changes = diff_against_manifest(manifest, document_paths)
+
+    # Same content with a new mtime: refresh the manifest entry without re-indexing
+    for relative_path in changes["touched"]:
+        entry = manifest["files"][relative_path]
+        manifest["files"][relative_path] = build_manifest_entry(
+            document_paths[relative_path], entry["chunk_ids"], sha256=entry["sha256"]
+        )
+
+    stale_ids = [
+        chunk_id
+        for relative_path in changes["changed"] + changes["removed"]
+        for chunk_id in manifest["files"].pop(relative_path)["chunk_ids"]
+    ]
+    if stale_ids:
+        vector_db.delete(ids=stale_ids)
+
+    to_ingest = {
+        relative_path: document_paths[relative_path] for relative_path in changes["added"] + changes["changed"]
+    }
+    written = write_chunks_in_batches(vector_db, iter_ingested_documents(to_ingest, root_dir), collect_chunks=True)
+
+    if stale_ids or written["chunks"]:
+        update_sparse_index(sparse_directory, stale_ids, written["chunks"])
+
+    for relative_path, chunk_ids in written["files"].items():
+        manifest["files"][relative_path] = build_manifest_entry(
+            document_paths[relative_path], chunk_ids, sha256=changes["hashes"].get(relative_path)
+        )
+
+    # A dense index built for another version is left alone: it is rebuilt from Chroma when loaded
+    if (stale_ids or written["chunks"]) and is_dense_index_valid(dense_directory, previous_version):
+        update_dense_index(
+            dense_directory, stale_ids, written["chunks"], get_stored_embeddings(vector_db, written["chunks"]),
+            EMBEDDING_MODEL, index_version=compute_index_version(manifest)
+        )
+    save_manifest(manifest, manifest_path)
+
+    report = {
+        "added": changes["added"],
+        "changed": changes["changed"],
+        "removed": changes["removed"],
+        "failed": written["failed"],
+        "unchanged": len(changes["unchanged"]) + len(changes["touched"]),
+        "chunks_added": written["num_chunks"],
+        "chunks_removed": len(stale_ids),
+        "chunks_per_second": written["chunks_per_second"],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    print(
+        f"🔄 Incremental sync: +{len(report['added'])} new, ~{len(report['changed'])} changed, "
+        f"-{len(report['removed'])} removed, {len(report['failed'])} failed, {report['unchanged']} unchanged files "
+        f"(+{report['chunks_added']} / -{report['chunks_removed']} chunks) in {report['seconds']}s"
+    )
+    return report
+
+
 def is_chroma_db_valid(path: str) -> bool:
     """
     Checks whether a Chroma vector DB already exists at the given path,
@@ -175,53 +355,356 @@ def is_chroma_db_valid(path: str) -> bool:
     return False
 
 
-def get_vector_store(force_rebuild: bool = False) -> Chroma:
+def get_vector_store(force_rebuild: bool = False, incremental: bool = INCREMENTAL_INDEXING) -> Chroma:
     """
     Loads an existing Chroma vector DB if available, otherwise rebuilds it from documents.
+    In incremental mode, an existing DB is first synced with the documents folder.
 
     Args:
         force_rebuild (bool): Whether to forcefully rebuild the DB from scratch.
+        incremental (bool): Whether to index new, changed and removed documents into an existing DB.
 
     Returns:
         Chroma: A Chroma vector DB, either loaded or freshly built.
     """
-    if not force_rebuild and is_chroma_db_valid(CHROMA_DB_DEFAULT_DIRECTORY):
+    manifest = load_manifest(INDEX_MANIFEST_DEFAULT_PATH)
+    if is_build_checkpoint(manifest) and not force_rebuild:
+        print("⏯️ Found an interrupted build. Resuming it...")
+        vector_db = embed_documents(resume=True)
+    elif not force_rebuild and is_chroma_db_valid(CHROMA_DB_DEFAULT_DIRECTORY):
         print("🔁 Loading existing vector store...")
-        vector_db = Chroma(
-            persist_directory=CHROMA_DB_DEFAULT_DIRECTORY,
-            embedding_function=EMBEDDING_MODEL
-        )
+        vector_db = open_vector_store(CHROMA_DB_DEFAULT_DIRECTORY)
+        if incremental:
+            if manifest is not None and is_sparse_index_valid(SPARSE_INDEX_DEFAULT_DIRECTORY):
+                sync_documents(vector_db)
+            else:
+                print("ℹ️ No ingestion manifest found; skipping incremental sync. Rebuild once to enable it.")
     else:
         print("🆕 No existing vector store found. Rebuilding from documents...")
-        vector_db = embed_documents()
+        vector_db = embed_documents(resume=False)
     return vector_db
 
 
-def load_vector_store() -> BaseRetriever:
+def get_sparse_retriever(
+    vector_db: Chroma,
+    sparse_directory: str = SPARSE_INDEX_DEFAULT_DIRECTORY,
+    force_rebuild: bool = False
+) -> SparseRetriever:
     """
-    Returns a retriever object using hybrid similarity search
-    with a balanced trade-off between relevance and diversity.
+    Loads the persisted sparse (BM25) index if available. Otherwise rebuilds it from
+    the chunks already stored in the vector DB, so no document has to be re-parsed.
+
+    Args:
+        vector_db (Chroma): The vector DB whose chunks the index should cover.
+        sparse_directory (str): Where the sparse index is persisted.
+        force_rebuild (bool): Whether to forcefully rebuild the index from the vector DB.
+
+    Returns:
+        SparseRetriever: A retriever over the memory-mapped sparse index.
+    """
+    if not force_rebuild and is_sparse_index_valid(sparse_directory):
+        print("🔁 Loading existing sparse index...")
+        return load_sparse_index(sparse_directory)
+
+    print("🆕 Building the sparse index from the vector store...")
+    stored = vector_db.get(include=["documents", "metadatas"])
+    docs = [
+        Document(page_content=text, metadata={**(metadata or {}), "chunk_id": chunk_id})
+        for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    ]
+    return build_sparse_index(docs, sparse_directory)
+
+
+def get_stored_embeddings(vector_db: Chroma, documents: List[Document]) -> np.ndarray:
+    """
+    Fetches the embeddings Chroma stored for the given chunks, in the order of the chunks.
+
+    Args:
+        vector_db (Chroma): The vector DB holding the chunks.
+        documents (List[Document]): Chunks carrying `chunk_id` metadata.
+
+    Returns:
+        np.ndarray: A (len(documents), dim) float32 array.
+    """
+    if not documents:
+        return np.zeros((0, 0), dtype=np.float32)
+    stored = vector_db.get(ids=[doc.metadata["chunk_id"] for doc in documents], include=["embeddings"])
+    by_id = dict(zip(stored["ids"], stored["embeddings"]))
+    return np.asarray([by_id[doc.metadata["chunk_id"]] for doc in documents], dtype=np.float32)
+
+
+def get_dense_retriever(
+    vector_db: Chroma,
+    dense_directory: str = DENSE_INDEX_DEFAULT_DIRECTORY,
+    index_version: Optional[str] = None,
+    force_rebuild: bool = False
+) -> DenseRetriever:
+    """
+    Loads the persisted dense (NumPy) index if it covers the current document index.
+    Otherwise rebuilds it from the chunks and embeddings stored in the vector DB,
+    so nothing has to be re-embedded.
+
+    Args:
+        vector_db (Chroma): The vector DB whose chunks the index should cover.
+        dense_directory (str): Where the dense index is persisted.
+        index_version (Optional[str]): Version of the document index the dense index must match.
+        force_rebuild (bool): Whether to forcefully rebuild the index from the vector DB.
 
     Returns:
-        BaseRetriever: A configured LangChain retriever for querying the vector store.
+        DenseRetriever: A retriever over the memory-mapped dense index.
+    """
+    if not force_rebuild and is_dense_index_valid(dense_directory, index_version):
+        print("🔁 Loading existing dense index...")
+        return load_dense_index(dense_directory, EMBEDDING_MODEL)
+
+    print("🆕 Building the dense index from the vector store...")
+    stored = vector_db.get(include=["documents", "metadatas", "embeddings"])
+    docs = [
+        Document(page_content=text, metadata={**(metadata or {}), "chunk_id": chunk_id})
+        for chunk_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    ]
+    vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+    return build_dense_index(docs, vectors, dense_directory, EMBEDDING_MODEL, index_version=index_version)
+
+
+def build_snapshot_retriever(
+    vector_db: Chroma,
+    directory: str,
+    index_version: Optional[str],
+    backend: str = VECTOR_STORE_BACKEND,
+    reranker: str = RERANKER
+) -> BaseRetriever:
     """
-    db = get_vector_store()
+    Returns a retriever using hybrid similarity search over an index snapshot: keyword
+    (BM25) and vector search run concurrently, and their rankings are fused with
+    reciprocal-rank fusion into `NUMBER_TOP_SOURCES` unique chunks. With a re-ranker,
+    `RERANK_CANDIDATES` chunks are fused instead and only the `RERANK_TOP_N` best after
+    re-ranking are kept.
+
+    Args:
+        vector_db (Chroma): The vector DB the snapshot was built from.
+        directory (str): The snapshot's directory.
+        index_version (Optional[str]): Version of the document index the snapshot covers.
+        backend (str): Vector search backend: "numpy" searches the snapshot's memory-mapped dense
+            index mirrored from the vector DB, "chroma" the live (unversioned) Chroma collection.
+        reranker (str): Re-ranking stage: "none", "lexical" or "cross-encoder".
 
+    Returns:
+        BaseRetriever: A configured LangChain retriever over the snapshot.
+    """
     # Semantic retriever: pure vector similarity
-    similarity_retriever = db.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": NUMBER_TOP_SOURCES}
-    )
+    if backend == "numpy":
+        similarity_retriever = get_dense_retriever(vector_db, os.path.join(directory, "dense_index"), index_version)
+        similarity_retriever.k = HYBRID_CANDIDATES_PER_RETRIEVER
+    elif backend == "chroma":
+        similarity_retriever = vector_db.as_retriever(
+            search_type="similarity",
+            search_kwargs={"k": HYBRID_CANDIDATES_PER_RETRIEVER}
+        )
+    else:
+        raise ValueError(f"Unknown vector store backend: {backend!r}")
 
     # Sparse keyword matching retriever (BM25)
-    raw_docs = find_all_pdfs(DOCUMENTS_DEFAULT_DIRECTORY)
-    bm25_retriever = BM25Retriever.from_documents(raw_docs)
-    bm25_retriever.k = NUMBER_TOP_SOURCES
-
-    # Combine them using weighted ensemble
-    hybrid_retriever = EnsembleRetriever(
-        retrievers=[bm25_retriever, similarity_retriever],
-        weights=[0.5, 0.5]
+    bm25_retriever = get_sparse_retriever(vector_db, os.path.join(directory, "sparse_index"))
+    bm25_retriever.k = HYBRID_CANDIDATES_PER_RETRIEVER
+
+    # Combine them using weighted reciprocal-rank fusion
+    rerank_model = create_reranker(reranker)
+    hybrid_retriever = build_hybrid_retriever(
+        {"bm25": bm25_retriever, "vector": similarity_retriever},
+        weights=HYBRID_WEIGHTS,
+        k=RERANK_CANDIDATES if rerank_model else NUMBER_TOP_SOURCES
     )
+    if rerank_model is None:
+        return hybrid_retriever
+
+    # Re-rank the fused candidates and keep only the best ones
+    return RerankingRetriever(retriever=hybrid_retriever, reranker=rerank_model, top_n=RERANK_TOP_N)
+
 
-    return hybrid_retriever
+def publish_index_snapshot(
+    vector_db: Chroma,
+    index_version: Optional[str],
+    backend: str = VECTOR_STORE_BACKEND,
+    snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY
+) -> str:
+    """
+    Freezes the working sparse index (and, for the "numpy" backend, the dense index) into
+    a new snapshot with the ingestion manifest, first rebuilding the indexes from the
+    vector DB if they are missing or stale.
+
+    Args:
+        vector_db (Chroma): The vector DB the indexes mirror.
+        index_version (Optional[str]): Version of the document index.
+        backend (str): Vector search backend the snapshot is served with.
+        snapshots_directory (str): Where snapshots are kept.
+
+    Returns:
+        str: The directory of the new snapshot.
+    """
+    if not is_sparse_index_valid(SPARSE_INDEX_DEFAULT_DIRECTORY):
+        get_sparse_retriever(vector_db, force_rebuild=True)
+    sources = {"sparse_index": SPARSE_INDEX_DEFAULT_DIRECTORY, "manifest.json": INDEX_MANIFEST_DEFAULT_PATH}
+    if backend == "numpy":
+        if not is_dense_index_valid(DENSE_INDEX_DEFAULT_DIRECTORY, index_version):
+            get_dense_retriever(vector_db, index_version=index_version, force_rebuild=True)
+        sources["dense_index"] = DENSE_INDEX_DEFAULT_DIRECTORY
+    return publish_snapshot(sources, index_version, snapshots_directory)
+
+
+def reindex_documents(
+    retriever: SnapshotRetriever,
+    vector_db: Chroma,
+    backend: str = VECTOR_STORE_BACKEND,
+    reranker: str = RERANKER,
+    snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY,
+    join_running_sync: bool = False,
+    lock_path: str = INDEX_SYNC_LOCK_DEFAULT_PATH
+) -> dict:
+    """
+    Syncs the documents folder into the indexes and swaps a new snapshot into a live
+    retriever, without interrupting retrieval.
+
+    Worker processes share the working indexes, so one at a time syncs and publishes,
+    holding the lock file at `lock_path`; the others wait for it. With `join_running_sync`,
+    a worker finding another one syncing doesn't sync again after it, but swaps in the
+    snapshot it published.
+    Only the working indexes are updated in place; the live snapshot is never written to.
+    The new snapshot is loaded and read into the page cache before it is swapped in, so
+    the first queries on it pay no cold start. Chroma is not snapshotted: with the
+    "chroma" backend, vector search sees new chunks as soon as they are embedded.
+
+    Args:
+        retriever (SnapshotRetriever): The live retriever to swap the new snapshot into.
+        vector_db (Chroma): The vector DB to update in place.
+        backend (str): Vector search backend the snapshot is served with.
+        reranker (str): Re-ranking stage of the new retriever.
+        snapshots_directory (str): Where snapshots are kept.
+        join_running_sync (bool): Whether to swap in the snapshot of a sync another worker is running
+            instead of syncing after it, e.g. at startup.
+        lock_path (str): Lock file serializing syncs across worker processes.
+
+    Returns:
+        dict: The sync report (or `joined` if another worker synced), with the new `index_version`
+              and whether a snapshot was `swapped` in.
+    """
+    if load_manifest(INDEX_MANIFEST_DEFAULT_PATH) is None:
+        raise RuntimeError("No ingestion manifest found. Rebuild the index once to enable re-indexing.")
+
+    with file_lock(lock_path, blocking=not join_running_sync) as locked:
+        if locked:
+            report = sync_documents(vector_db)
+            index_version = compute_index_version(load_manifest(INDEX_MANIFEST_DEFAULT_PATH))
+            if index_version == retriever.index_version:
+                print(f"✅ Index version {index_version} is unchanged. Keeping the live snapshot.")
+                return {**report, "index_version": index_version, "swapped": False}
+            # Another worker may have published this version already
+            directory = get_current_snapshot(snapshots_directory)
+            if directory is None or read_snapshot_version(directory) != index_version \
+                    or not can_serve_snapshot(directory, backend) or not hold_snapshot(directory):
+                directory = publish_index_snapshot(vector_db, index_version, backend, snapshots_directory)
+
+    if not locked:
+        print("⏳ Another worker is syncing the documents. Waiting for its snapshot...")
+        with file_lock(lock_path):
+            directory = get_current_snapshot(snapshots_directory)
+        index_version = read_snapshot_version(directory) if directory else None
+        if directory is None or index_version == retriever.index_version \
+                or not can_serve_snapshot(directory, backend) or not hold_snapshot(directory):
+            return {"joined": True, "index_version": retriever.index_version, "swapped": False}
+        report = {"joined": True}
+
+    snapshot_retriever = build_snapshot_retriever(vector_db, directory, index_version, backend, reranker)
+    warm_up_snapshot(directory)
+    retriever.swap(snapshot_retriever, directory, index_version)
+    set_index_version(index_version)
+    return {**report, "index_version": index_version, "swapped": True}
+
+
+def can_serve_snapshot(directory: str, backend: str = VECTOR_STORE_BACKEND) -> bool:
+    """
+    Checks whether a snapshot holds every index the given backend serves from.
+
+    Args:
+        directory (str): The snapshot's directory.
+        backend (str): Vector search backend.
+
+    Returns:
+        bool: True if a retriever can be built from the snapshot alone.
+    """
+    if not is_sparse_index_valid(os.path.join(directory, "sparse_index")):
+        return False
+    return backend != "numpy" or is_dense_index_valid(os.path.join(directory, "dense_index"),
+                                                      read_snapshot_version(directory))
+
+
+def load_vector_store(
+    backend: str = VECTOR_STORE_BACKEND,
+    reranker: str = RERANKER,
+    snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY,
+    from_snapshot: bool = STARTUP_FROM_SNAPSHOT,
+    incremental: bool = INCREMENTAL_INDEXING
+) -> SnapshotRetriever:
+    """
+    Returns a retriever serving an index snapshot (see `build_snapshot_retriever`).
+
+    When a servable snapshot was published by a previous run, it is served right away:
+    the vector store is opened without validation and the documents folder is synced in
+    the background, swapping in a new snapshot if it changed. Otherwise the vector store
+    is loaded (or built) and synced first, and a new snapshot is published if the index
+    changed since the last one. Worker processes starting together take turns syncing
+    (see `reindex_documents`). Either way, the snapshot is read into the page cache in
+    the background and the worker reports ready (`GET /ready`) once it is. The
+    retriever's `start_reindex()` syncs the documents folder and swaps a new snapshot in
+    while the app keeps serving (see `reindex_documents`).
+
+    Args:
+        backend (str): Vector search backend: "chroma" queries the Chroma collection,
+            "numpy" a memory-mapped dense index mirrored from it.
+        reranker (str): Re-ranking stage: "none", "lexical" or "cross-encoder".
+        snapshots_directory (str): Where snapshots are kept.
+        from_snapshot (bool): Whether to serve the last published snapshot before syncing.
+        incremental (bool): Whether to index new, changed and removed documents into the existing index.
+
+    Returns:
+        SnapshotRetriever: A configured LangChain retriever for querying the vector store.
+    """
+    started = time.perf_counter()
+    directory = get_current_snapshot(snapshots_directory) if from_snapshot else None
+    sync_in_background = False
+    if directory is not None and os.path.isdir(CHROMA_DB_DEFAULT_DIRECTORY) \
+            and not is_build_checkpoint(load_manifest(INDEX_MANIFEST_DEFAULT_PATH)) \
+            and can_serve_snapshot(directory, backend) and hold_snapshot(directory):
+        print(f"⚡ Serving index snapshot {os.path.basename(directory)} right away...")
+        db = open_vector_store(CHROMA_DB_DEFAULT_DIRECTORY)
+        index_version = read_snapshot_version(directory)
+        sync_in_background = incremental
+    else:
+        # Workers starting together take turns: the first one builds or syncs and publishes, the others find it done
+        with file_lock(INDEX_SYNC_LOCK_DEFAULT_PATH):
+            db = get_vector_store(incremental=incremental)
+            index_version = compute_index_version(load_manifest(INDEX_MANIFEST_DEFAULT_PATH))
+            directory = get_current_snapshot(snapshots_directory)
+            if directory is None or read_snapshot_version(directory) != index_version \
+                    or not can_serve_snapshot(directory, backend) or not hold_snapshot(directory):
+                directory = publish_index_snapshot(db, index_version, backend, snapshots_directory)
+            else:
+                print(f"🔁 Loading index snapshot {os.path.basename(directory)}...")
+
+    # Cached answers are only valid for the index they were computed against
+    set_index_version(index_version)
+    remove_snapshots(keep=[directory], snapshots_directory=snapshots_directory)
+
+    retriever = SnapshotRetriever(
+        retriever=build_snapshot_retriever(db, directory, index_version, backend, reranker),
+        directory=directory,
+        index_version=index_version
+    )
+    retriever.rebuild = lambda **kwargs: reindex_documents(retriever, db, backend, reranker, snapshots_directory,
+                                                           **kwargs)
+    readiness.warm_up_in_background("index_snapshot", lambda: warm_up_snapshot(directory))
+    if sync_in_background:
+        print("🔄 Syncing documents in the background...")
+        retriever.start_reindex(join_running_sync=True)
+    print(f"🚀 Retriever loaded in {time.perf_counter() - started:.2f}s")
+    return retriever
@@ -0,0 +1,36 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from ..constants import CPU_EXECUTOR_MAX_WORKERS
+
+T = TypeVar("T")
+
+# Bounded pool for CPU-bound work (query embedding, BM25 scoring) done on behalf of async requests.
+# Network waits (e.g. on Ollama) never occupy it, so it only needs as many threads as there are cores.
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_MAX_WORKERS, thread_name_prefix="cpu-bound")
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking, CPU-bound function on the bounded CPU executor without blocking the event loop.
+
+    Args:
+        func (Callable[..., T]): The function to run.
+        *args (Any): Positional arguments for the function.
+        **kwargs (Any): Keyword arguments for the function.
+
+    Returns:
+        T: The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+def use_cpu_executor_by_default() -> None:
+    """
+    Makes the bounded CPU executor the running event loop's default executor, so work
+    LangChain offloads internally (e.g. embedding a query for a vector search) shares its bound.
+    """
+    asyncio.get_running_loop().set_default_executor(cpu_executor)
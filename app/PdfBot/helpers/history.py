@@ -0,0 +1,154 @@
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
+from ..constants import HISTORY_MAX_TURNS_PER_SESSION, HISTORY_MAX_TOTAL_CHARS, HISTORY_SESSION_IDLE_SECONDS, \
+    HISTORY_PAGE_SIZE
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def new_session_id() -> str:
+    """
+    Returns a new random, URL-safe session ID.
+    """
+    return secrets.token_urlsafe(24)
+
+
+def is_valid_session_id(session_id: Optional[str]) -> bool:
+    """
+    Checks that a session ID (e.g. read from a cookie) has the shape of one we issued.
+    """
+    return bool(session_id) and SESSION_ID_PATTERN.match(session_id) is not None
+
+
+def _turn_size(turn: dict) -> int:
+    return len(turn["user"]) + len(turn["agent"]) + sum(len(source) for source in turn["sources"])
+
+
+class ChatSession:
+    """
+    The latest turns of one session, in a ring buffer.
+    """
+
+    def __init__(self, max_turns: int):
+        self.turns: Deque[dict] = deque(maxlen=max_turns)
+        self.next_turn_id = 1
+        self.size = 0
+        self.last_seen = time.monotonic()
+
+
+class ChatHistoryStore:
+    """
+    Bounded, per-session chat history.
+
+    Every session keeps its latest `max_turns_per_session` turns in a ring buffer.
+    Across sessions, the stored text is capped at `max_total_chars` characters: beyond
+    that, the least recently active sessions are dropped. Sessions idle for more
+    than `idle_seconds` expire. Turns carry increasing IDs used as pagination
+    cursors, so older turns can be fetched page by page.
+    """
+
+    def __init__(self, max_turns_per_session: int = HISTORY_MAX_TURNS_PER_SESSION,
+                 max_total_chars: int = HISTORY_MAX_TOTAL_CHARS, idle_seconds: float = HISTORY_SESSION_IDLE_SECONDS):
+        self.max_turns_per_session = max_turns_per_session
+        self.max_total_chars = max_total_chars
+        self.idle_seconds = idle_seconds
+        self.total_size = 0
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id: str) -> None:
+        self.total_size -= self._sessions.pop(session_id).size
+
+    def _expire(self, now: float) -> None:
+        # Sessions are ordered by last activity, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.idle_seconds:
+                break
+            self._drop(session_id)
+
+    def append(self, session_id: str, user: str, agent: str, sources: List[str]) -> dict:
+        """
+        Records a turn in a session, creating the session if needed.
+
+        Args:
+            session_id (str): The session to record the turn in.
+            user (str): The user's (sanitized) query.
+            agent (str): The answer.
+            sources (List[str]): The answer's source strings.
+
+        Returns:
+            dict: The stored turn, with its `id`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ChatSession(self.max_turns_per_session)
+            self._sessions.move_to_end(session_id)
+            session.last_seen = now
+
+            turn = {"id": session.next_turn_id, "user": user, "agent": agent, "sources": list(sources)}
+            session.next_turn_id += 1
+            if len(session.turns) == session.turns.maxlen:
+                evicted = _turn_size(session.turns[0])
+                session.size -= evicted
+                self.total_size -= evicted
+            session.turns.append(turn)
+            session.size += _turn_size(turn)
+            self.total_size += _turn_size(turn)
+
+            # Over the global cap: drop the least recently active sessions, then the oldest turns of this one
+            while self.total_size > self.max_total_chars and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)))
+            while self.total_size > self.max_total_chars and len(session.turns) > 1:
+                evicted = _turn_size(session.turns.popleft())
+                session.size -= evicted
+                self.total_size -= evicted
+            return turn
+
+    def get_page(self, session_id: Optional[str], before: Optional[int] = None,
+                 limit: int = HISTORY_PAGE_SIZE) -> Tuple[List[dict], Optional[int]]:
+        """
+        Returns a page of a session's turns, oldest first.
+
+        Args:
+            session_id (Optional[str]): The session; unknown or missing sessions have no turns.
+            before (Optional[int]): Cursor: only turns with a lower ID are returned. The latest page by default.
+            limit (int): Maximum number of turns.
+
+        Returns:
+            Tuple[List[dict], Optional[int]]: The turns, and the cursor of the previous (older) page,
+                or None if there are no older turns.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                return [], None
+            self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            turns = [turn for turn in session.turns if before is None or turn["id"] < before]
+
+        page = turns[-limit:] if limit > 0 else []
+        next_cursor = page[0]["id"] if page and len(turns) > len(page) else None
+        return page, next_cursor
+
+    def get_stats(self) -> dict:
+        """
+        Returns the number of sessions and stored turns, and how many characters of text they hold.
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "turns": sum(len(session.turns) for session in self._sessions.values()),
+                "chars": self.total_size,
+                "max_chars": self.max_total_chars,
+            }
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import get_executor_for_config
+from pydantic import Field, PrivateAttr
+
+from .metrics import STAGE_SECONDS
+from ..constants import NUMBER_TOP_SOURCES, HYBRID_RRF_K
+
+
+def get_document_keys(doc: Document) -> Tuple[str, ...]:
+    """
+    Returns the keys identifying a chunk: its `chunk_id` (if any) and a hash of its content,
+    so a chunk is recognized both across retrievers and when stored twice under different IDs.
+    """
+    content_key = "sha256:" + hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+    chunk_id = doc.metadata.get("chunk_id")
+    return (f"id:{chunk_id}", content_key) if chunk_id else (content_key,)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[List[Document]],
+    weights: Sequence[float],
+    k: int,
+    rrf_k: int = HYBRID_RRF_K
+) -> List[Document]:
+    """
+    Fuses rankings with weighted reciprocal-rank fusion, after deduplicating chunks.
+
+    A chunk scores `sum(weight / (rrf_k + rank))` over the rankings it appears in
+    (ranks start at 1), counting only its best rank in each ranking. Ties keep the
+    order in which chunks were first seen.
+
+    Args:
+        rankings (Sequence[List[Document]]): Documents of every retriever, best first.
+        weights (Sequence[float]): Weight of every ranking.
+        k (int): Maximum number of unique documents to return.
+        rrf_k (int): Fusion constant damping the gap between top ranks.
+
+    Returns:
+        List[Document]: At most k unique documents, best first.
+    """
+    entries: List[dict] = []
+    by_key: Dict[str, dict] = {}
+
+    for ranking, weight in zip(rankings, weights):
+        seen_in_ranking = set()
+        for rank, doc in enumerate(ranking, start=1):
+            keys = get_document_keys(doc)
+            entry = next((by_key[key] for key in keys if key in by_key), None)
+            if entry is None:
+                entry = {"document": doc, "score": 0.0}
+                entries.append(entry)
+            for key in keys:
+                by_key.setdefault(key, entry)
+            if id(entry) in seen_in_ranking:
+                continue
+            seen_in_ranking.add(id(entry))
+            entry["score"] += weight / (rrf_k + rank)
+
+    entries.sort(key=lambda entry: -entry["score"])
+    return [entry["document"] for entry in entries[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Runs several retrievers (e.g. BM25 and vector search) concurrently and fuses
+    their rankings with weighted reciprocal-rank fusion.
+
+    Overlapping chunks are merged before fusion, so the `k` returned chunks are
+    unique and none of them takes up LLM context twice. Sub-retrievers should
+    return more than `k` candidates each, so there are still `k` chunks left once
+    overlaps are merged. The time spent in every stage is accumulated in `get_stats()`.
+    """
+
+    retrievers: List[BaseRetriever]
+    weights: List[float]
+    names: List[str] = Field(default_factory=list)
+    k: int = NUMBER_TOP_SOURCES
+    rrf_k: int = HYBRID_RRF_K
+
+    _stats: Dict[str, Dict[str, float]] = PrivateAttr(default_factory=dict)
+    _stats_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, context: Any) -> None:
+        if len(self.weights) != len(self.retrievers):
+            raise ValueError("HybridRetriever needs exactly one weight per retriever")
+        if not self.names:
+            self.names = [type(retriever).__name__ for retriever in self.retrievers]
+
+    def _record(self, timings: Dict[str, float]) -> None:
+        with self._stats_lock:
+            for stage, seconds in timings.items():
+                stats = self._stats.setdefault(stage, {"calls": 0, "seconds_total": 0.0, "seconds_max": 0.0})
+                stats["calls"] += 1
+                stats["seconds_total"] += seconds
+                stats["seconds_max"] = max(stats["seconds_max"], seconds)
+                if stage != "total":
+                    STAGE_SECONDS.observe(seconds, stage=f"retrieval_{stage}")
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns, per stage (every sub-retriever, "fusion" and "total"), the number of calls and their total,
+        average and maximum duration in seconds.
+        """
+        with self._stats_lock:
+            return {
+                stage: {**stats, "seconds_avg": stats["seconds_total"] / stats["calls"] if stats["calls"] else 0.0}
+                for stage, stats in self._stats.items()
+            }
+
+    def _fuse(self, rankings: List[List[Document]], timings: Dict[str, float], started: float) -> List[Document]:
+        fusion_started = time.perf_counter()
+        documents = reciprocal_rank_fusion(rankings, self.weights, self.k, self.rrf_k)
+        timings["fusion"] = time.perf_counter() - fusion_started
+        timings["total"] = time.perf_counter() - started
+        self._record(timings)
+        return documents
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        def run(name: str, retriever: BaseRetriever) -> List[Document]:
+            stage_started = time.perf_counter()
+            documents = retriever.invoke(query, config={"callbacks": run_manager.get_child(tag=name)})
+            timings[name] = time.perf_counter() - stage_started
+            return documents
+
+        with get_executor_for_config(None) as executor:
+            rankings = list(executor.map(run, self.names, self.retrievers))
+        return self._fuse(rankings, timings, started)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        async def run(name: str, retriever: BaseRetriever) -> List[Document]:
+            stage_started = time.perf_counter()
+            documents = await retriever.ainvoke(query, config={"callbacks": run_manager.get_child(tag=name)})
+            timings[name] = time.perf_counter() - stage_started
+            return documents
+
+        rankings = await asyncio.gather(*map(run, self.names, self.retrievers))
+        return self._fuse(list(rankings), timings, started)
+
+
+def build_hybrid_retriever(
+    retrievers: Dict[str, BaseRetriever],
+    weights: Sequence[float],
+    k: int = NUMBER_TOP_SOURCES,
+    rrf_k: Optional[int] = None
+) -> HybridRetriever:
+    """
+    Builds a hybrid retriever over named sub-retrievers.
+
+    Args:
+        retrievers (Dict[str, BaseRetriever]): Sub-retrievers by stage name (used in the timings).
+        weights (Sequence[float]): Weight of every sub-retriever's ranking, in the same order.
+        k (int): Number of unique chunks to return.
+        rrf_k (Optional[int]): Fusion constant; `HYBRID_RRF_K` by default.
+
+    Returns:
+        HybridRetriever: The configured retriever.
+    """
+    return HybridRetriever(
+        retrievers=list(retrievers.values()),
+        weights=list(weights),
+        names=list(retrievers),
+        k=k,
+        rrf_k=rrf_k if rrf_k is not None else HYBRID_RRF_K
+    )
@@ -0,0 +1,378 @@
+import hashlib
+import os
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from .loaders import get_loader
+from .metrics import LOADED_FILES, LOADED_BYTES, LOADED_CHUNKS, LOADING_SECONDS
+from ..constants import INGESTION_MAX_WORKERS, INGESTION_FILE_TIMEOUT
+
+
+def find_document_paths(root_dir: str) -> Dict[str, str]:
+    """
+    Recursively finds all documents in a directory whose format has a registered loader.
+    Hidden files and Office lock files (`~$report.docx`) are skipped.
+
+    Args:
+        root_dir (str): Root folder to recursively search for documents.
+
+    Returns:
+        Dict[str, str]: Mapping of each document's path relative to `root_dir` to its full path.
+    """
+    document_paths = {}
+    for root, _, files in os.walk(root_dir):
+        for file in files:
+            if file.startswith(("~$", ".")) or get_loader(file) is None:
+                continue
+            full_path = os.path.join(root, file)
+            document_paths[os.path.relpath(full_path, root_dir)] = full_path
+    return document_paths
+
+
+def load_document(full_path: str, root_dir: str) -> Iterator[Document]:
+    """
+    Streams a single document as LangChain documents (one per page or section), using the
+    loader registered for its format. Every document carries the source, path, page or
+    section and the file's metadata (title, author, etc.).
+
+    Args:
+        full_path (str): Path of the document.
+        root_dir (str): Documents root folder, used to record the document's relative path.
+
+    Returns:
+        Iterator[Document]: The document's pages or sections with enriched metadata.
+
+    Raises:
+        ValueError: If no loader is registered for the file's format.
+    """
+    loader = get_loader(full_path)
+    if loader is None:
+        raise ValueError(f"No loader is registered for {os.path.basename(full_path)!r}")
+    return loader.lazy_load(full_path, root_dir)
+
+
+def find_all_documents(root_dir: str) -> List[Document]:
+    """
+    Recursively finds all supported documents in a directory and loads them as LangChain documents.
+
+    Args:
+        root_dir (str): Root folder to recursively search for documents.
+
+    Returns:
+        List[Document]: A list of documents with enriched metadata from all found files.
+    """
+    all_docs = []
+
+    for full_path in find_document_paths(root_dir).values():
+        docs = list(load_document(full_path, root_dir))
+        print(f"📄 Loaded {len(docs)} docs from: {full_path}")
+        all_docs.extend(docs)
+
+    print(f"✅ Total documents loaded: {len(all_docs)}")
+    return all_docs
+
+
+def find_all_pdfs(root_dir: str) -> List[Document]:
+    """
+    Deprecated alias of `find_all_documents`, which loads every supported format, not only PDFs.
+    """
+    warnings.warn("find_all_pdfs is deprecated, use find_all_documents instead.", DeprecationWarning, stacklevel=2)
+    return find_all_documents(root_dir)
+
+
+def get_metadata_lines(metadata: dict) -> List[str]:
+    """
+    Returns the "Title: ...", "Author: ..." and "Subject: ..." lines describing a document,
+    for the fields it has.
+
+    Args:
+        metadata (dict): The document's metadata.
+
+    Returns:
+        List[str]: The metadata lines, possibly empty.
+    """
+    metadata_lines = []
+    if metadata.get("title"):
+        metadata_lines.append(f"Title: {metadata['title']}")
+    if metadata.get("author"):
+        metadata_lines.append(f"Author: {metadata['author']}")
+    if metadata.get("subject"):
+        metadata_lines.append(f"Subject: {metadata['subject']}")
+    return metadata_lines
+
+
+def inject_metadata(doc: Document) -> str:
+    """
+    Appends select metadata fields into the content of the document
+    to give the language model extra reasoning context during retrieval.
+
+    Args:
+        doc (Document): A LangChain Document object with metadata.
+
+    Returns:
+        str: The document's text prefixed with selected metadata.
+    """
+    return "\n".join(get_metadata_lines(doc.metadata) + [doc.page_content])
+
+
+def strip_injected_metadata(doc: Document) -> str:
+    """
+    Returns a chunk's text without the metadata lines `inject_metadata` prefixed it with.
+
+    Args:
+        doc (Document): A chunk produced by `split_documents`.
+
+    Returns:
+        str: The chunk's original text.
+    """
+    metadata_lines = get_metadata_lines(doc.metadata)
+    prefix = "\n".join(metadata_lines) + "\n"
+    if metadata_lines and doc.page_content.startswith(prefix):
+        return doc.page_content[len(prefix):]
+    return doc.page_content
+
+
+def compute_chunk_id(doc: Document) -> str:
+    """
+    Derives a deterministic chunk ID from a chunk's origin and content, so the same
+    chunk gets the same ID in the vector store and the sparse index across rebuilds.
+
+    Args:
+        doc (Document): A chunked document.
+
+    Returns:
+        str: A hex digest identifying the chunk.
+    """
+    metadata = doc.metadata
+    key = "\x1f".join([
+        str(metadata.get("path", metadata.get("source", ""))),
+        str(metadata.get("page")),
+        str(metadata.get("start_index")),
+        doc.page_content,
+    ] + ([str(metadata["section"])] if "section" in metadata else []))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def split_documents(documents: Iterable[Document], chunk_size: int = 1024, chunk_overlap: int = 256) -> List[Document]:
+    """
+    Splits documents into overlapping chunks using recursive character splitting.
+    Injects metadata directly into the page content for better context and tags
+    every chunk with a deterministic `chunk_id`.
+
+    Args:
+        documents (Iterable[Document]): The documents to split, e.g. streamed by `load_document`.
+        chunk_size (int): Size of each chunk in characters.
+        chunk_overlap (int): Number of overlapping characters between chunks.
+
+    Returns:
+        List[Document]: List of chunked documents with metadata injected into their text.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ".", " ", ""],
+        add_start_index=True
+        # splitter tries preserving paragraphs, then lines, then sentences, then words, then characters
+    )
+    chunks = splitter.split_documents(documents)
+    print(f"✂️ Split into {len(chunks)} text chunks.")
+
+    docs_with_metadata = [
+        Document(page_content=inject_metadata(doc), metadata={**doc.metadata, "chunk_id": compute_chunk_id(doc)})
+        for doc in chunks
+    ]
+
+    return docs_with_metadata
+
+
+def ingest_document(full_path: str, root_dir: str) -> List[Document]:
+    """
+    Loads and splits a single document. Runs inside ingestion worker processes.
+
+    Args:
+        full_path (str): Path of the document.
+        root_dir (str): Documents root folder.
+
+    Returns:
+        List[Document]: The document's chunks, tagged with `chunk_id` metadata.
+    """
+    sections = 0
+
+    def count(docs: Iterable[Document]) -> Iterator[Document]:
+        nonlocal sections
+        for doc in docs:
+            sections += 1
+            yield doc
+
+    chunks = split_documents(count(load_document(full_path, root_dir)))
+    print(f"📄 Loaded {sections} docs from: {full_path}")
+    return chunks
+
+
+def _ingest_and_measure(full_path: str, root_dir: str) -> Tuple[List[Document], float]:
+    """
+    Runs `ingest_document` and times it, so the parent process can report throughput per format.
+    """
+    started = time.perf_counter()
+    chunks = ingest_document(full_path, root_dir)
+    return chunks, time.perf_counter() - started
+
+
+class _IngestionStats:
+    """
+    Tallies ingested files, bytes, chunks and worker time per format, for `pdfbot_loaded_*` and the summary.
+    """
+
+    def __init__(self):
+        self.formats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, full_path: str, chunks: Optional[List[Document]], seconds: float = 0.0) -> None:
+        loader = get_loader(full_path)
+        document_format = loader.format if loader else "unknown"
+        stats = self.formats.setdefault(document_format, {"files": 0, "failed": 0, "bytes": 0, "chunks": 0,
+                                                          "seconds": 0.0})
+        if chunks is None:
+            stats["failed"] += 1
+            LOADED_FILES.inc(format=document_format, status="failed")
+            return
+        try:
+            size = os.path.getsize(full_path)
+        except OSError:
+            size = 0
+        stats["files"] += 1
+        stats["bytes"] += size
+        stats["chunks"] += len(chunks)
+        stats["seconds"] += seconds
+        LOADED_FILES.inc(format=document_format, status="loaded")
+        LOADED_BYTES.inc(size, format=document_format)
+        LOADED_CHUNKS.inc(len(chunks), format=document_format)
+        LOADING_SECONDS.inc(seconds, format=document_format)
+
+    def summarize(self) -> None:
+        for document_format, stats in sorted(self.formats.items()):
+            throughput = ""
+            if stats["seconds"] > 0:
+                throughput = (f", {stats['bytes'] / (1024 * 1024) / stats['seconds']:.2f} MB/sec and "
+                              f"{stats['files'] / stats['seconds']:.2f} files/sec per worker")
+            print(f"📊 Loaded {stats['files']} {document_format} file(s) ({stats['failed']} failed, "
+                  f"{stats['chunks']} chunks){throughput}")
+
+
+def _terminate_workers(executor: ProcessPoolExecutor) -> None:
+    """
+    Kills the worker processes of an executor, e.g. when one is stuck on a corrupt PDF.
+    ProcessPoolExecutor has no public API to cancel a task that is already running.
+    """
+    for process in list(getattr(executor, "_processes", {}).values()):
+        process.terminate()
+
+
+def iter_ingested_documents(
+    document_paths: Dict[str, str],
+    root_dir: str,
+    max_workers: int = INGESTION_MAX_WORKERS,
+    file_timeout: float = INGESTION_FILE_TIMEOUT
+) -> Iterator[Tuple[str, Optional[List[Document]]]]:
+    """
+    Loads, extracts metadata from and splits documents in parallel worker processes,
+    yielding each file's chunks as soon as that file is done.
+
+    A file that fails, or runs longer than `file_timeout` seconds once a worker
+    has picked it up, is reported and yielded with `None` instead of chunks, so
+    one corrupt file can't stall the build: a stuck worker is killed and the pool
+    replaced. The time limit needs worker processes; with `max_workers=1` files are
+    ingested in-process and a stuck file blocks the build. Files, bytes, chunks and worker seconds
+    are recorded per format (`pdfbot_loaded_*` metrics) and summarized at the end.
+
+    Args:
+        document_paths (Dict[str, str]): Relative path -> full path of the documents to ingest.
+        root_dir (str): Documents root folder.
+        max_workers (int): Number of worker processes; 1 ingests serially in-process.
+        file_timeout (float): Per-file time limit in seconds (only enforced with `max_workers > 1`).
+
+    Yields:
+        Tuple[str, Optional[List[Document]]]: Relative path and chunks (None on failure), in completion order.
+    """
+    stats = _IngestionStats()
+    for relative_path, result in _iter_measured(document_paths, root_dir, max_workers, file_timeout):
+        chunks, seconds = result if result else (None, 0.0)
+        stats.record(document_paths[relative_path], chunks, seconds)
+        yield relative_path, chunks
+    stats.summarize()
+
+
+def _iter_measured(
+    document_paths: Dict[str, str],
+    root_dir: str,
+    max_workers: int,
+    file_timeout: float
+) -> Iterator[Tuple[str, Optional[Tuple[List[Document], float]]]]:
+    if max_workers <= 1:
+        for relative_path, full_path in sorted(document_paths.items()):
+            try:
+                yield relative_path, _ingest_and_measure(full_path, root_dir)
+            except Exception as e:
+                print(f"⚠️ Couldn't ingest {relative_path}: {e}")
+                yield relative_path, None
+        return
+
+    pending = deque(sorted(document_paths.items()))
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    in_flight = {}  # future -> (relative path, full path, time it was submitted)
+
+    try:
+        while True:
+            # At most one file per worker, so every submitted file is being worked on and its clock is meaningful
+            while len(in_flight) < max_workers and pending:
+                relative_path, full_path = pending.popleft()
+                future = executor.submit(_ingest_and_measure, full_path, root_dir)
+                in_flight[future] = (relative_path, full_path, time.monotonic())
+
+            if not in_flight:
+                break
+
+            done, _ = wait(list(in_flight), timeout=min(1.0, file_timeout), return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                relative_path, _, _ = in_flight.pop(future)
+                try:
+                    yield relative_path, future.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    print(f"⚠️ Ingestion worker crashed while processing {relative_path}: {e}")
+                    yield relative_path, None
+                except Exception as e:
+                    print(f"⚠️ Couldn't ingest {relative_path}: {e}")
+                    yield relative_path, None
+
+            now = time.monotonic()
+            timed_out = [future for future, (_, _, started) in in_flight.items() if now - started > file_timeout]
+            for future in timed_out:
+                relative_path, _, _ = in_flight.pop(future)
+                print(f"⏱️ Gave up on {relative_path} after {file_timeout}s")
+                yield relative_path, None
+
+            if broken or timed_out:
+                # A crashed worker poisons the pool and a stuck one can't be cancelled: replace the pool. The
+                # files still in flight are failed after a crash (the culprit is unknown), or retried after a timeout
+                if broken:
+                    for relative_path, _, _ in in_flight.values():
+                        yield relative_path, None
+                else:
+                    pending.extendleft(reversed([(relative_path, full_path)
+                                                 for relative_path, full_path, _ in in_flight.values()]))
+                in_flight.clear()
+                _terminate_workers(executor)
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+    finally:
+        if in_flight:
+            _terminate_workers(executor)
+        executor.shutdown(wait=not in_flight, cancel_futures=True)
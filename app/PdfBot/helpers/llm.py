@@ -1,30 +1,242 @@
-from langchain_ollama import OllamaLLM
+import asyncio
+import hashlib
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, List, Optional
+
+import httpx
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.outputs import Generation
 from langchain.globals import set_llm_cache
-from langchain_community.cache import InMemoryCache
 
+from .cache_backend import CacheBackend, SQLiteCacheBackend
+from .metrics import LLM_QUEUE_WAIT_SECONDS, LLM_REJECTIONS
+from .ollama_pool import OllamaPool
+from ..constants import LLM_CACHE_DEFAULT_PATH, LLM_CACHE_MAX_SIZE, LLM_CACHE_TTL_SECONDS, OLLAMA_MAX_CONNECTIONS, \
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS, OLLAMA_REQUEST_TIMEOUT_SECONDS, LLM_MAX_CONCURRENT_GENERATIONS, \
+    LLM_MAX_QUEUE_SIZE, LLM_QUEUE_TIMEOUT_SECONDS, OLLAMA_MODEL, OLLAMA_BASE_URLS, \
+    OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS, OLLAMA_HEALTH_CHECK_TIMEOUT_SECONDS, OLLAMA_KEEP_ALIVE
+
+
+LLM_BUSY_MESSAGE = "⚠️ The assistant is busy right now. Please try again in a moment."
 
-def enable_llm_cache() -> None:
+
+class LLMBusyError(Exception):
+    """
+    Raised when a generation cannot be admitted: the queue is full or the request's deadline passed while queued.
     """
-    Enable in-memory caching for LLM responses.
-    This speeds up repeated prompts by storing prompt-response pairs.
+
+
+class LLMScheduler:
     """
-    set_llm_cache(InMemoryCache())
+    Admission control in front of the LLM.
 
+    At most `max_concurrency` generations run at once; further requests wait in a
+    FIFO queue of at most `max_queue_size` entries and are rejected with
+    `LLMBusyError` when it is full, or when their deadline passes before a slot
+    frees up. Rejecting early keeps the latency of admitted requests bounded
+    instead of letting every request slow down together.
 
-def get_ollama_llm() -> OllamaLLM:
+    Only generations go through the scheduler: cached answers are served before
+    admission, so they never queue behind new generations.
     """
-    Instantiate and return an Ollama LLM instance configured for local inference.
+
+    def __init__(self, max_concurrency: int, max_queue_size: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def is_full(self) -> bool:
+        """
+        Returns True if a new request would be rejected right away.
+        """
+        return self.running >= self.max_concurrency and self.queued >= self.max_queue_size
+
+    def check_capacity(self) -> None:
+        """
+        Rejects a request early if it could not be admitted.
+
+        Raises:
+            LLMBusyError: If every slot is taken and the queue is full.
+        """
+        if self.is_full():
+            self.stats["rejected"] += 1
+            LLM_REJECTIONS.inc(reason="full")
+            raise LLMBusyError(LLM_BUSY_MESSAGE)
+
+    def _admitted(self, waited: float) -> None:
+        self.stats["admitted"] += 1
+        self.stats["wait_seconds_total"] += waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+        LLM_QUEUE_WAIT_SECONDS.observe(waited)
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Waits for a generation slot.
+
+        Args:
+            deadline (Optional[float]): `time.monotonic()` time after which the request
+                gives up waiting; defaults to `queue_timeout` seconds from now.
+
+        Raises:
+            LLMBusyError: If the queue is full or the deadline passes first.
+        """
+        started = time.monotonic()
+        if self.running < self.max_concurrency and not self._waiters:
+            self.running += 1
+            self._admitted(0.0)
+            return
+
+        self.check_capacity()
+
+        deadline = deadline if deadline is not None else started + self.queue_timeout
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=max(0.0, deadline - time.monotonic()))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timed_out"] += 1
+                LLM_REJECTIONS.inc(reason="timeout")
+                raise LLMBusyError(LLM_BUSY_MESSAGE) from None
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self._admitted(time.monotonic() - started)
+
+    def release(self) -> None:
+        """
+        Frees a generation slot, handing it directly to the oldest waiting request.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Holds a generation slot for the duration of the block.
+
+        Args:
+            deadline (Optional[float]): See `acquire`.
+        """
+        await self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> dict:
+        """
+        Returns scheduler metrics: running generations, queue depth, limits, and admission counters and wait times.
+        """
+        admitted = self.stats["admitted"]
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+            **self.stats,
+            "wait_seconds_avg": self.stats["wait_seconds_total"] / admitted if admitted else 0.0,
+        }
+
+
+# Process-wide scheduler shared by every request sent to Ollama
+llm_scheduler = LLMScheduler(
+    max_concurrency=LLM_MAX_CONCURRENT_GENERATIONS,
+    max_queue_size=LLM_MAX_QUEUE_SIZE,
+    queue_timeout=LLM_QUEUE_TIMEOUT_SECONDS
+)
+
+
+class BackendLLMCache(BaseCache):
+    """
+    LangChain LLM cache storing prompt -> generations pairs in a `CacheBackend`.
+    Prompts embed the retrieved context and the template, so document or prompt
+    changes naturally produce new keys.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        cached = self.backend.get(self._key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [Generation(**generation) for generation in cached]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.backend.set(
+            self._key(prompt, llm_string),
+            [{"text": generation.text, "generation_info": generation.generation_info} for generation in return_val]
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+
+
+def enable_llm_cache(path: str = LLM_CACHE_DEFAULT_PATH) -> None:
+    """
+    Enable persistent caching for LLM responses.
+    This speeds up repeated prompts by storing prompt-response pairs in a SQLite
+    database shared by worker processes and kept across restarts.
+
+    Args:
+        path (str): Path of the SQLite cache database.
+    """
+    set_llm_cache(BackendLLMCache(SQLiteCacheBackend(path, maxsize=LLM_CACHE_MAX_SIZE, ttl=LLM_CACHE_TTL_SECONDS)))
+
+
+def get_ollama_llm(base_urls: Optional[List[str]] = None) -> OllamaPool:
+    """
+    Instantiate and return an Ollama LLM configured for local inference, balanced over one or more Ollama nodes.
+    Async calls to a node share one pooled HTTP client, so concurrent requests reuse keep-alive connections.
+    Every request carries identical options and keeps the model loaded, so Ollama can reuse the evaluated
+    prompt template (the prompt's fixed prefix) across requests.
+
+    Args:
+        base_urls (Optional[List[str]]): URLs of the Ollama nodes; `OLLAMA_BASE_URLS` by default.
 
     Returns:
-        OllamaLLM: Configured Ollama LLM for use in LangChain.
+        OllamaPool: Configured Ollama LLM for use in LangChain.
     """
-    return OllamaLLM(
-        model="mistral",
-        base_url="http://host.docker.internal:11434",  # Ensures container can reach host Ollama instance
-        temperature=0,  # Deterministic responses
-        config={
+    return OllamaPool(
+        base_urls=base_urls or OLLAMA_BASE_URLS,
+        model=OLLAMA_MODEL,
+        options={
+            "temperature": 0,     # Deterministic responses
             "num_ctx": 4096,      # Context window size
             "num_batch": 32,      # Batch size for inference
             "num_thread": 6,      # Number of CPU threads
-        }
-    )
\ No newline at end of file
+        },
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        client_kwargs={"timeout": OLLAMA_REQUEST_TIMEOUT_SECONDS},
+        async_client_kwargs={
+            "limits": httpx.Limits(
+                max_connections=OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS
+            )
+        },
+        health_check_interval=OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS,
+        health_check_timeout=OLLAMA_HEALTH_CHECK_TIMEOUT_SECONDS
+    )
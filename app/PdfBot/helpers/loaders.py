@@ -0,0 +1,350 @@
+import os
+import re
+import zipfile
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from langchain_community.document_loaders import PyMuPDFLoader
+from langchain_core.documents import Document
+
+from ..constants import LOADER_SECTION_MAX_CHARS
+
+# Characters read from a text or HTML file at a time
+LOADER_READ_BLOCK_CHARS = 64 * 1024
+
+
+def _build_metadata(full_path: str, root_dir: str, **fields: Optional[str]) -> dict:
+    metadata = {
+        "source": os.path.basename(full_path),
+        "path": os.path.relpath(full_path, root_dir),
+    }
+    for field in ("title", "author", "subject", "creation_date", "mod_date"):
+        metadata[field] = str(fields.get(field) or "")
+    return metadata
+
+
+class DocumentLoader(ABC):
+    """
+    Streams a file's pages or sections as LangChain documents, with the metadata fields
+    the rest of the pipeline relies on: source, path, title, author, subject, creation_date,
+    mod_date and, for paged formats, page. Sections without pages carry a `section` index.
+    """
+
+    # File extensions (lower case, with the dot) this loader handles, and the name of the format
+    extensions: Tuple[str, ...] = ()
+    format = ""
+    # Leading bytes every valid file starts with, if the format has any
+    signature: Optional[bytes] = None
+
+    @abstractmethod
+    def lazy_load(self, full_path: str, root_dir: str) -> Iterator[Document]:
+        """
+        Yields the file's pages or sections, one at a time.
+
+        Args:
+            full_path (str): Path of the file.
+            root_dir (str): Documents root folder, used to record the file's relative path.
+        """
+
+
+class PdfLoader(DocumentLoader):
+    """
+    Loads PDFs page by page. Text and metadata both come from a single PyMuPDF parse of the file.
+    """
+
+    extensions = (".pdf",)
+    format = "pdf"
+    signature = b"%PDF-"
+
+    def lazy_load(self, full_path: str, root_dir: str) -> Iterator[Document]:
+        for doc in PyMuPDFLoader(full_path).lazy_load():
+            metadata = doc.metadata
+            metadata.update(_build_metadata(
+                full_path, root_dir, title=metadata.get("title"), author=metadata.get("author"),
+                subject=metadata.get("subject"), creation_date=metadata.get("creationDate"),
+                mod_date=metadata.get("modDate")
+            ))
+            metadata["page"] = metadata.get("page", None)
+            yield doc
+
+
+class _SectionBuffer:
+    """
+    Accumulates text into sections, cut at headings or once they reach `max_chars`.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self.sections: List[str] = []
+
+    def add(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.max_chars:
+            self.flush()
+
+    def flush(self) -> None:
+        text = re.sub(r"\n{3,}", "\n\n", "".join(self.parts)).strip()
+        if text:
+            self.sections.append(text)
+        self.parts, self.size = [], 0
+
+    def drain(self) -> List[str]:
+        sections, self.sections = self.sections, []
+        return sections
+
+
+class TextLoader(DocumentLoader):
+    """
+    Loads plain text files in sections of about `LOADER_SECTION_MAX_CHARS` characters,
+    reading them line by line.
+    """
+
+    extensions = (".txt",)
+    format = "txt"
+
+    def __init__(self, max_chars: int = LOADER_SECTION_MAX_CHARS):
+        self.max_chars = max_chars
+
+    def mark_sections(self, lines: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        """
+        Yields every line with whether a new section starts at it.
+        """
+        for line in lines:
+            yield line, False
+
+    def get_title(self, full_path: str) -> str:
+        return ""
+
+    def lazy_load(self, full_path: str, root_dir: str) -> Iterator[Document]:
+        metadata = _build_metadata(full_path, root_dir, title=self.get_title(full_path))
+        buffer = _SectionBuffer(self.max_chars)
+        index = 0
+        with open(full_path, encoding="utf-8", errors="replace") as f:
+            for line, starts_section in self.mark_sections(f):
+                if starts_section:
+                    buffer.flush()
+                buffer.add(line)
+                for text in buffer.drain():
+                    yield Document(page_content=text, metadata={**metadata, "section": index})
+                    index += 1
+        buffer.flush()
+        for text in buffer.drain():
+            yield Document(page_content=text, metadata={**metadata, "section": index})
+            index += 1
+
+
+class MarkdownLoader(TextLoader):
+    """
+    Loads Markdown files in sections starting at every heading (outside code blocks).
+    The document's title is its leading level-1 heading, if it starts with one.
+    """
+
+    extensions = (".md", ".markdown")
+    format = "markdown"
+
+    def mark_sections(self, lines: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        in_code_block = False
+        for line in lines:
+            if line.lstrip().startswith(("```", "~~~")):
+                in_code_block = not in_code_block
+            yield line, not in_code_block and line.startswith("#")
+
+    def get_title(self, full_path: str) -> str:
+        with open(full_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.strip():
+                    return line[2:].strip() if line.startswith("# ") else ""
+        return ""
+
+
+class _HTMLTextParser(HTMLParser):
+    SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "td", "th", "section", "article", "pre", "blockquote", "table",
+                  "ul", "ol", "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6"}
+    SECTION_TAGS = {"h1", "h2", "h3"}
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.buffer = _SectionBuffer(max_chars)
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self._skipped = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attributes = dict(attrs)
+            if attributes.get("name") and attributes.get("content"):
+                self.meta[attributes["name"].lower()] = attributes["content"]
+        elif tag in self.SKIPPED_TAGS:
+            self._skipped += 1
+        if tag in self.SECTION_TAGS:
+            self.buffer.flush()
+        if tag in self.BLOCK_TAGS:
+            self.buffer.add("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        elif tag in self.SKIPPED_TAGS:
+            self._skipped = max(0, self._skipped - 1)
+        if tag in self.BLOCK_TAGS:
+            self.buffer.add("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif not self._skipped:
+            self.buffer.add(re.sub(r"[ \t\r\f\v]+", " ", data))
+
+
+class HtmlLoader(DocumentLoader):
+    """
+    Loads the visible text of HTML pages in sections starting at every h1-h3 heading,
+    feeding the parser block by block. Title, author and description come from the page's head.
+    """
+
+    extensions = (".html", ".htm")
+    format = "html"
+
+    def __init__(self, max_chars: int = LOADER_SECTION_MAX_CHARS):
+        self.max_chars = max_chars
+
+    def lazy_load(self, full_path: str, root_dir: str) -> Iterator[Document]:
+        parser = _HTMLTextParser(self.max_chars)
+        index = 0
+
+        def sections() -> Iterator[Document]:
+            nonlocal index
+            metadata = _build_metadata(full_path, root_dir, title=parser.title.strip(),
+                                       author=parser.meta.get("author"), subject=parser.meta.get("description"))
+            for text in parser.buffer.drain():
+                yield Document(page_content=text, metadata={**metadata, "section": index})
+                index += 1
+
+        with open(full_path, encoding="utf-8", errors="replace") as f:
+            while block := f.read(LOADER_READ_BLOCK_CHARS):
+                parser.feed(block)
+                yield from sections()
+        parser.close()
+        parser.buffer.flush()
+        yield from sections()
+
+
+class DocxLoader(DocumentLoader):
+    """
+    Loads Word documents page by page, as last rendered by Word (or at manual page
+    breaks), streaming paragraphs out of the archive. Long pages are cut into sections
+    of about `LOADER_SECTION_MAX_CHARS` characters, and a heading starts a new section.
+    """
+
+    extensions = (".docx",)
+    format = "docx"
+    signature = b"PK\x03\x04"
+
+    W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    CORE_PROPERTIES = {
+        "title": "{http://purl.org/dc/elements/1.1/}title",
+        "author": "{http://purl.org/dc/elements/1.1/}creator",
+        "subject": "{http://purl.org/dc/elements/1.1/}subject",
+        "creation_date": "{http://purl.org/dc/terms/}created",
+        "mod_date": "{http://purl.org/dc/terms/}modified",
+    }
+
+    def __init__(self, max_chars: int = LOADER_SECTION_MAX_CHARS):
+        self.max_chars = max_chars
+
+    def read_properties(self, archive: zipfile.ZipFile) -> Dict[str, str]:
+        try:
+            root = ElementTree.fromstring(archive.read("docProps/core.xml"))
+        except KeyError:
+            return {}
+        return {field: root.findtext(tag) or "" for field, tag in self.CORE_PROPERTIES.items()}
+
+    def lazy_load(self, full_path: str, root_dir: str) -> Iterator[Document]:
+        W = self.W
+        with zipfile.ZipFile(full_path) as archive:
+            metadata = _build_metadata(full_path, root_dir, **self.read_properties(archive))
+            buffer = _SectionBuffer(self.max_chars)
+            page, index = 0, 0
+            paragraphs = []  # per open paragraph: [texts, page breaks, rendered page breaks, is heading]
+
+            def sections(section_page: int) -> Iterator[Document]:
+                nonlocal index
+                for text in buffer.drain():
+                    yield Document(page_content=text, metadata={**metadata, "page": section_page, "section": index})
+                    index += 1
+
+            with archive.open("word/document.xml") as f:
+                for event, element in ElementTree.iterparse(f, events=("start", "end")):
+                    tag = element.tag
+                    if event == "start":
+                        if tag == f"{W}p":
+                            paragraphs.append([[], 0, 0, False])
+                        continue
+                    if not paragraphs:
+                        continue
+                    paragraph = paragraphs[-1]
+                    if tag == f"{W}t":
+                        paragraph[0].append(element.text or "")
+                    elif tag == f"{W}tab":
+                        paragraph[0].append("\t")
+                    elif tag == f"{W}br":
+                        if element.get(f"{W}type") == "page":
+                            paragraph[1] += 1
+                        else:
+                            paragraph[0].append("\n")
+                    elif tag == f"{W}lastRenderedPageBreak":
+                        paragraph[2] += 1
+                    elif tag == f"{W}pStyle":
+                        style = (element.get(f"{W}val") or "").lower()
+                        paragraph[3] = style.startswith("heading") or style == "title"
+                    elif tag == f"{W}p":
+                        texts, breaks, rendered_breaks, is_heading = paragraphs.pop()
+                        # Word also records a rendered break where it rendered a manual one
+                        breaks = max(breaks, rendered_breaks)
+                        if breaks or is_heading:
+                            buffer.flush()
+                            yield from sections(page)
+                            page += breaks
+                        buffer.add("".join(texts) + "\n")
+                        yield from sections(page)
+                        element.clear()
+            buffer.flush()
+            yield from sections(page)
+
+
+DOCUMENT_LOADERS: Dict[str, DocumentLoader] = {}
+
+
+def register_loader(loader: DocumentLoader) -> DocumentLoader:
+    """
+    Registers a loader for its file extensions, replacing any previous loader for them.
+
+    Args:
+        loader (DocumentLoader): The loader.
+
+    Returns:
+        DocumentLoader: The loader, registered.
+    """
+    for extension in loader.extensions:
+        DOCUMENT_LOADERS[extension.lower()] = loader
+    return loader
+
+
+def get_loader(path: str) -> Optional[DocumentLoader]:
+    """
+    Returns the loader registered for a file's extension, or None if the format isn't supported.
+    """
+    return DOCUMENT_LOADERS.get(os.path.splitext(path)[1].lower())
+
+
+for _loader in (PdfLoader(), DocxLoader(), TextLoader(), MarkdownLoader(), HtmlLoader()):
+    register_loader(_loader)
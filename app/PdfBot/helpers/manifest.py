@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from .utils import atomic_open
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 digest of a file's contents, streaming it in blocks.
+
+    Args:
+        path (str): Path of the file to hash.
+        block_size (int): Number of bytes read per block.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path: str) -> Optional[dict]:
+    """
+    Loads the ingestion manifest, which records every indexed file's
+    size, mtime, content hash and chunk IDs.
+
+    Args:
+        path (str): Path of the manifest JSON file.
+
+    Returns:
+        Optional[dict]: The manifest, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str) -> None:
+    """
+    Atomically writes the ingestion manifest.
+
+    Args:
+        manifest (dict): The manifest to persist.
+        path (str): Path of the manifest JSON file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_open(path, "w") as f:
+        json.dump(manifest, f, indent=1)
+
+
+def new_manifest() -> dict:
+    """
+    Returns an empty ingestion manifest.
+    """
+    return {"format": MANIFEST_FORMAT_VERSION, "files": {}}
+
+
+def compute_index_version(manifest: Optional[dict]) -> Optional[str]:
+    """
+    Derives a version string for the document index from the content hashes of the indexed files.
+    Any added, changed or removed file yields a different version.
+
+    Args:
+        manifest (Optional[dict]): The ingestion manifest.
+
+    Returns:
+        Optional[str]: A hex digest, or None if there is no manifest.
+    """
+    if manifest is None:
+        return None
+    digest = hashlib.sha256()
+    for relative_path, entry in sorted(manifest["files"].items()):
+        digest.update(f"{relative_path}\x1f{entry['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_manifest_entry(full_path: str, chunk_ids: List[str], sha256: Optional[str] = None) -> dict:
+    """
+    Describes one indexed file for the manifest.
+
+    Args:
+        full_path (str): Path of the indexed file.
+        chunk_ids (List[str]): IDs of the chunks produced from the file.
+        sha256 (Optional[str]): Precomputed content hash, computed if omitted.
+
+    Returns:
+        dict: The manifest entry.
+    """
+    stat = os.stat(full_path)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256 or hash_file(full_path),
+        "chunk_ids": list(chunk_ids),
+    }
+
+
+def diff_against_manifest(manifest: dict, files: Dict[str, str]) -> dict:
+    """
+    Compares the files currently on disk with the manifest.
+
+    Files whose size and mtime are unchanged are trusted without hashing; the
+    others are hashed, so a touched-but-identical file is not re-indexed.
+
+    Args:
+        manifest (dict): The ingestion manifest.
+        files (Dict[str, str]): Relative path -> absolute path of every file on disk.
+
+    Returns:
+        dict: Relative paths grouped as "added", "changed", "removed", "touched"
+              (same content, new mtime) and "unchanged", plus the "hashes" computed.
+    """
+    indexed = manifest["files"]
+    changes = {"added": [], "changed": [], "removed": [], "touched": [], "unchanged": [], "hashes": {}}
+
+    for relative_path, full_path in sorted(files.items()):
+        entry = indexed.get(relative_path)
+        if entry is None:
+            changes["added"].append(relative_path)
+            continue
+
+        stat = os.stat(full_path)
+        if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+            changes["unchanged"].append(relative_path)
+            continue
+
+        sha256 = hash_file(full_path)
+        changes["hashes"][relative_path] = sha256
+        if sha256 == entry["sha256"]:
+            changes["touched"].append(relative_path)
+        else:
+            changes["changed"].append(relative_path)
+
+    changes["removed"] = sorted(set(indexed) - set(files))
+    return changes
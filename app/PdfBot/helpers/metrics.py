@@ -0,0 +1,230 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from ..constants import METRICS_SECONDS_BUCKETS, METRICS_TOKENS_BUCKETS, METRICS_TOKENS_PER_SECOND_BUCKETS, \
+    METRICS_DOCUMENTS_BUCKETS
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    A Prometheus metric family with an optional set of label names.
+    Updates are thread-safe, as stages are timed both on the event loop and in executor threads.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        """
+        Returns the metric's lines in the Prometheus text exposition format.
+        """
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count, e.g. cache lookups by result.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [
+            f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    """
+    Observations counted into cumulative buckets, with their sum and count.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count per bucket (the last one is +Inf), sum of observations
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bucket] += 1
+            total[0] += value
+
+    def get_count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+
+        lines = super().render()
+        for key, (counts, total) in sorted(series.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(float(total))}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of a worker process, rendered together for a Prometheus scrape.
+    Every worker keeps its own metrics, so each one should be scraped (or run a single worker).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float],
+                  label_names: Sequence[str] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets, label_names))
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+STAGE_SECONDS = metrics_registry.histogram(
+    "pdfbot_stage_seconds", "Time spent in each stage of answering a query.", METRICS_SECONDS_BUCKETS, ["stage"]
+)
+REQUEST_SECONDS = metrics_registry.histogram(
+    "pdfbot_request_seconds", "Time to answer a chat request, by endpoint and outcome.", METRICS_SECONDS_BUCKETS,
+    ["endpoint", "outcome"]
+)
+CACHE_LOOKUPS = metrics_registry.counter(
+    "pdfbot_cache_lookups_total", "Answer cache lookups, by result (exact_hit, near_hit or miss).", ["result"]
+)
+RETRIEVED_DOCUMENTS = metrics_registry.histogram(
+    "pdfbot_retrieved_documents", "Chunks per query, as retrieved and as packed into the prompt.",
+    METRICS_DOCUMENTS_BUCKETS, ["kind"]
+)
+PROMPT_TOKENS = metrics_registry.histogram(
+    "pdfbot_prompt_tokens", "Estimated tokens per prompt sent to the LLM.", METRICS_TOKENS_BUCKETS
+)
+TIME_TO_FIRST_TOKEN_SECONDS = metrics_registry.histogram(
+    "pdfbot_time_to_first_token_seconds", "Time from the start of a generation to its first token.",
+    METRICS_SECONDS_BUCKETS
+)
+GENERATION_TOKENS_PER_SECOND = metrics_registry.histogram(
+    "pdfbot_generation_tokens_per_second", "Generation speed reported by Ollama, by phase (prompt_eval or eval).",
+    METRICS_TOKENS_PER_SECOND_BUCKETS, ["phase"]
+)
+LLM_QUEUE_WAIT_SECONDS = metrics_registry.histogram(
+    "pdfbot_llm_queue_wait_seconds", "Time generations waited for a slot in the LLM scheduler.",
+    METRICS_SECONDS_BUCKETS
+)
+LLM_REJECTIONS = metrics_registry.counter(
+    "pdfbot_llm_rejections_total", "Generations turned away by the LLM scheduler, by reason (full or timeout).",
+    ["reason"]
+)
+EMBEDDED_CHUNKS = metrics_registry.counter(
+    "pdfbot_embedded_chunks_total", "Chunks embedded and written into the vector store."
+)
+LOADED_FILES = metrics_registry.counter(
+    "pdfbot_loaded_files_total", "Documents parsed for ingestion, by format and status (loaded or failed).",
+    ["format", "status"]
+)
+LOADED_BYTES = metrics_registry.counter(
+    "pdfbot_loaded_bytes_total", "Bytes of documents parsed for ingestion, by format.", ["format"]
+)
+LOADED_CHUNKS = metrics_registry.counter(
+    "pdfbot_loaded_chunks_total", "Chunks produced from parsed documents, by format.", ["format"]
+)
+LOADING_SECONDS = metrics_registry.counter(
+    "pdfbot_loading_seconds_total", "Worker time spent parsing and splitting documents, by format.", ["format"]
+)
+INGESTION_JOBS = metrics_registry.counter(
+    "pdfbot_ingestion_jobs_total", "Upload ingestion jobs, by status (done, failed or rejected).", ["status"]
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Records how long the block takes in `pdfbot_stage_seconds`, whether or not it raises.
+
+    Args:
+        stage (str): The stage label, e.g. "retrieval" or "generation".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def render_metrics() -> str:
+    """
+    Returns the process's metrics in the Prometheus text exposition format.
+    """
+    return metrics_registry.render()
@@ -0,0 +1,280 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Union
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from langchain_ollama import OllamaLLM
+from pydantic import Field, PrivateAttr
+
+from .metrics import GENERATION_TOKENS_PER_SECOND, TIME_TO_FIRST_TOKEN_SECONDS
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS_PER_MILLISECOND = 1_000_000
+
+# Failures meaning a node could not be reached (rather than the request being bad): retried on another node
+CONNECTION_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError,
+                     httpx.RemoteProtocolError)
+
+
+class OllamaBackend:
+    """
+    One Ollama node of the pool: its client and its load and health bookkeeping.
+    """
+
+    def __init__(self, base_url: str, llm: OllamaLLM):
+        self.base_url = base_url.rstrip("/")
+        self.llm = llm
+        self.in_flight = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def get_stats(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class OllamaPool(LLM):
+    """
+    LangChain LLM spreading generations over several Ollama nodes serving the same model.
+
+    Each request goes to the healthy node with the fewest requests in flight. A node
+    that cannot be reached is evicted (marked unhealthy) and the request is retried
+    on another node; for streams, only until the first token was received. While
+    async requests are being served, every node is probed periodically
+    (`GET /api/version`), so evicted nodes rejoin once they answer again. If every
+    node is evicted, all of them are tried rather than failing outright.
+
+    Every request carries the same model `options` and `keep_alive`, so a node keeps
+    the model loaded with the same settings and its prompt cache can reuse the
+    evaluated prefix shared by consecutive prompts. The prompt-evaluation and
+    generation timings Ollama reports for each request are kept in `get_timings()`:
+    a drop in prompt-eval tokens and time shows the prefix being reused.
+    """
+
+    base_urls: List[str]
+    model: str
+    options: Dict[str, Any] = Field(default_factory=dict)
+    keep_alive: Optional[Union[int, str]] = None
+    client_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    async_client_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    health_check_interval: float = 10.0
+    health_check_timeout: float = 2.0
+    timings_history: int = 100
+
+    _backends: List[OllamaBackend] = PrivateAttr(default_factory=list)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _health_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+    _timings: Deque[dict] = PrivateAttr(default=None)
+
+    def model_post_init(self, context: Any) -> None:
+        self._timings = deque(maxlen=self.timings_history)
+        self._backends = [
+            OllamaBackend(url, OllamaLLM(
+                model=self.model,
+                base_url=url,
+                keep_alive=self.keep_alive,
+                cache=False,  # The pool itself is what the LLM cache sees
+                client_kwargs=self.client_kwargs,
+                async_client_kwargs=self.async_client_kwargs
+            ))
+            for url in self.base_urls
+        ]
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-pool"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        # Nodes serve the same model, so cached generations are shared across them
+        return {"model": self.model, **self.options}
+
+    @property
+    def backends(self) -> List[OllamaBackend]:
+        return self._backends
+
+    def get_stats(self) -> List[dict]:
+        """
+        Returns the load and health of every node.
+        """
+        return [backend.get_stats() for backend in self._backends]
+
+    def get_timings(self) -> dict:
+        """
+        Returns the Ollama timings of the most recent requests, oldest first, and their
+        averages: prompt tokens evaluated and how long that took, tokens generated and
+        how long that took, and the time spent loading the model.
+        """
+        with self._lock:
+            recent = list(self._timings)
+        keys = ["prompt_eval_count", "prompt_eval_ms", "eval_count", "eval_ms", "load_ms", "total_ms"]
+        averages = {f"avg_{key}": sum(t[key] for t in recent) / len(recent) if recent else 0.0 for key in keys}
+        return {"requests": len(recent), **averages, "recent": recent}
+
+    def _record_timings(self, backend: OllamaBackend, info: Optional[dict]) -> None:
+        if not info or "eval_count" not in info:
+            return
+        timings = {
+            "base_url": backend.base_url,
+            "prompt_eval_count": info.get("prompt_eval_count") or 0,
+            "prompt_eval_ms": (info.get("prompt_eval_duration") or 0) / NANOSECONDS_PER_MILLISECOND,
+            "eval_count": info.get("eval_count") or 0,
+            "eval_ms": (info.get("eval_duration") or 0) / NANOSECONDS_PER_MILLISECOND,
+            "load_ms": (info.get("load_duration") or 0) / NANOSECONDS_PER_MILLISECOND,
+            "total_ms": (info.get("total_duration") or 0) / NANOSECONDS_PER_MILLISECOND,
+        }
+        with self._lock:
+            self._timings.append(timings)
+        for phase, count, milliseconds in [("prompt_eval", timings["prompt_eval_count"], timings["prompt_eval_ms"]),
+                                           ("eval", timings["eval_count"], timings["eval_ms"])]:
+            if count and milliseconds:
+                GENERATION_TOKENS_PER_SECOND.observe(count / milliseconds * 1000, phase=phase)
+        print(f"⏱️ Ollama {backend.base_url}: prompt eval {timings['prompt_eval_count']} tokens "
+              f"in {timings['prompt_eval_ms']:.0f} ms, eval {timings['eval_count']} tokens "
+              f"in {timings['eval_ms']:.0f} ms")
+
+    def _request_kwargs(self, stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Model options are sent as is (rather than mapped onto OllamaLLM fields), so any Ollama option can be set
+        options = {**self.options, **kwargs.pop("options", {})}
+        if stop is not None:
+            options["stop"] = stop
+        return {**kwargs, "options": options}
+
+    def _acquire_backend(self, tried: List[OllamaBackend]) -> Optional[OllamaBackend]:
+        with self._lock:
+            candidates = [backend for backend in self._backends if backend not in tried]
+            healthy = [backend for backend in candidates if backend.healthy]
+            if not candidates:
+                return None
+            backend = min(healthy or candidates, key=lambda b: (b.in_flight, b.requests))
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def _release_backend(self, backend: OllamaBackend) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+
+    def _evict(self, backend: OllamaBackend, error: BaseException) -> None:
+        with self._lock:
+            backend.failures += 1
+            backend.last_error = str(error)
+            was_healthy, backend.healthy = backend.healthy, False
+        if was_healthy:
+            print(f"⚠️ Ollama node {backend.base_url} is unreachable, evicting it: {error}")
+
+    def _no_backend_error(self, error: Optional[BaseException]) -> ConnectionError:
+        return ConnectionError(f"No Ollama node could be reached (last error: {error})")
+
+    async def check_health(self, client: Optional[httpx.AsyncClient] = None) -> None:
+        """
+        Probes every node once, evicting unreachable ones and re-admitting recovered ones.
+
+        Args:
+            client (Optional[httpx.AsyncClient]): HTTP client to probe with; a short-lived one by default.
+        """
+        if client is None:
+            async with httpx.AsyncClient(timeout=self.health_check_timeout) as client:
+                return await self.check_health(client)
+
+        async def probe(backend: OllamaBackend) -> None:
+            try:
+                response = await client.get(f"{backend.base_url}/api/version")
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self._evict(backend, e)
+                return
+            if not backend.healthy:
+                print(f"✅ Ollama node {backend.base_url} is reachable again.")
+                backend.healthy = True
+
+        await asyncio.gather(*(probe(backend) for backend in self._backends))
+
+    async def _health_check_loop(self) -> None:
+        async with httpx.AsyncClient(timeout=self.health_check_timeout) as client:
+            while True:
+                await asyncio.sleep(self.health_check_interval)
+                await self.check_health(client)
+
+    def _ensure_health_checks(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._health_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_check_loop())
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop=stop, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop=stop, **kwargs)])
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        request_kwargs = self._request_kwargs(stop, kwargs)
+        requested_at = time.perf_counter()
+        tried, error = [], None
+        while (backend := self._acquire_backend(tried)) is not None:
+            started = False
+            try:
+                for chunk in backend.llm._stream(prompt, **request_kwargs):
+                    if not started:
+                        TIME_TO_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - requested_at)
+                    started = True
+                    self._record_timings(backend, chunk.generation_info)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text)
+                    yield GenerationChunk(text=chunk.text)
+                return
+            except CONNECTION_ERRORS as e:
+                self._evict(backend, e)
+                if started:
+                    raise
+                tried.append(backend)
+                error = e
+            finally:
+                self._release_backend(backend)
+        raise self._no_backend_error(error)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        self._ensure_health_checks()
+        request_kwargs = self._request_kwargs(stop, kwargs)
+        requested_at = time.perf_counter()
+        tried, error = [], None
+        while (backend := self._acquire_backend(tried)) is not None:
+            started = False
+            try:
+                async for chunk in backend.llm._astream(prompt, **request_kwargs):
+                    if not started:
+                        TIME_TO_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - requested_at)
+                    started = True
+                    self._record_timings(backend, chunk.generation_info)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text)
+                    yield GenerationChunk(text=chunk.text)
+                return
+            except CONNECTION_ERRORS as e:
+                self._evict(backend, e)
+                if started:
+                    raise
+                tried.append(backend)
+                error = e
+            finally:
+                self._release_backend(backend)
+        raise self._no_backend_error(error)
@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class Readiness:
+    """
+    Tracks the components that must be warm before a worker should receive traffic,
+    e.g. the embedding model and the index snapshot's pages. The worker is ready once
+    every expected component is, and is not ready before any is expected; a component
+    whose warm-up failed keeps it unready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict[str, Any]] = {}
+
+    def expect(self, component: str) -> None:
+        with self._lock:
+            self._components[component] = {"status": "warming", "started_at": time.time(), "seconds": None,
+                                           "error": None}
+
+    def _finish(self, component: str, status: str, error: str = None) -> None:
+        with self._lock:
+            state = self._components.setdefault(component, {"started_at": time.time()})
+            state.update(status=status, seconds=round(time.time() - state["started_at"], 3), error=error)
+
+    def set_ready(self, component: str) -> None:
+        self._finish(component, "ready")
+
+    def set_failed(self, component: str, error: str) -> None:
+        self._finish(component, "failed", error)
+
+    @staticmethod
+    def _are_ready(components: Dict[str, Dict[str, Any]]) -> bool:
+        return bool(components) and all(state["status"] == "ready" for state in components.values())
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self._are_ready(self._components)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Returns whether the worker is ready, and the status of every expected component.
+        """
+        with self._lock:
+            components = {component: dict(state) for component, state in self._components.items()}
+        return {"ready": self._are_ready(components), "components": components}
+
+    def warm_up_in_background(self, component: str, warm_up: Callable[[], Any]) -> threading.Thread:
+        """
+        Runs a component's warm-up on a daemon thread and marks it ready (or failed) when done.
+
+        Args:
+            component (str): The component's name, e.g. "embedding_model".
+            warm_up (Callable[[], Any]): Loads the component.
+
+        Returns:
+            threading.Thread: The started warm-up thread.
+        """
+        self.expect(component)
+
+        def run() -> None:
+            try:
+                warm_up()
+                self.set_ready(component)
+            except Exception as e:
+                print(f"⚠️ Warm-up of {component} failed: {e}")
+                self.set_failed(component, str(e))
+
+        thread = threading.Thread(target=run, name=f"{component}-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
+readiness = Readiness()
@@ -0,0 +1,190 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from .executor import run_cpu_bound
+from .metrics import STAGE_SECONDS
+from .sparse import tokenize
+from ..constants import BM25_K1, BM25_B, RERANK_TOP_N, RERANK_BATCH_SIZE, RERANK_LATENCY_BUDGET_SECONDS, \
+    RERANK_CROSS_ENCODER_MODEL
+
+
+class Reranker(ABC):
+    """
+    Scores how relevant candidate chunks are to a query; higher is more relevant.
+    """
+
+    @abstractmethod
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """
+        Returns the relevance score of every text, in order.
+        """
+
+
+class LexicalReranker(Reranker):
+    """
+    Cheap scorer needing no model: BM25 over the candidate pool itself, so query terms
+    that are rare among the candidates weigh the most.
+
+    Scores are relative to the texts of a call, so they should be scored in one call.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        query_terms = set(tokenize(query))
+        term_counts = [Counter(tokenize(text)) for text in texts]
+        if not texts or not query_terms:
+            return [0.0] * len(texts)
+
+        lengths = [sum(counts.values()) for counts in term_counts]
+        avg_length = sum(lengths) / len(lengths) or 1
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for counts in term_counts if term in counts)
+            idf[term] = math.log(1 + (len(texts) - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for counts, length in zip(term_counts, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores.append(sum(
+                idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term in query_terms if term in counts
+            ))
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Small local cross-encoder (sentence-transformers) reading the query and a chunk together.
+    More accurate than lexical overlap, at a few milliseconds per chunk on CPU.
+    The model is only loaded on first use.
+    """
+
+    def __init__(self, model_name: str = RERANK_CROSS_ENCODER_MODEL, batch_size: int = RERANK_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get_model(self) -> Any:
+        """
+        Returns the cross-encoder, building it on first call.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        if not texts:
+            return []
+        scores = self.get_model().predict([(query, text) for text in texts], batch_size=self.batch_size)
+        return [float(score) for score in scores]
+
+
+def create_reranker(kind: str) -> Optional[Reranker]:
+    """
+    Creates the re-ranker selected in the constants.
+
+    Args:
+        kind (str): "lexical", "cross-encoder", or "none" to disable re-ranking.
+
+    Returns:
+        Optional[Reranker]: The re-ranker, or None if disabled.
+    """
+    if kind == "none":
+        return None
+    if kind == "lexical":
+        return LexicalReranker()
+    if kind == "cross-encoder":
+        return CrossEncoderReranker()
+    raise ValueError(f"Unknown reranker: {kind!r}")
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Re-ranks the candidates of another retriever and keeps the `top_n` best.
+
+    Candidates are scored in batches of `batch_size`, in retrieval order. Once
+    `latency_budget` seconds are spent, the remaining batches are not scored:
+    scored candidates come first (best first), followed by the unscored ones in
+    retrieval order. Scoring runs in the CPU executor on the async path. Timings
+    are added to the wrapped retriever's `get_stats()` under "rerank".
+    """
+
+    retriever: BaseRetriever
+    reranker: Any
+    top_n: int = RERANK_TOP_N
+    batch_size: int = RERANK_BATCH_SIZE
+    latency_budget: float = RERANK_LATENCY_BUDGET_SECONDS
+
+    _stats: Dict[str, float] = PrivateAttr(
+        default_factory=lambda: {"calls": 0, "over_budget": 0, "seconds_total": 0.0, "seconds_max": 0.0}
+    )
+    _stats_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def rerank(self, query: str, documents: List[Document]) -> List[Document]:
+        """
+        Scores the candidates within the latency budget and returns the `top_n` best.
+
+        Args:
+            query (str): The user's question.
+            documents (List[Document]): Candidates, in retrieval order.
+
+        Returns:
+            List[Document]: At most `top_n` documents, most relevant first.
+        """
+        started = time.perf_counter()
+        scores: List[float] = []
+        # The lexical scorer is relative to the pool, so it scores every candidate at once
+        batch_size = len(documents) if isinstance(self.reranker, LexicalReranker) else self.batch_size
+        for start in range(0, len(documents), max(1, batch_size)):
+            if scores and time.perf_counter() - started > self.latency_budget:
+                break
+            batch = documents[start:start + batch_size]
+            scores += self.reranker.score(query, [doc.page_content for doc in batch])
+
+        scored = sorted(range(len(scores)), key=lambda i: -scores[i])
+        ranked = [documents[i] for i in scored] + documents[len(scores):]
+
+        seconds = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["over_budget"] += len(scores) < len(documents)
+            self._stats["seconds_total"] += seconds
+            self._stats["seconds_max"] = max(self._stats["seconds_max"], seconds)
+        STAGE_SECONDS.observe(seconds, stage="rerank")
+        return ranked[:self.top_n]
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the wrapped retriever's stage timings plus the re-ranking ones.
+        """
+        stats = self.retriever.get_stats() if hasattr(self.retriever, "get_stats") else {}
+        with self._stats_lock:
+            rerank = dict(self._stats)
+        rerank["seconds_avg"] = rerank["seconds_total"] / rerank["calls"] if rerank["calls"] else 0.0
+        return {**stats, "rerank": rerank}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.rerank(query, documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return await run_cpu_bound(self.rerank, query, documents)
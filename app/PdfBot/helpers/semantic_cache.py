@@ -0,0 +1,247 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+from .cache_backend import CacheBackend, MemoryCacheBackend
+
+# Only sentence punctuation at the end is dropped: elsewhere, symbols tell questions apart ("C++" and "C")
+TRAILING_PUNCTUATION_PATTERN = re.compile(r"[\s.,;:!?]+$")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query for cache lookups: lowercases it, drops trailing punctuation
+    and collapses whitespace, so "What is Wakanda?" and "what is wakanda" match.
+
+    Args:
+        query (str): The sanitized user query.
+
+    Returns:
+        str: The normalized cache key.
+    """
+    query = TRAILING_PUNCTUATION_PATTERN.sub("", query.lower())
+    return WHITESPACE_PATTERN.sub(" ", query).strip()
+
+
+class SemanticCache:
+    """
+    Answer cache keyed on normalized queries, with a near-duplicate fallback.
+
+    Values live in a `CacheBackend` (in memory by default, or on disk to be shared
+    by worker processes and survive restarts), under keys prefixed with the current
+    `namespace`; switching namespaces invalidates every previous answer at once.
+
+    Exact lookups use the normalized query and go straight to the backend. On an
+    exact miss, the query is embedded and compared (cosine similarity) against the
+    embeddings of the queries cached by this process, held in one contiguous
+    float32 matrix; the best match above `threshold` is a near hit. Index entries
+    expire after `ttl` seconds and the least recently used one is evicted once
+    `maxsize` queries are indexed.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        maxsize: int,
+        ttl: float,
+        threshold: float,
+        backend: Optional[CacheBackend] = None,
+        namespace: str = ""
+    ):
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.backend = backend if backend is not None else MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+        self.namespace = namespace
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        with self._lock:
+            self._reset_index()
+
+    def _reset_index(self) -> None:
+        self._slots: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = [None] * self.maxsize
+        self._vectors: Optional[np.ndarray] = None
+        self._occupied = np.zeros(self.maxsize, dtype=bool)
+        self._expires_at = np.zeros(self.maxsize, dtype=np.float64)
+        self._last_used = np.zeros(self.maxsize, dtype=np.float64)
+        # Embeddings of recently missed queries, reused when their answer gets cached
+        self._pending_vectors = LRUCache(maxsize=self.maxsize)
+
+    def clear(self) -> None:
+        """
+        Drops every cached entry, including those stored in the backend (counters are kept).
+        """
+        self.backend.clear()
+        with self._lock:
+            self._reset_index()
+
+    def set_namespace(self, namespace: str) -> None:
+        """
+        Switches to another namespace, e.g. after the document index or the prompt changed.
+        Answers cached under other namespaces are no longer served; the backend's TTL
+        and LRU eviction reclaim them.
+
+        Args:
+            namespace (str): The new namespace.
+        """
+        with self._lock:
+            if namespace != self.namespace:
+                self.namespace = namespace
+                self._reset_index()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _backend_key(self, key: str) -> str:
+        return f"{self.namespace}\x1f{key}"
+
+    def _is_live(self, slot: int, now: float) -> bool:
+        return bool(self._occupied[slot]) and self._expires_at[slot] > now
+
+    def _free(self, slot: int) -> None:
+        key = self._keys[slot]
+        if key is not None:
+            del self._slots[key]
+        self._keys[slot] = None
+        self._occupied[slot] = False
+
+    def _embed(self, key: str) -> np.ndarray:
+        return self._normalize(self.embeddings.embed_query(key))
+
+    @staticmethod
+    def _normalize(vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get_exact(self, query: str) -> Optional[Any]:
+        """
+        Returns the cached value for the normalized query, without embedding it.
+        Counts a hit if found; a miss is only counted by `get_similar`.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Optional[Any]: The cached value, or None.
+        """
+        key = normalize_query(query)
+        value = self.backend.get(self._backend_key(key))
+        if value is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._last_used[slot] = now
+            self.stats["hits"] += 1
+        return value
+
+    def get_similar(self, query: str, vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        """
+        Embeds the query and returns the value of the most similar cached query,
+        if its cosine similarity reaches the threshold.
+
+        Args:
+            query (str): The user query.
+            vector (Optional[np.ndarray]): The query's embedding, if already computed (e.g. in a batch).
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        key = normalize_query(query)
+        vector = self._embed(key) if vector is None else self._normalize(vector)
+        now = time.monotonic()
+        best_key = None
+        with self._lock:
+            self._pending_vectors[key] = vector
+            if self._vectors is not None:
+                live = self._occupied & (self._expires_at > now)
+                if live.any():
+                    similarities = np.where(live, self._vectors @ vector, -np.inf)
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        best_key = self._keys[best]
+
+        value = self.backend.get(self._backend_key(best_key)) if best_key is not None else None
+        with self._lock:
+            if value is None:
+                # The backend may have evicted or expired the entry behind the index
+                slot = self._slots.get(best_key) if best_key is not None else None
+                if slot is not None:
+                    self._free(slot)
+                self.stats["misses"] += 1
+                return None
+
+            slot = self._slots.get(best_key)
+            if slot is not None:
+                self._last_used[slot] = now
+            self.stats["near_hits"] += 1
+            return value
+
+    def get(self, query: str) -> Optional[Any]:
+        """
+        Looks up an exact match first, then the most similar cached query above the threshold.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        value = self.get_exact(query)
+        if value is not None:
+            return value
+        return self.get_similar(query)
+
+    def set(self, query: str, value: Any, vector: Optional[np.ndarray] = None) -> None:
+        """
+        Caches a value under the normalized query and remembers the query's embedding.
+
+        Args:
+            query (str): The user query.
+            value (Any): The value to cache.
+            vector (Optional[np.ndarray]): The query's embedding, if already computed (e.g. in a batch).
+        """
+        key = normalize_query(query)
+        self.backend.set(self._backend_key(key), value)
+
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._expires_at[slot] = now + self.ttl
+                self._last_used[slot] = now
+                return
+
+            pending = self._pending_vectors.pop(key, None)
+
+        vector = pending if vector is None else self._normalize(vector)
+        if vector is None:
+            vector = self._embed(key)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+
+            slot = self._slots.get(key)
+            if slot is None:
+                # Reuse an empty or expired slot, otherwise evict the least recently used entry
+                free = np.flatnonzero(~(self._occupied & (self._expires_at > now)))
+                slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+                self._free(slot)
+
+            self._slots[key] = slot
+            self._keys[slot] = key
+            self._vectors[slot] = vector
+            self._occupied[slot] = True
+            self._expires_at[slot] = now + self.ttl
+            self._last_used[slot] = now
@@ -0,0 +1,381 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from .utils import atomic_open
+from ..constants.paths import INDEX_SNAPSHOTS_DEFAULT_DIRECTORY
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: snapshots are then only protected from deletion within a process
+    fcntl = None
+
+# Name of the live snapshot, and the version file written into every snapshot
+SNAPSHOT_CURRENT_FILE = "CURRENT"
+SNAPSHOT_INFO_FILE = "snapshot.json"
+# Every process serving (or publishing) a snapshot holds a shared lock on this file; it is deleted only
+# by a process that gets an exclusive lock, so no other worker is still using it
+SNAPSHOT_LOCK_FILE = "snapshot.lock"
+# Snapshots are assembled under this prefix, then renamed into place
+SNAPSHOT_PARTIAL_PREFIX = ".partial-"
+# Read size used to pull a new snapshot's files into the page cache
+SNAPSHOT_WARM_UP_BLOCK_BYTES = 1024 * 1024
+
+
+_held_lock = threading.Lock()
+_held_snapshots: Dict[str, IO] = {}
+
+
+def hold_snapshot(directory: str) -> bool:
+    """
+    Takes this process's shared lock on a snapshot, so other processes don't delete it while
+    it is served from here. Holding a snapshot twice is a no-op. The lock is released by
+    `release_snapshot`, or by the operating system when the process exits.
+
+    Returns:
+        bool: Whether the snapshot is held, False if it was deleted meanwhile.
+    """
+    key = os.path.abspath(directory)
+    with _held_lock:
+        if key in _held_snapshots:
+            return True
+        try:
+            handle = open(os.path.join(directory, SNAPSHOT_LOCK_FILE), "a")
+        except FileNotFoundError:
+            return False
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_SH)
+        if not os.path.isdir(directory):  # Removed by another process while we waited for the lock
+            handle.close()
+            return False
+        _held_snapshots[key] = handle
+        return True
+
+
+def release_snapshot(directory: str) -> None:
+    """
+    Releases this process's lock on a snapshot, if it holds one.
+    """
+    with _held_lock:
+        handle = _held_snapshots.pop(os.path.abspath(directory), None)
+    if handle is not None:
+        handle.close()
+
+
+def _remove_if_unused(directory: str) -> bool:
+    """
+    Deletes a snapshot unless this or another process holds it.
+    """
+    if os.path.abspath(directory) in _held_snapshots:
+        return False
+    try:
+        handle = open(os.path.join(directory, SNAPSHOT_LOCK_FILE), "a")
+    except FileNotFoundError:
+        return False
+    with handle:
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        shutil.rmtree(directory, ignore_errors=True)
+    return True
+
+
+def _link(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def publish_snapshot(
+    sources: Dict[str, str],
+    index_version: Optional[str],
+    snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY
+) -> str:
+    """
+    Freezes the given index directories (and files) into a new snapshot and makes it the current one.
+
+    Files are hard-linked rather than copied, so publishing is cheap. This is safe because
+    indexes are only ever updated by replacing whole files (see `atomic_open`): later
+    updates of the sources never reach into a published snapshot. The snapshot is
+    assembled under a hidden name and renamed into place, so it is complete or absent.
+
+    Args:
+        sources (Dict[str, str]): Index directory or file per name in the snapshot, e.g. {"sparse_index": ...}.
+        index_version (Optional[str]): Version of the document index the sources cover.
+        snapshots_directory (str): Where snapshots are kept.
+
+    Returns:
+        str: The directory of the new snapshot.
+    """
+    os.makedirs(snapshots_directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{index_version or 'unversioned'}-{uuid.uuid4().hex[:8]}"
+    partial_directory = os.path.join(snapshots_directory, SNAPSHOT_PARTIAL_PREFIX + name)
+    directory = os.path.join(snapshots_directory, name)
+    try:
+        os.makedirs(partial_directory)
+        hold_snapshot(partial_directory)
+        for subdirectory, source in sources.items():
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(partial_directory, subdirectory), copy_function=_link)
+            else:
+                _link(source, os.path.join(partial_directory, subdirectory))
+        with atomic_open(os.path.join(partial_directory, SNAPSHOT_INFO_FILE)) as f:
+            json.dump({"index_version": index_version, "created_at": time.time()}, f)
+        os.rename(partial_directory, directory)
+    finally:
+        release_snapshot(partial_directory)
+        shutil.rmtree(partial_directory, ignore_errors=True)
+
+    with atomic_open(os.path.join(snapshots_directory, SNAPSHOT_CURRENT_FILE)) as f:
+        f.write(name)
+    print(f"📸 Published index snapshot {name}")
+    return directory
+
+
+def get_current_snapshot(snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY) -> Optional[str]:
+    """
+    Returns the directory of the current snapshot, or None if none was published.
+    """
+    try:
+        with open(os.path.join(snapshots_directory, SNAPSHOT_CURRENT_FILE), encoding="utf-8") as f:
+            directory = os.path.join(snapshots_directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return directory if os.path.exists(os.path.join(directory, SNAPSHOT_INFO_FILE)) else None
+
+
+def read_snapshot_version(directory: str) -> Optional[str]:
+    """
+    Returns the version of the document index a snapshot covers.
+    """
+    with open(os.path.join(directory, SNAPSHOT_INFO_FILE), encoding="utf-8") as f:
+        return json.load(f)["index_version"]
+
+
+def remove_snapshots(keep: Iterable[str], snapshots_directory: str = INDEX_SNAPSHOTS_DEFAULT_DIRECTORY) -> List[str]:
+    """
+    Deletes every snapshot, including partially published ones, except those to keep
+    and those held by any process (see `hold_snapshot`), e.g. served by another worker.
+
+    Args:
+        keep (Iterable[str]): Directories of the snapshots to keep.
+        snapshots_directory (str): Where snapshots are kept.
+
+    Returns:
+        List[str]: The names of the deleted snapshots.
+    """
+    if not os.path.isdir(snapshots_directory):
+        return []
+    keep = {os.path.abspath(directory) for directory in keep}
+    removed = []
+    for name in sorted(os.listdir(snapshots_directory)):
+        directory = os.path.join(snapshots_directory, name)
+        if os.path.isdir(directory) and os.path.abspath(directory) not in keep and _remove_if_unused(directory):
+            removed.append(name)
+    if removed:
+        print(f"🧹 Removed {len(removed)} old index snapshot(s)")
+    return removed
+
+
+def warm_up_snapshot(directory: str) -> int:
+    """
+    Reads every file of a snapshot once, so its memory-mapped indexes are in the page
+    cache before the first query is served from it. Files of a snapshot that was retired
+    meanwhile are skipped.
+
+    Returns:
+        int: The number of bytes read.
+    """
+    total = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            try:
+                with open(os.path.join(root, file), "rb") as f:
+                    while block := f.read(SNAPSHOT_WARM_UP_BLOCK_BYTES):
+                        total += len(block)
+            except FileNotFoundError:
+                continue
+    return total
+
+
+class _Snapshot:
+    def __init__(self, retriever: BaseRetriever, directory: Optional[str], index_version: Optional[str]):
+        self.retriever = retriever
+        self.directory = directory
+        self.index_version = index_version
+        self.leases = 0
+
+
+class SnapshotRetriever(BaseRetriever):
+    """
+    Serves retrieval from the live index snapshot, which can be swapped for a new one under traffic.
+
+    Every retrieval leases the snapshot that is live when it starts and finishes on it,
+    even if a new snapshot is swapped in meanwhile. A retired snapshot's directory is
+    deleted once its last lease is returned, unless another process still holds it
+    (see `hold_snapshot`): the last one to let go of it deletes it. `rebuild`, if set, builds and swaps in a new
+    snapshot; `reindex()` runs it, one rebuild at a time, and `start_reindex()` does so in
+    a background thread.
+    """
+
+    retriever: BaseRetriever
+    directory: Optional[str] = None
+    index_version: Optional[str] = None
+    rebuild: Optional[Callable[..., dict]] = None
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _rebuild_lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _live: Any = PrivateAttr(default=None)
+    _retired: List[_Snapshot] = PrivateAttr(default_factory=list)
+    _swaps: int = PrivateAttr(default=0)
+    _reindex: Dict[str, Any] = PrivateAttr(default_factory=lambda: {
+        "running": False, "started_at": None, "finished_at": None, "report": None, "error": None
+    })
+
+    def model_post_init(self, context: Any) -> None:
+        self._live = _Snapshot(self.retriever, self.directory, self.index_version)
+        if self.directory:
+            hold_snapshot(self.directory)
+
+    @contextmanager
+    def lease(self) -> Iterator[BaseRetriever]:
+        """
+        Yields the live snapshot's retriever and keeps its files until the block ends.
+        """
+        with self._lock:
+            snapshot = self._live
+            snapshot.leases += 1
+        try:
+            yield snapshot.retriever
+        finally:
+            with self._lock:
+                snapshot.leases -= 1
+            self._collect()
+
+    def swap(self, retriever: BaseRetriever, directory: Optional[str], index_version: Optional[str]) -> None:
+        """
+        Atomically makes a new snapshot live. Retrievals already running finish on the
+        previous one, whose directory is deleted once they are done.
+
+        Args:
+            retriever (BaseRetriever): The retriever over the new snapshot.
+            directory (Optional[str]): The new snapshot's directory.
+            index_version (Optional[str]): The document index version it covers.
+        """
+        if directory:
+            hold_snapshot(directory)
+        with self._lock:
+            previous, self._live = self._live, _Snapshot(retriever, directory, index_version)
+            self.retriever, self.directory, self.index_version = retriever, directory, index_version
+            if previous.directory != directory:
+                self._retired.append(previous)
+            self._swaps += 1
+        print(f"🔀 Swapped in index snapshot {os.path.basename(directory or '')} (version {index_version})")
+        self._collect()
+
+    def _collect(self) -> None:
+        with self._lock:
+            unused = [snapshot for snapshot in self._retired if snapshot.leases == 0]
+            self._retired = [snapshot for snapshot in self._retired if snapshot.leases > 0]
+        for snapshot in unused:
+            if snapshot.directory:
+                release_snapshot(snapshot.directory)
+                if _remove_if_unused(snapshot.directory):
+                    print(f"🧹 Removed retired index snapshot {os.path.basename(snapshot.directory)}")
+
+    def reindex(self, **kwargs: Any) -> dict:
+        """
+        Runs `rebuild` now, waiting for a rebuild that is already running to finish first.
+
+        Args:
+            **kwargs (Any): Passed on to `rebuild`.
+
+        Returns:
+            dict: The rebuild's report.
+        """
+        if self.rebuild is None:
+            raise RuntimeError("This retriever has no rebuild function")
+        with self._rebuild_lock:
+            with self._lock:
+                self._reindex.update(running=True, started_at=time.time(), finished_at=None, report=None, error=None)
+            report, error = None, None
+            try:
+                report = self.rebuild(**kwargs)
+                return report
+            except Exception as e:
+                error = str(e)
+                print(f"❌ Index rebuild failed, still serving version {self.index_version}: {e}")
+                raise
+            finally:
+                with self._lock:
+                    self._reindex.update(running=False, finished_at=time.time(), report=report, error=error)
+
+    def start_reindex(self, **kwargs: Any) -> bool:
+        """
+        Starts `reindex()` in a background thread, unless a rebuild is already running.
+
+        Args:
+            **kwargs (Any): Passed on to `rebuild`.
+
+        Returns:
+            bool: Whether a rebuild was started.
+        """
+        if self.rebuild is None:
+            raise RuntimeError("This retriever has no rebuild function")
+        with self._lock:
+            if self._reindex["running"]:
+                return False
+            self._reindex["running"] = True
+
+        def run() -> None:
+            try:
+                self.reindex(**kwargs)
+            except Exception:
+                pass  # Already reported in the status
+
+        threading.Thread(target=run, name="index-rebuild", daemon=True).start()
+        return True
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """
+        Returns the live snapshot, the retired ones still in use and the state of the last rebuild.
+        """
+        with self._lock:
+            return {
+                "snapshot": os.path.basename(self._live.directory) if self._live.directory else None,
+                "index_version": self._live.index_version,
+                "in_flight": self._live.leases,
+                "retired_in_use": len(self._retired),
+                "swaps": self._swaps,
+                "reindex": dict(self._reindex),
+            }
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the live snapshot's retrieval stage timings (they restart with every swap).
+        """
+        retriever = self.retriever
+        return retriever.get_stats() if hasattr(retriever, "get_stats") else {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with self.lease() as retriever:
+            return retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with self.lease() as retriever:
+            return await retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
@@ -0,0 +1,411 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .chunk_store import ChunkStore, CHUNK_IDS_FILE, CHUNK_METADATA_FILE, CHUNK_TEXTS_FILE, CHUNK_OFFSETS_FILE
+from .utils import atomic_open, atomic_directory
+from ..constants import BM25_K1, BM25_B, BM25_EPSILON
+
+SPARSE_VOCAB_FILE = "vocab.json"
+SPARSE_PARAMS_FILE = "params.json"
+SPARSE_TERM_OFFSETS_FILE = "term_offsets.npy"
+SPARSE_POSTING_DOCS_FILE = "posting_docs.npy"
+SPARSE_POSTING_FREQS_FILE = "posting_freqs.npy"
+SPARSE_DOC_LENGTHS_FILE = "doc_lengths.npy"
+SPARSE_IDF_FILE = "idf.npy"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercases text and splits it into word tokens for BM25 scoring.
+
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        List[str]: Word tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SparseIndex:
+    """
+    BM25 (Okapi) index stored as compressed-sparse-row postings.
+
+    Postings for term `t` live in `posting_docs[term_offsets[t]:term_offsets[t + 1]]`
+    with matching term frequencies in `posting_freqs`. Document rows match the rows
+    of the `ChunkStore` the index was built from.
+    """
+
+    def __init__(
+        self,
+        vocab: List[str],
+        term_offsets: np.ndarray,
+        posting_docs: np.ndarray,
+        posting_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        idf: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        epsilon: float = BM25_EPSILON,
+    ):
+        self.vocab = vocab
+        self.term_index: Dict[str, int] = {term: i for i, term in enumerate(vocab)}
+        self.term_offsets = term_offsets
+        self.posting_docs = posting_docs
+        self.posting_freqs = posting_freqs
+        self.doc_lengths = doc_lengths
+        self.idf = idf
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.avgdl = float(np.mean(doc_lengths)) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B,
+              epsilon: float = BM25_EPSILON) -> "SparseIndex":
+        """
+        Tokenizes texts and builds BM25 postings, document lengths and IDF values.
+
+        Args:
+            texts (Iterable[str]): Chunk texts, one per document row.
+            k1 (float): BM25 term-frequency saturation parameter.
+            b (float): BM25 length-normalization parameter.
+            epsilon (float): Floor for negative IDF values, as a fraction of the mean IDF.
+
+        Returns:
+            SparseIndex: The built index.
+        """
+        empty = cls([], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32),
+                    np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32), k1=k1, b=b, epsilon=epsilon)
+        return empty.update([], texts)
+
+    @classmethod
+    def from_postings(
+        cls,
+        vocab: List[str],
+        term_ids: np.ndarray,
+        doc_rows: np.ndarray,
+        freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        epsilon: float = BM25_EPSILON,
+    ) -> "SparseIndex":
+        """
+        Builds an index from unordered (term, document, frequency) postings.
+        Terms left without any posting are dropped from the vocabulary.
+
+        Args:
+            vocab (List[str]): Terms addressed by `term_ids`.
+            term_ids (np.ndarray): Term ID of each posting.
+            doc_rows (np.ndarray): Document row of each posting.
+            freqs (np.ndarray): Term frequency of each posting.
+            doc_lengths (np.ndarray): Token count of every document row.
+            k1 (float): BM25 term-frequency saturation parameter.
+            b (float): BM25 length-normalization parameter.
+            epsilon (float): Floor for negative IDF values, as a fraction of the mean IDF.
+
+        Returns:
+            SparseIndex: The built index.
+        """
+        doc_frequencies = np.bincount(term_ids, minlength=len(vocab)).astype(np.int64)
+        used = np.flatnonzero(doc_frequencies)
+        term_remap = np.full(len(vocab), -1, dtype=np.int64)
+        term_remap[used] = np.arange(len(used))
+        term_ids = term_remap[term_ids]
+        doc_frequencies = doc_frequencies[used]
+
+        order = np.lexsort((doc_rows, term_ids))
+        term_offsets = np.zeros(len(used) + 1, dtype=np.int64)
+        term_offsets[1:] = np.cumsum(doc_frequencies)
+
+        # Same IDF definition as rank_bm25's BM25Okapi, negative values floored at epsilon * mean IDF
+        n_docs = len(doc_lengths)
+        idf = (np.log(n_docs - doc_frequencies + 0.5) - np.log(doc_frequencies + 0.5)).astype(np.float32)
+        if len(idf):
+            idf[idf < 0] = epsilon * float(np.mean(idf))
+
+        return cls(
+            [vocab[term_id] for term_id in used],
+            term_offsets,
+            np.asarray(doc_rows, dtype=np.int32)[order],
+            np.asarray(freqs, dtype=np.float32)[order],
+            np.asarray(doc_lengths, dtype=np.float32),
+            idf,
+            k1=k1,
+            b=b,
+            epsilon=epsilon,
+        )
+
+    def update(self, removed_rows: Iterable[int], texts: Iterable[str]) -> "SparseIndex":
+        """
+        Returns a new index with some document rows removed and new documents appended.
+
+        Only the new texts are tokenized; existing postings are filtered and renumbered
+        with vectorized array operations, so the cost tracks the size of the change.
+        Remaining rows keep their relative order, followed by the new rows.
+
+        Args:
+            removed_rows (Iterable[int]): Rows to drop from the index.
+            texts (Iterable[str]): Texts of the documents to append.
+
+        Returns:
+            SparseIndex: The updated index.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.fromiter(removed_rows, dtype=np.int64)] = False
+        new_rows = np.cumsum(keep) - 1
+
+        # Existing postings, minus the removed rows, renumbered to the compacted row order
+        term_ids = np.repeat(np.arange(len(self.vocab), dtype=np.int64), np.diff(self.term_offsets))
+        kept_postings = keep[self.posting_docs]
+        term_ids = [term_ids[kept_postings]]
+        doc_rows = [new_rows[self.posting_docs[kept_postings]]]
+        freqs = [np.asarray(self.posting_freqs)[kept_postings]]
+        doc_lengths = [np.asarray(self.doc_lengths)[keep]]
+
+        # Postings for the appended documents
+        vocab = list(self.vocab)
+        term_index = dict(self.term_index)
+        added_terms, added_rows, added_freqs, added_lengths = [], [], [], []
+        for row, text in enumerate(texts, start=int(keep.sum())):
+            tokens = tokenize(text)
+            added_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                if term not in term_index:
+                    term_index[term] = len(vocab)
+                    vocab.append(term)
+                added_terms.append(term_index[term])
+                added_rows.append(row)
+                added_freqs.append(freq)
+
+        term_ids.append(np.asarray(added_terms, dtype=np.int64))
+        doc_rows.append(np.asarray(added_rows, dtype=np.int64))
+        freqs.append(np.asarray(added_freqs, dtype=np.float32))
+        doc_lengths.append(np.asarray(added_lengths, dtype=np.float32))
+
+        return SparseIndex.from_postings(
+            vocab,
+            np.concatenate(term_ids),
+            np.concatenate(doc_rows),
+            np.concatenate(freqs),
+            np.concatenate(doc_lengths),
+            k1=self.k1,
+            b=self.b,
+            epsilon=self.epsilon,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "SparseIndex":
+        """
+        Loads a sparse index from disk, memory-mapping all posting arrays.
+
+        Args:
+            directory (str): Directory the index was saved to.
+
+        Returns:
+            SparseIndex: The loaded index.
+        """
+        with open(os.path.join(directory, SPARSE_VOCAB_FILE), encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(directory, SPARSE_PARAMS_FILE), encoding="utf-8") as f:
+            params = json.load(f)
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        return cls(
+            vocab,
+            load_array(SPARSE_TERM_OFFSETS_FILE),
+            load_array(SPARSE_POSTING_DOCS_FILE),
+            load_array(SPARSE_POSTING_FREQS_FILE),
+            load_array(SPARSE_DOC_LENGTHS_FILE),
+            load_array(SPARSE_IDF_FILE),
+            k1=params["k1"],
+            b=params["b"],
+            epsilon=params.get("epsilon", BM25_EPSILON),
+        )
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the index arrays and vocabulary to a directory.
+        Files are replaced atomically, so readers that memory-mapped a previous
+        version keep a consistent view.
+
+        Args:
+            directory (str): Target directory (created if missing).
+        """
+        os.makedirs(directory, exist_ok=True)
+        with atomic_open(os.path.join(directory, SPARSE_VOCAB_FILE), "w") as f:
+            json.dump(self.vocab, f)
+        with atomic_open(os.path.join(directory, SPARSE_PARAMS_FILE), "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "epsilon": self.epsilon, "num_documents": len(self)}, f)
+
+        arrays = {
+            SPARSE_TERM_OFFSETS_FILE: self.term_offsets,
+            SPARSE_POSTING_DOCS_FILE: self.posting_docs,
+            SPARSE_POSTING_FREQS_FILE: self.posting_freqs,
+            SPARSE_DOC_LENGTHS_FILE: self.doc_lengths,
+            SPARSE_IDF_FILE: self.idf,
+        }
+        for name, array in arrays.items():
+            with atomic_open(os.path.join(directory, name), "wb") as f:
+                np.save(f, np.asarray(array))
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """
+        Computes the BM25 score of every document row for a query.
+
+        Args:
+            query (str): The query text.
+
+        Returns:
+            np.ndarray: A float32 array with one score per document row.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not len(self) or not self.avgdl:
+            return scores
+
+        for term in tokenize(query):
+            term_id = self.term_index.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.posting_docs[start:end]
+            freqs = self.posting_freqs[start:end]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avgdl)
+            scores[docs] += self.idf[term_id] * freqs * (self.k1 + 1) / (freqs + norm)
+
+        return scores
+
+    def search(self, query: str, k: int) -> List[int]:
+        """
+        Returns the rows of the top-k scoring documents, best first.
+        Documents sharing no terms with the query are never returned.
+
+        Args:
+            query (str): The query text.
+            k (int): Maximum number of rows to return.
+
+        Returns:
+            List[int]: Document rows sorted by descending score.
+        """
+        scores = self.get_scores(query)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return [int(row) for row in candidates[np.argsort(-scores[candidates], kind="stable")]]
+
+
+class SparseRetriever(BaseRetriever):
+    """
+    LangChain retriever over a persisted `SparseIndex` and its `ChunkStore`.
+    """
+
+    index: SparseIndex
+    chunk_store: ChunkStore
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [self.chunk_store.get_document(row) for row in self.index.search(query, self.k)]
+
+
+def is_sparse_index_valid(directory: str) -> bool:
+    """
+    Checks whether a complete sparse index and chunk store exist in a directory.
+
+    Args:
+        directory (str): Directory to check.
+
+    Returns:
+        bool: True if every index file is present, else False.
+    """
+    required = [
+        SPARSE_VOCAB_FILE, SPARSE_PARAMS_FILE, SPARSE_TERM_OFFSETS_FILE, SPARSE_POSTING_DOCS_FILE,
+        SPARSE_POSTING_FREQS_FILE, SPARSE_DOC_LENGTHS_FILE, SPARSE_IDF_FILE,
+        CHUNK_IDS_FILE, CHUNK_METADATA_FILE, CHUNK_TEXTS_FILE, CHUNK_OFFSETS_FILE,
+    ]
+    return all(os.path.exists(os.path.join(directory, name)) for name in required)
+
+
+def build_sparse_index(documents: Iterable[Document], directory: str) -> SparseRetriever:
+    """
+    Builds and persists a BM25 index plus chunk store for the given chunks.
+
+    Args:
+        documents (Iterable[Document]): Chunked documents carrying `chunk_id` metadata.
+        directory (str): Where to persist the index.
+
+    Returns:
+        SparseRetriever: A retriever over the freshly built index.
+    """
+    chunk_store = ChunkStore.from_documents(documents)
+    index = SparseIndex.build(chunk_store.get_text(i) for i in range(len(chunk_store)))
+
+    with atomic_directory(directory) as staging_directory:
+        chunk_store.save(staging_directory)
+        index.save(staging_directory)
+    print(f"🔤 Sparse index with {len(chunk_store)} chunks saved at: {directory}")
+
+    return load_sparse_index(directory)
+
+
+def update_sparse_index(directory: str, removed_ids: Iterable[str], documents: Iterable[Document]) -> SparseRetriever:
+    """
+    Removes chunks from and appends chunks to a persisted sparse index.
+    Only the appended chunks are tokenized.
+
+    Chunks whose ID is already indexed replace their existing rows, so replaying an
+    update (e.g. after a crash before the manifest was saved) doesn't duplicate them.
+    The chunk store and the index are swapped in together (see `atomic_directory`).
+
+    Args:
+        directory (str): Directory of the persisted index.
+        removed_ids (Iterable[str]): Chunk IDs to remove; unknown IDs are ignored.
+        documents (Iterable[Document]): New chunks carrying `chunk_id` metadata.
+
+    Returns:
+        SparseRetriever: A retriever over the updated index.
+    """
+    documents = list({doc.metadata["chunk_id"]: doc for doc in documents}.values())
+    chunk_store = ChunkStore.load(directory)
+    index = SparseIndex.load(directory)
+
+    removed = set(removed_ids) | {doc.metadata["chunk_id"] for doc in documents}
+    removed_rows = [row for row, chunk_id in enumerate(chunk_store.ids) if chunk_id in removed]
+
+    new_store = chunk_store.update(removed_rows, documents)
+    new_index = index.update(removed_rows, (doc.page_content for doc in documents))
+
+    with atomic_directory(directory) as staging_directory:
+        new_store.save(staging_directory)
+        new_index.save(staging_directory)
+    print(f"🔤 Sparse index updated: -{len(removed_rows)} / +{len(documents)} chunks ({len(new_store)} total)")
+
+    return load_sparse_index(directory)
+
+
+def load_sparse_index(directory: str) -> SparseRetriever:
+    """
+    Loads a persisted BM25 index and chunk store as a retriever.
+
+    Args:
+        directory (str): Directory the index was saved to.
+
+    Returns:
+        SparseRetriever: A retriever over the memory-mapped index.
+    """
+    return SparseRetriever(index=SparseIndex.load(directory), chunk_store=ChunkStore.load(directory))
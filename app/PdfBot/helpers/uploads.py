@@ -0,0 +1,250 @@
+import asyncio
+import filecmp
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import BinaryIO, Callable, Deque, Dict, List, Optional
+
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+
+from .loaders import DOCUMENT_LOADERS, get_loader
+from .metrics import INGESTION_JOBS
+from .utils import sanitize_text
+from ..constants import INGESTION_QUEUE_MAX_JOBS, UPLOAD_MAX_BYTES, INGESTION_JOBS_KEPT
+from ..constants.paths import DOCUMENTS_DEFAULT_DIRECTORY, UPLOADS_DEFAULT_DIRECTORY, \
+    UPLOADS_STAGING_DEFAULT_DIRECTORY
+
+# Block size used to copy uploads into the staging directory
+UPLOAD_COPY_BLOCK_BYTES = 1024 * 1024
+# Seconds a client is asked to wait before uploading again when the queue is full
+UPLOAD_RETRY_AFTER_SECONDS = 30
+
+
+class IngestionQueueFullError(Exception):
+    """
+    Raised when an upload is turned away because too many ingestion jobs are waiting.
+    """
+
+
+def get_upload_name(filename: Optional[str]) -> str:
+    """
+    Returns the name an uploaded document is stored under, without any directory part.
+
+    Raises:
+        ValueError: If the file's format has no registered loader, or it is a hidden or lock file.
+    """
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if get_loader(name) is None or name.startswith((".", "~$")):
+        extensions = ", ".join(sorted(DOCUMENT_LOADERS))
+        raise ValueError(f"Only {extensions} files can be uploaded, "
+                         f"got {sanitize_text(name or 'a file without a name')!r}.")
+    return name
+
+
+def stage_upload(source: BinaryIO, path: str, max_bytes: int = UPLOAD_MAX_BYTES) -> int:
+    """
+    Copies an uploaded document into the staging directory, checking its header (for formats
+    with a signature, e.g. PDF and DOCX) and size.
+
+    Returns:
+        int: The number of bytes written.
+
+    Raises:
+        ValueError: If the file doesn't match its format or is larger than `max_bytes`.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    loader = get_loader(path)
+    written = 0
+    with open(path, "wb") as f:
+        while block := source.read(UPLOAD_COPY_BLOCK_BYTES):
+            if written == 0 and loader and loader.signature and not block.startswith(loader.signature):
+                raise ValueError(f"{os.path.basename(path)!r} is not a {loader.format.upper()} file.")
+            written += len(block)
+            if written > max_bytes:
+                raise ValueError(f"{os.path.basename(path)!r} is larger than {max_bytes // (1024 * 1024)} MB.")
+            f.write(block)
+    if written == 0:
+        raise ValueError(f"{os.path.basename(path)!r} is empty.")
+    return written
+
+
+class IngestionQueue:
+    """
+    Ingests uploaded documents off the request path, in a background thread.
+
+    Uploads are staged and queued as jobs. The worker takes all queued jobs at once, moves
+    their files into the documents folder and runs `ingest` once: an incremental sync
+    that parses new documents in the ingestion process pool and swaps in a new index snapshot,
+    so chat keeps being served meanwhile and a burst of uploads costs a single sync. At
+    most `max_queued` jobs wait; beyond that, uploads are turned away (backpressure).
+    An upload never replaces a different document of the same name: it is stored under a
+    name suffixed with its job id instead, reported in the job's `renamed`.
+    Job statuses are kept per worker process.
+    """
+
+    def __init__(
+        self,
+        ingest: Callable[[], dict],
+        max_queued: int = INGESTION_QUEUE_MAX_JOBS,
+        max_jobs_kept: int = INGESTION_JOBS_KEPT,
+        staging_directory: str = UPLOADS_STAGING_DEFAULT_DIRECTORY,
+        uploads_directory: str = UPLOADS_DEFAULT_DIRECTORY,
+        documents_directory: str = DOCUMENTS_DEFAULT_DIRECTORY
+    ):
+        self.ingest = ingest
+        self.max_queued = max_queued
+        self.max_jobs_kept = max_jobs_kept
+        self.staging_directory = staging_directory
+        self.uploads_directory = uploads_directory
+        self.documents_directory = documents_directory
+        self._lock = threading.Condition()
+        self._queue: Deque[str] = deque()
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._worker: Optional[threading.Thread] = None
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self._queue) >= self.max_queued
+
+    def submit(self, job_id: str, files: List[str]) -> dict:
+        """
+        Queues the files staged under `staging_directory/job_id` for ingestion.
+
+        Returns:
+            dict: The job's status.
+
+        Raises:
+            IngestionQueueFullError: If `max_queued` jobs are already waiting.
+        """
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                INGESTION_JOBS.inc(status="rejected")
+                raise IngestionQueueFullError(f"{len(self._queue)} ingestion jobs are already waiting.")
+            job = {
+                "id": job_id, "status": "queued", "files": files, "submitted_at": time.time(),
+                "started_at": None, "finished_at": None, "failed": [], "renamed": {}, "error": None,
+            }
+            self._jobs[job_id] = job
+            self._queue.append(job_id)
+            self._lock.notify()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="ingestion-worker", daemon=True)
+                self._worker.start()
+            return dict(job)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "position": self._queue.index(job_id) + 1 if job["status"] == "queued" else None}
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                "running": sum(job["status"] == "running" for job in self._jobs.values()),
+                "max_queued": self.max_queued,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._lock.wait()
+                jobs = [self._jobs[job_id] for job_id in self._queue]
+                self._queue.clear()
+                for job in jobs:
+                    job.update(status="running", started_at=time.time())
+            self._process(jobs)
+
+    def _get_stored_name(self, name: str, path: str, job_id: str) -> str:
+        """
+        Returns the name a staged upload is stored under: its own, unless a different
+        document already has it.
+        """
+        existing = os.path.join(self.uploads_directory, name)
+        if not os.path.exists(existing) or filecmp.cmp(existing, path, shallow=False):
+            return name
+        stem, extension = os.path.splitext(name)
+        return f"{stem}-{job_id[:8]}{extension}"
+
+    def _process(self, jobs: List[dict]) -> None:
+        report, error = None, None
+        stored_names = {job["id"]: {name: name for name in job["files"]} for job in jobs}
+        try:
+            os.makedirs(self.uploads_directory, exist_ok=True)
+            for job in jobs:
+                for name in job["files"]:
+                    path = os.path.join(self.staging_directory, job["id"], name)
+                    stored_names[job["id"]][name] = stored_name = self._get_stored_name(name, path, job["id"])
+                    shutil.move(path, os.path.join(self.uploads_directory, stored_name))
+                shutil.rmtree(os.path.join(self.staging_directory, job["id"]), ignore_errors=True)
+            report = self.ingest()
+        except Exception as e:
+            error = sanitize_text(str(e))
+            print(f"❌ Ingestion of {len(jobs)} upload job(s) failed: {e}")
+
+        failed = set(report["failed"]) if report else set()
+        with self._lock:
+            for job in jobs:
+                stored = stored_names[job["id"]]
+                job["renamed"] = {name: stored_name for name, stored_name in stored.items() if stored_name != name}
+                job["failed"] = [
+                    name for name in job["files"] if os.path.relpath(
+                        os.path.join(self.uploads_directory, stored[name]), self.documents_directory
+                    ) in failed
+                ]
+                job.update(status="failed" if error or job["failed"] else "done", finished_at=time.time(), error=error)
+                INGESTION_JOBS.inc(status=job["status"])
+            finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+            for job_id in finished[:max(0, len(finished) - self.max_jobs_kept)]:
+                del self._jobs[job_id]
+        print(f"📥 Ingested {sum(len(job['files']) for job in jobs)} uploaded file(s) from {len(jobs)} job(s)")
+
+
+async def handle_upload(files: List[UploadFile], queue: IngestionQueue) -> JSONResponse:
+    """
+    Stages uploaded documents and queues them for ingestion.
+
+    Args:
+        files (List[UploadFile]): The uploaded files.
+        queue (IngestionQueue): The ingestion queue.
+
+    Returns:
+        JSONResponse: The queued job (202), a 400 error for invalid files or files sharing
+                      a name, or a 503 error when the queue is full.
+    """
+    busy = JSONResponse(
+        content={"error": "⚠️ Too many uploads are waiting to be ingested. Please try again later.", "busy": True},
+        status_code=503,
+        headers={"Retry-After": str(UPLOAD_RETRY_AFTER_SECONDS)}
+    )
+    if queue.is_full():
+        INGESTION_JOBS.inc(status="rejected")
+        return busy
+
+    job_id = uuid.uuid4().hex
+    job_directory = os.path.join(queue.staging_directory, job_id)
+    try:
+        names = []
+        for upload in files:
+            name = get_upload_name(upload.filename)
+            if name in names:
+                raise ValueError(f"{sanitize_text(name)!r} is uploaded more than once. Upload each file once.")
+            await asyncio.to_thread(stage_upload, upload.file, os.path.join(job_directory, name))
+            names.append(name)
+        job = queue.submit(job_id, names)
+    except ValueError as e:
+        shutil.rmtree(job_directory, ignore_errors=True)
+        return JSONResponse(content={"error": f"⚠️ {e}"}, status_code=400)
+    except IngestionQueueFullError:
+        shutil.rmtree(job_directory, ignore_errors=True)
+        return busy
+
+    print(f"📤 Queued ingestion job {job_id} ({len(names)} file(s))")
+    return JSONResponse(content=job, status_code=202)
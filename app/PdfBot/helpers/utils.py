@@ -1,10 +1,18 @@
 import html
+import os
 import re
+import shutil
 from collections import defaultdict
-from typing import List, Any
+from contextlib import contextmanager
+from typing import List, Any, IO, Iterator
 
 from ..constants import MAX_INPUT_LENGTH, NUMBER_OF_SOURCES_DISPLAY
 
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: file locks are then no-ops
+    fcntl = None
+
 
 def sanitize_text(text: str) -> str:
     """
@@ -61,10 +69,11 @@ def validate_and_sanitize_query(raw_query: str) -> str:
 
 def build_source_strings(source_documents: List[Any]) -> List[str]:
     """
-    Builds a compact list of source strings grouped by document and page number.
+    Builds a compact list of source strings grouped by document and page number, or by
+    section number for documents without pages (TXT, Markdown, HTML).
 
     For example:
-        ["Source A (pages 3, 5, 9)", "Source B (pages 1, 4)"]
+        ["Source A (pages 3, 5, 9)", "Source B (pages 1, 4)", "notes.md (sections 0, 2)"]
 
     Args:
         source_documents (List[Any]): List of LangChain Document objects with metadata.
@@ -72,23 +81,101 @@ def build_source_strings(source_documents: List[Any]) -> List[str]:
     Returns:
         List[str]: A list of formatted source strings (max NUMBER_OF_SOURCES_DISPLAY).
     """
-    source_to_pages = defaultdict(set)
+    source_to_locators = defaultdict(lambda: {"pages": set(), "sections": set()})
 
     for doc in source_documents:
         source = doc.metadata.get("source", "unknown")
-        page = doc.metadata.get("page")
+        page, section = doc.metadata.get("page"), doc.metadata.get("section")
+        locators = source_to_locators[source]
         if page is not None:
-            source_to_pages[source].add(page)
+            locators["pages"].add(page)
+        elif section is not None:
+            locators["sections"].add(section)
 
     # Sort by the source name and limit
-    top_sources = list(source_to_pages.items())[:NUMBER_OF_SOURCES_DISPLAY]
+    top_sources = list(source_to_locators.items())[:NUMBER_OF_SOURCES_DISPLAY]
 
     result = []
-    for source, pages in top_sources:
-        if pages:
-            page_list = sorted(pages)
-            result.append(f"{source} (pages {', '.join(map(str, page_list))})")
-        else:
-            result.append(source)
+    for source, locators in top_sources:
+        parts = [f"{kind} {', '.join(map(str, sorted(numbers)))}" for kind, numbers in locators.items() if numbers]
+        result.append(f"{source} ({'; '.join(parts)})" if parts else source)
 
     return result
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w") -> Iterator[IO]:
+    """
+    Opens a temporary file next to `path` and moves it into place on success.
+
+    Replacing instead of truncating keeps existing memory maps of the old file valid
+    and means readers never observe a half-written file.
+
+    Args:
+        path (str): Final file path.
+        mode (str): "w" for UTF-8 text or "wb" for binary.
+
+    Yields:
+        IO: The open temporary file.
+    """
+    tmp_path = f"{path}.tmp"
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Holds an exclusive lock on a file (created if missing), shared with other processes,
+    e.g. so a single worker at a time writes files they share.
+
+    Args:
+        path (str): The lock file.
+        blocking (bool): Whether to wait for another process to release the lock.
+
+    Yields:
+        bool: Whether the lock is held; only False when not `blocking` and another process holds it.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+@contextmanager
+def atomic_directory(path: str) -> Iterator[str]:
+    """
+    Yields a temporary directory next to `path` and swaps it in for `path` on success,
+    so files that must agree with each other (e.g. an index and its chunk store) are
+    replaced together. A crash mid-swap leaves `path` missing, never mixed.
+
+    Args:
+        path (str): Final directory path.
+
+    Yields:
+        str: The temporary directory to write into.
+    """
+    path = path.rstrip(os.sep)
+    tmp_path, old_path = f"{path}.tmp", f"{path}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        yield tmp_path
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(old_path, ignore_errors=True)
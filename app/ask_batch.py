@@ -0,0 +1,74 @@
+"""
+Answers a file of questions through the running server's batch API (`POST /batch`)
+and writes one JSON result per line as answers arrive.
+
+The input holds one question per line, or one JSON object with a "query" field
+per line (.jsonl). Results carry the question's `index` (line order, blank lines
+skipped), the `query`, the `answer`, its `sources`, whether it was `cached` and an
+`error`, if any. Files larger than `BATCH_MAX_QUERIES` questions are sent in several batches.
+
+Usage (from the repository root):
+    python -m app.ask_batch questions.txt -o answers.jsonl --url http://localhost:8000
+"""
+import argparse
+import json
+import sys
+from typing import Iterator, List, TextIO
+
+import httpx
+
+from .PdfBot.constants import BATCH_MAX_QUERIES
+
+
+def read_queries(f: TextIO) -> List[str]:
+    """
+    Reads the questions of a text or JSON Lines file, skipping blank lines.
+    """
+    queries = []
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        queries.append(json.loads(line)["query"] if line.startswith("{") else line)
+    return queries
+
+
+def ask_batch(client: httpx.Client, url: str, queries: List[str], offset: int = 0) -> Iterator[dict]:
+    """
+    Sends one batch and yields its results as the server streams them, indexed from `offset`.
+    """
+    with client.stream("POST", f"{url.rstrip('/')}/batch", json={"queries": queries}) as response:
+        if response.status_code != 200:
+            response.read()
+            raise SystemExit(f"❌ Batch rejected ({response.status_code}): {response.text}")
+        for line in response.iter_lines():
+            if line:
+                result = json.loads(line)
+                result["index"] += offset
+                yield result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=argparse.FileType("r", encoding="utf-8"))
+    parser.add_argument("-o", "--output", type=argparse.FileType("w", encoding="utf-8"), default=sys.stdout)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_QUERIES)
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds to wait between results")
+    args = parser.parse_args()
+
+    queries = read_queries(args.input)
+    answered = errors = 0
+    with httpx.Client(timeout=args.timeout) as client:
+        for start in range(0, len(queries), args.batch_size):
+            for result in ask_batch(client, args.url, queries[start:start + args.batch_size], offset=start):
+                args.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                args.output.flush()
+                answered += 1
+                errors += result["error"] is not None
+
+    print(f"✅ {answered} results written ({errors} errors)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
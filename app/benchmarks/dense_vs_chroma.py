@@ -0,0 +1,97 @@
+"""
+Compares the NumPy dense index with Chroma on synthetic embeddings: recall@k against
+exact float32 search, and p50/p99 query latency.
+
+Usage (from the repository root):
+    python -m app.benchmarks.dense_vs_chroma --vectors 100000 --dim 384
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import chromadb
+import numpy as np
+
+from ..PdfBot.helpers.dense import DenseIndex, normalize_vectors
+
+
+def make_corpus(num_vectors: int, dim: int, num_queries: int, seed: int = 0):
+    """
+    Generates clustered, normalized embeddings (as real sentence embeddings are) and queries near them.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, num_vectors // 500), dim))
+    vectors = centers[rng.integers(0, len(centers), num_vectors)] + 0.5 * rng.standard_normal((num_vectors, dim))
+    queries = vectors[rng.integers(0, num_vectors, num_queries)] + 0.2 * rng.standard_normal((num_queries, dim))
+    return normalize_vectors(vectors), normalize_vectors(queries)
+
+
+def measure(search: Callable[[np.ndarray], List[int]], queries: np.ndarray, truth: List[List[int]]) -> Dict:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found) & set(expected)) / len(expected))
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "recall": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.vectors, args.dim, args.queries)
+    exact = DenseIndex.build(vectors, quantize=False, num_lists=0)
+    truth = [exact.search(query, args.k)[0] for query in queries]
+
+    results = {}
+    num_lists = int(4 * np.sqrt(args.vectors))
+    variants = {
+        "numpy_float32": dict(quantize=False, num_lists=0),
+        "numpy_int8": dict(quantize=True, num_lists=0),
+        "numpy_ivf_float32": dict(quantize=False, num_lists=num_lists),
+        "numpy_ivf_int8": dict(quantize=True, num_lists=num_lists),
+    }
+    for name, params in variants.items():
+        start = time.perf_counter()
+        index = DenseIndex.build(vectors, nprobe=args.nprobe, **params)
+        build_seconds = time.perf_counter() - start
+        results[name] = {
+            **measure(lambda query: index.search(query, args.k)[0], queries, truth),
+            "build_s": round(build_seconds, 3),
+            "bytes": int(index.vectors.nbytes + (0 if index.scales is None else index.scales.nbytes)),
+        }
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        collection = chromadb.PersistentClient(path=directory).create_collection(
+            "benchmark", metadata={"hnsw:space": "cosine"}
+        )
+        for batch in range(0, args.vectors, 5000):
+            rows = range(batch, min(batch + 5000, args.vectors))
+            collection.add(ids=[str(row) for row in rows], embeddings=vectors[batch:rows.stop].tolist())
+        build_seconds = time.perf_counter() - start
+
+        def chroma_search(query: np.ndarray) -> List[int]:
+            found = collection.query(query_embeddings=[query.tolist()], n_results=args.k, include=[])
+            return [int(row) for row in found["ids"][0]]
+
+        results["chroma_hnsw"] = {**measure(chroma_search, queries, truth), "build_s": round(build_seconds, 3)}
+
+    print(json.dumps({"vectors": args.vectors, "dim": args.dim, "k": args.k, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
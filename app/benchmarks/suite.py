@@ -0,0 +1,329 @@
+"""
+End-to-end benchmark suite: generates a synthetic PDF corpus and measures ingestion
+(`find_all_documents`, `split_documents`), embedding throughput, index build times,
+retrieval p50/p99, answer cache lookups and the latency of `POST /` answered by a
+stub LLM with a configurable per-token latency.
+
+Everything runs offline on CPU: by default queries and chunks are embedded with a
+deterministic fake model (`--embeddings model` measures the real `EMBEDDING_MODEL`,
+which must then be available locally). Logs go to stderr; the results are printed to
+stdout (and written to `--output`) as JSON, so runs can be compared across releases.
+
+Usage (from the repository root):
+    python -m app.benchmarks.suite --pdfs 50 --pages 10 --output results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pymupdf
+from fastapi import FastAPI, Form, Request
+from fastapi.testclient import TestClient
+from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+from ..PdfBot.constants import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, HYBRID_CANDIDATES_PER_RETRIEVER, \
+    HYBRID_WEIGHTS, NUMBER_TOP_SOURCES, QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD, \
+    LLM_MAX_CONCURRENT_GENERATIONS, LLM_MAX_QUEUE_SIZE, LLM_QUEUE_TIMEOUT_SECONDS
+from ..PdfBot.helpers import cache as answer_cache
+from ..PdfBot.helpers.cache_backend import MemoryCacheBackend
+from ..PdfBot.helpers.chain import build_qa_chain
+from ..PdfBot.helpers.chat import process_chat_request
+from ..PdfBot.helpers.dense import build_dense_index
+from ..PdfBot.helpers.embedding import write_chunks_in_batches
+from ..PdfBot.helpers.hybrid import build_hybrid_retriever
+from ..PdfBot.helpers.ingestion import find_all_documents, split_documents
+from ..PdfBot.helpers.llm import LLMScheduler
+from ..PdfBot.helpers.semantic_cache import SemanticCache
+from ..PdfBot.helpers.sparse import build_sparse_index
+
+SYLLABLES = ["ka", "to", "pi", "chu", "ra", "mon", "ze", "lu", "vi", "ri", "dia", "on", "sa", "fu", "ne", "go"]
+
+
+class StubLLM(LLM):
+    """
+    Offline stand-in for Ollama: answers with `num_tokens` tokens, each taking `token_latency` seconds.
+    """
+
+    num_tokens: int = 32
+    token_latency: float = 0.005
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _tokens(self, prompt: str) -> List[str]:
+        words = prompt.split()[-self.num_tokens:] or ["answer"]
+        return [f"{words[i % len(words)]} " for i in range(self.num_tokens)]
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None,
+                     **kwargs: Any) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        for token in self._tokens(prompt):
+            time.sleep(self.token_latency)
+            yield GenerationChunk(text=token)
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any):
+        for token in self._tokens(prompt):
+            await asyncio.sleep(self.token_latency)
+            yield GenerationChunk(text=token)
+
+
+def make_sentences(num_sentences: int, rng: np.random.Generator, vocabulary_size: int = 5000) -> List[str]:
+    """
+    Generates sentences of pseudo-words drawn from a Zipf-like distribution, as natural text is.
+    """
+    vocabulary = ["".join(rng.choice(SYLLABLES, rng.integers(2, 5))) for _ in range(vocabulary_size)]
+    weights = 1 / np.arange(1, vocabulary_size + 1)
+    weights /= weights.sum()
+    return [
+        " ".join(rng.choice(vocabulary, rng.integers(8, 20), p=weights)).capitalize() + "."
+        for _ in range(num_sentences)
+    ]
+
+
+def make_corpus(directory: str, num_pdfs: int, pages_per_pdf: int, sentences_per_page: int,
+                seed: int = 0) -> List[str]:
+    """
+    Writes synthetic PDFs (with title and author metadata) into a directory.
+
+    Returns:
+        List[str]: Every sentence written, to draw queries from.
+    """
+    rng = np.random.default_rng(seed)
+    sentences = make_sentences(num_pdfs * pages_per_pdf * sentences_per_page, rng)
+    for pdf_number in range(num_pdfs):
+        pdf = pymupdf.open()
+        for page_number in range(pages_per_pdf):
+            start = (pdf_number * pages_per_pdf + page_number) * sentences_per_page
+            page = pdf.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(sentences[start:start + sentences_per_page]),
+                                fontsize=8)
+        pdf.set_metadata({"title": f"Synthetic document {pdf_number}", "author": "Benchmark"})
+        subdirectory = os.path.join(directory, f"part{pdf_number % 4}")
+        os.makedirs(subdirectory, exist_ok=True)
+        pdf.save(os.path.join(subdirectory, f"document{pdf_number}.pdf"))
+        pdf.close()
+    return sentences
+
+
+def make_queries(sentences: Sequence[str], num_queries: int, seed: int = 1) -> List[str]:
+    """
+    Draws questions made of a few words of random corpus sentences.
+    """
+    rng = np.random.default_rng(seed)
+    queries = []
+    for index in rng.choice(len(sentences), num_queries, replace=num_queries > len(sentences)):
+        words = sentences[index].rstrip(".").split()
+        start = int(rng.integers(0, max(1, len(words) - 5)))
+        queries.append("What about " + " ".join(words[start:start + 5]) + "?")
+    return queries
+
+
+def latency_stats(latencies: Sequence[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(float(np.mean(latencies_ms)), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def measure_latency(function: Callable[[str], Any], queries: Sequence[str]) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        latencies.append(time.perf_counter() - start)
+    return latency_stats(latencies)
+
+
+def timed(function: Callable[[], Any]):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def group_by_path(chunks: List[Document]) -> Dict[str, List[Document]]:
+    files: Dict[str, List[Document]] = {}
+    for chunk in chunks:
+        files.setdefault(chunk.metadata["path"], []).append(chunk)
+    return files
+
+
+def build_chat_app(qa_chain) -> FastAPI:
+    """
+    The app's chat endpoint (`POST /`) over a given pipeline.
+    """
+    app = FastAPI()
+
+    @app.post("/")
+    async def handle_chat(request: Request, query: str = Form(...)):
+        return await process_chat_request(query, qa_chain, request)
+
+    return app
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args: argparse.Namespace, embeddings: Embeddings, directory: str) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    documents_directory = os.path.join(directory, "documents")
+
+    # Corpus and ingestion
+    sentences, seconds = timed(lambda: make_corpus(documents_directory, args.pdfs, args.pages,
+                                                   args.sentences_per_page, seed=args.seed))
+    pages, load_seconds = timed(lambda: find_all_documents(documents_directory))
+    chunks, split_seconds = timed(lambda: split_documents(pages))
+    results["corpus"] = {
+        "pdfs": args.pdfs,
+        "pages": len(pages),
+        "chunks": len(chunks),
+        "chars": sum(len(page.page_content) for page in pages),
+        "generate_s": round(seconds, 3),
+    }
+    results["ingestion"] = {
+        "find_all_documents": {"seconds": round(load_seconds, 3),
+                               "pages_per_second": round(len(pages) / load_seconds, 1)},
+        "split_documents": {"seconds": round(split_seconds, 3),
+                            "chunks_per_second": round(len(chunks) / split_seconds, 1)},
+    }
+
+    # Embedding throughput, in the batches used by ingestion
+    texts = [chunk.page_content for chunk in chunks]
+    vectors, seconds = timed(lambda: np.asarray([
+        vector for start in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+        for vector in embeddings.embed_documents(texts[start:start + EMBEDDING_BATCH_SIZE])
+    ], dtype=np.float32))
+    results["embedding"] = {
+        "model": args.embeddings,
+        "batch_size": EMBEDDING_BATCH_SIZE,
+        "seconds": round(seconds, 3),
+        "chunks_per_second": round(len(chunks) / seconds, 1),
+    }
+
+    # Index builds: Chroma goes through the ingestion write path (embedding included)
+    bm25, sparse_seconds = timed(lambda: build_sparse_index(chunks, os.path.join(directory, "sparse_index")))
+    dense, dense_seconds = timed(lambda: build_dense_index(chunks, vectors, os.path.join(directory, "dense_index"),
+                                                           embeddings))
+    vector_db = Chroma(persist_directory=os.path.join(directory, "chroma_db"), embedding_function=embeddings)
+    _, chroma_seconds = timed(lambda: write_chunks_in_batches(vector_db, group_by_path(chunks).items()))
+    results["index_build"] = {
+        "bm25_s": round(sparse_seconds, 3),
+        "dense_s": round(dense_seconds, 3),
+        "chroma_with_embedding_s": round(chroma_seconds, 3),
+    }
+
+    # Retrieval
+    queries = make_queries(sentences, args.queries, seed=args.seed + 1)
+    bm25.k = dense.k = HYBRID_CANDIDATES_PER_RETRIEVER
+    chroma = vector_db.as_retriever(search_type="similarity", search_kwargs={"k": HYBRID_CANDIDATES_PER_RETRIEVER})
+    hybrid = build_hybrid_retriever({"bm25": bm25, "vector": chroma}, weights=HYBRID_WEIGHTS, k=NUMBER_TOP_SOURCES)
+    results["retrieval"] = {
+        name: measure_latency(retriever.invoke, queries)
+        for name, retriever in {"bm25": bm25, "dense": dense, "chroma": chroma, "hybrid": hybrid}.items()
+    }
+
+    # Answer cache lookups: exact hits skip the embedding model, semantic lookups embed the query
+    qa_cache = SemanticCache(
+        embeddings, QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD,
+        backend=MemoryCacheBackend(QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS)
+    )
+    for query in queries:
+        qa_cache.set(query, {"query": query, "result": "cached", "source_documents": []})
+    results["cache"] = {
+        "exact_hit": measure_latency(lambda query: qa_cache.get_exact(query.upper()), queries),
+        "semantic_lookup": measure_latency(qa_cache.get_similar, [f"Tell me: {query}" for query in queries]),
+        "size": len(qa_cache),
+    }
+
+    # End to end, through the chat endpoint, with a fresh answer cache: every query misses, then hits
+    answer_cache.qa_cache = SemanticCache(
+        embeddings, QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD,
+        backend=MemoryCacheBackend(QA_CACHE_MAX_SIZE, QA_CACHE_TTL_SECONDS)
+    )
+    llm = StubLLM(num_tokens=args.answer_tokens, token_latency=args.token_latency_ms / 1000)
+    scheduler = LLMScheduler(LLM_MAX_CONCURRENT_GENERATIONS, LLM_MAX_QUEUE_SIZE, LLM_QUEUE_TIMEOUT_SECONDS)
+    qa_chain = build_qa_chain(llm, hybrid, scheduler=scheduler)
+    e2e_queries = queries[:args.e2e_queries]
+    with TestClient(build_chat_app(qa_chain)) as client:
+        def ask(query: str) -> None:
+            client.post("/", data={"query": query}).raise_for_status()
+
+        results["end_to_end"] = {
+            "stub_llm": {"tokens": args.answer_tokens, "token_latency_ms": args.token_latency_ms},
+            "miss": measure_latency(ask, e2e_queries),
+            "hit": measure_latency(ask, e2e_queries),
+        }
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Pages per PDF")
+    parser.add_argument("--sentences-per-page", type=int, default=25)
+    parser.add_argument("--queries", type=int, default=100, help="Queries for retrieval and cache lookups")
+    parser.add_argument("--e2e-queries", type=int, default=20, help="Queries sent to the chat endpoint")
+    parser.add_argument("--embeddings", choices=["fake", "model"], default="fake")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of the fake embeddings")
+    parser.add_argument("--answer-tokens", type=int, default=32)
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    embeddings = EMBEDDING_MODEL if args.embeddings == "model" else DeterministicFakeEmbedding(size=args.dim)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(sys.stderr):
+        results = run_suite(args, embeddings, directory)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": vars(args),
+            "total_s": round(time.perf_counter() - started, 3),
+        },
+        **results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
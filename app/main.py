@@ -1,10 +1,18 @@
-from fastapi import Request, Form
-from fastapi.responses import HTMLResponse
-from PdfBot.helpers.chat import process_chat_request, render_chat_response
+from typing import List
+
+from fastapi import Request, Form, File, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from PdfBot.helpers.batch import stream_batch_response
+from PdfBot.helpers.cache import get_cache_stats
+from PdfBot.helpers.chat import process_chat_request, render_chat_response, stream_chat_response, chat_history
+from PdfBot.helpers.metrics import METRICS_CONTENT_TYPE, render_metrics
+from PdfBot.helpers.readiness import readiness
+from PdfBot.helpers.uploads import IngestionQueue, handle_upload
 from PdfBot.core import initialize_components
 
 
 app, qa_chain = initialize_components()
+ingestion_queue = IngestionQueue(qa_chain.retriever.reindex)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -15,3 +23,64 @@ def serve_chat(request: Request):
 @app.post("/", response_class=HTMLResponse)
 async def handle_chat(request: Request, query: str = Form(...)):
     return await process_chat_request(query, qa_chain, request)
+
+
+@app.post("/stream")
+async def stream_chat(request: Request, query: str = Form(...)):
+    return await stream_chat_response(query, qa_chain, request)
+
+
+@app.post("/batch")
+async def batch_chat(request: Request):
+    return await stream_batch_response(request, qa_chain)
+
+
+@app.get("/stats")
+def serve_stats():
+    return {
+        "cache": get_cache_stats(),
+        "chat_history": chat_history.get_stats(),
+        "retrieval": qa_chain.retriever.get_stats(),
+        "index": qa_chain.retriever.get_index_stats(),
+        "ingestion": ingestion_queue.get_stats(),
+        "llm_scheduler": qa_chain.scheduler.get_stats(),
+        "ollama_nodes": qa_chain.llm.get_stats(),
+        "ollama_timings": qa_chain.llm.get_timings()
+    }
+
+
+@app.get("/ready")
+def serve_readiness():
+    status = readiness.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+def serve_metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.post("/reindex")
+def start_reindex():
+    started = qa_chain.retriever.start_reindex()
+    return JSONResponse(
+        {"started": started, **qa_chain.retriever.get_index_stats()}, status_code=202 if started else 409
+    )
+
+
+@app.get("/reindex")
+def serve_reindex_status():
+    return qa_chain.retriever.get_index_stats()
+
+
+@app.post("/documents")
+async def upload_documents(files: List[UploadFile] = File(...)):
+    return await handle_upload(files, ingestion_queue)
+
+
+@app.get("/documents/jobs/{job_id}")
+def serve_ingestion_job(job_id: str):
+    job = ingestion_queue.get_job(job_id)
+    if job is None:
+        return JSONResponse({"error": f"⚠️ Unknown ingestion job {job_id!r}."}, status_code=404)
+    return job
@@ -2,6 +2,8 @@ from unittest.mock import patch, AsyncMock
 
 from fastapi.testclient import TestClient
 
+# Same module path as `chat.py` imports, so `except LLMBusyError` there matches
+from PdfBot.helpers.llm import LLMBusyError
 from ..PdfBot.constants import MAX_INPUT_LENGTH
 from ..main import app
 
@@ -51,4 +53,37 @@ def test_malicious_input_sanitization(mock_run):
 
     response = client.post("/", data={"query": "<script>alert('XSS')</script>"})
     assert response.status_code == 200
-    assert "&lt;script&gt;" in response.text
\ No newline at end of file
+    assert "&lt;script&gt;" in response.text
+
+
+def test_empty_query_stream():
+    response = client.post("/stream", data={"query": "   "})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: error" in response.text
+
+
+@patch("PdfBot.helpers.chat.safe_run_qa", new_callable=AsyncMock)
+def test_busy_llm_returns_503(mock_run):
+    mock_run.side_effect = LLMBusyError("⚠️ The assistant is busy right now.")
+
+    response = client.post("/?json=true", data={"query": "What is AI?"})
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert "busy" in response.json()["error"]
+
+
+@patch("PdfBot.helpers.chat.safe_run_qa", new_callable=AsyncMock)
+def test_history_is_per_session_and_paginated(mock_run):
+    session = TestClient(app)
+    for i in range(3):
+        mock_run.return_value = {"query": f"Question {i}?", "answer": f"Answer {i}.", "sources": []}
+        session.post("/?json=true", data={"query": f"Question {i}?"})
+
+    latest = session.get("/?json=true&limit=2").json()
+    assert [turn["agent"] for turn in latest["chat_history"]] == ["Answer 1.", "Answer 2."]
+    older = session.get(f"/?json=true&limit=2&before={latest['next_cursor']}").json()
+    assert [turn["agent"] for turn in older["chat_history"]] == ["Answer 0."]
+    assert older["next_cursor"] is None
+
+    assert TestClient(app).get("/?json=true").json()["chat_history"] == []
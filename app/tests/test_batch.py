@@ -0,0 +1,128 @@
+import asyncio
+from typing import List
+
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers import cache as answer_cache
+from ..PdfBot.helpers.batch import answer_batch, embed_queries, retrieve_batch
+from ..PdfBot.helpers.chain import build_qa_chain
+from ..PdfBot.helpers.dense import build_dense_index
+from ..PdfBot.helpers.hybrid import build_hybrid_retriever
+from ..PdfBot.helpers.semantic_cache import SemanticCache
+from ..PdfBot.helpers.sparse import build_sparse_index
+
+TEXTS = ["Pikachu lives in Viridian Forest.", "Kanto has eight gyms.", "Raichu evolves from Pikachu."]
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.documents
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+def run_batch(queries, qa_chain, **kwargs) -> List[dict]:
+    async def collect():
+        return [result async for result in answer_batch(queries, qa_chain, **kwargs)]
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    embeddings = CountingEmbedding(size=8)
+    monkeypatch.setattr(answer_cache, "qa_cache", SemanticCache(embeddings, 10, 60, 0.99))
+    return embeddings
+
+
+@pytest.fixture
+def qa_chain():
+    documents = [Document(page_content="Wakanda is in Africa.", metadata={"source": "wakanda.pdf", "page": 2})]
+    return build_qa_chain(FakeListLLM(responses=["In Africa."]), StaticRetriever(documents=documents))
+
+
+def test_batch_is_embedded_once_and_deduplicated(embeddings, qa_chain):
+    results = run_batch(["Where is Wakanda?", "  ", "where is   WAKANDA", "Who rules Wakanda?"], qa_chain,
+                        embeddings=embeddings)
+
+    assert embeddings.calls == 1
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3]
+    assert results[0] == {"index": 1, "query": "", "answer": None, "sources": [], "cached": False,
+                          "error": "⚠️ Query cannot be empty."}
+    by_index = {result["index"]: result for result in results}
+    assert by_index[0]["answer"] == by_index[2]["answer"] == "In Africa."
+    assert by_index[2]["query"] == "where is WAKANDA"
+    assert by_index[3]["sources"] == ["wakanda.pdf (pages 2)"]
+
+
+def test_batch_shares_the_answer_cache(embeddings, qa_chain):
+    run_batch(["Where is Wakanda?"], qa_chain, embeddings=embeddings)
+    assert answer_cache.get_cached_answer("where is wakanda")["result"] == "In Africa."
+
+    results = run_batch(["Where is Wakanda?", "Who rules Wakanda?"], qa_chain, embeddings=embeddings)
+    assert [(result["index"], result["cached"]) for result in results] == [(0, True), (1, False)]
+
+
+def test_generations_are_bounded(embeddings, qa_chain, monkeypatch):
+    running = {"now": 0, "max": 0}
+
+    async def generate(query, documents):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return f"Answer to {query}"
+
+    monkeypatch.setattr(qa_chain, "agenerate", generate)
+    results = run_batch([f"Question {i}?" for i in range(8)], qa_chain, max_concurrency=3, embeddings=embeddings)
+
+    assert running["max"] == 3
+    assert sorted(result["answer"] for result in results) == sorted(f"Answer to Question {i}?" for i in range(8))
+
+
+def test_batched_retrieval_matches_single_queries(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    documents = [Document(page_content=text, metadata={"chunk_id": str(i), "source": "kanto.pdf"})
+                 for i, text in enumerate(TEXTS)]
+    vectors = embeddings.embed_documents(TEXTS)
+    retriever = build_hybrid_retriever(
+        {
+            "bm25": build_sparse_index(documents, str(tmp_path / "sparse")),
+            "vector": build_dense_index(documents, vectors, str(tmp_path / "dense"), embeddings),
+        },
+        weights=[0.5, 0.5],
+        k=2
+    )
+
+    queries = ["Where does Pikachu live?", "How many gyms in Kanto?"]
+    batched = retrieve_batch(retriever, queries, embed_queries(queries, embeddings))
+    assert batched == [retriever.invoke(query) for query in queries]
+
+
+def test_batched_chroma_retrieval_matches_single_queries():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    store = Chroma(collection_name="test-batch-chroma", embedding_function=embeddings)
+    store.add_texts(TEXTS, metadatas=[{"source": "kanto.pdf", "kind": str(i % 2)} for i in range(len(TEXTS))],
+                    ids=[str(i) for i in range(len(TEXTS))])
+
+    try:
+        for search_kwargs in ({"k": 2}, {"k": 2, "filter": {"kind": "1"}}):
+            retriever = store.as_retriever(search_kwargs=search_kwargs)
+            queries = ["Where does Pikachu live?", "How many gyms in Kanto?"]
+            batched = retrieve_batch(retriever, queries, embed_queries(queries, embeddings))
+            assert batched == [retriever.invoke(query) for query in queries]
+    finally:
+        store.delete_collection()
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import Generation
+
+from ..PdfBot.helpers import cache as answer_cache
+from ..PdfBot.helpers.cache_backend import SQLiteCacheBackend
+from ..PdfBot.helpers.llm import BackendLLMCache
+from ..PdfBot.helpers.semantic_cache import SemanticCache, normalize_query
+
+VOCABULARY = ["wakanda", "where", "is", "what", "pikachu", "located"]
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        words = text.split()
+        return [float(words.count(term)) for term in VOCABULARY]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   Wakanda? ") == "what is wakanda"
+    assert normalize_query("WHAT IS WAKANDA!") == normalize_query("what is wakanda")
+
+
+def test_questions_differing_by_symbols_get_different_keys():
+    for first, second in (("What is C++?", "What is C?"), ("2+2", "2-2"), ("C#", "C")):
+        assert normalize_query(first) != normalize_query(second)
+
+
+def test_questions_differing_by_symbols_are_not_exact_hits():
+    cache = SemanticCache(BagOfWordsEmbeddings(), maxsize=10, ttl=60, threshold=1.01)
+    cache.set("What is C++?", "a language with classes")
+
+    assert cache.get("What is C?") is None
+    assert cache.get("what is c++") == "a language with classes"
+
+
+def test_exact_and_near_hits():
+    embeddings = BagOfWordsEmbeddings()
+    cache = SemanticCache(embeddings, maxsize=10, ttl=60, threshold=0.9)
+
+    assert cache.get("What is Wakanda?") is None
+    cache.set("What is Wakanda?", "answer")
+    assert embeddings.calls == 1  # the embedding computed on the miss is reused
+
+    assert cache.get("what is wakanda") == "answer"
+    assert cache.get("Wakanda is what") == "answer"
+    assert cache.get("Where is Pikachu?") is None
+    assert cache.stats == {"hits": 1, "near_hits": 1, "misses": 2}
+
+
+def test_ttl_and_lru_eviction():
+    cache = SemanticCache(BagOfWordsEmbeddings(), maxsize=2, ttl=0.05, threshold=0.99)
+    cache.set("wakanda", 1)
+    time.sleep(0.1)
+    assert cache.get_exact("wakanda") is None
+
+    cache.ttl = 60
+    cache.set("wakanda", 1)
+    cache.set("pikachu", 2)
+    cache.get_exact("wakanda")
+    cache.set("located", 3)
+
+    assert cache.get_exact("wakanda") == 1
+    assert cache.get_exact("pikachu") is None
+    assert cache.get_exact("located") == 3
+    assert len(cache) == 2
+
+
+def test_sqlite_backend_is_shared_and_survives_restarts(tmp_path):
+    path = str(tmp_path / "answers.sqlite3")
+    result = {"result": "In Africa.", "source_documents": [Document(page_content="Wakanda...", metadata={"page": 1})]}
+    SQLiteCacheBackend(path, maxsize=10, ttl=60).set("where is wakanda", result)
+
+    # A second instance stands for another worker process, or the same one after a restart
+    restarted = SQLiteCacheBackend(path, maxsize=10, ttl=60)
+    cached = restarted.get("where is wakanda")
+    assert cached["result"] == "In Africa."
+    assert cached["source_documents"][0] == result["source_documents"][0]
+
+
+def test_sqlite_backend_lru_and_ttl(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "answers.sqlite3"), maxsize=2, ttl=60)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (1, None, 3)
+    assert len(backend) == 2
+
+    backend.ttl = -1
+    backend.set("d", 4)
+    assert backend.get("d") is None
+
+
+def test_namespace_change_invalidates_answers(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "answers.sqlite3"), maxsize=10, ttl=60)
+    cache = SemanticCache(BagOfWordsEmbeddings(), 10, 60, 0.9, backend=backend, namespace="v1")
+    cache.set("What is Wakanda?", "answer")
+
+    cache.set_namespace("v2")
+    assert cache.get("what is wakanda") is None
+    cache.set_namespace("v1")
+    assert cache.get_exact("what is wakanda") == "answer"
+
+
+def test_llm_cache_round_trip(tmp_path):
+    llm_cache = BackendLLMCache(SQLiteCacheBackend(str(tmp_path / "llm.sqlite3"), maxsize=10, ttl=60))
+    llm_cache.update("prompt", "mistral", [Generation(text="Hi", generation_info={"done": True})])
+    assert llm_cache.lookup("prompt", "mistral") == [Generation(text="Hi", generation_info={"done": True})]
+    assert llm_cache.lookup("prompt", "llama") is None
+
+
+class SlowChain:
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, query):
+        self.calls += 1
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return {"result": f"answer to {query}", "source_documents": []}
+
+
+async def ask_concurrently(chain, queries):
+    tasks = [asyncio.create_task(answer_cache.get_or_cache_qa_result(query, chain)) for query in queries]
+    while not answer_cache.inflight_requests or chain.calls == 0:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    chain.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(answer_cache, "qa_cache", SemanticCache(BagOfWordsEmbeddings(), 10, 60, 0.99))
+    monkeypatch.setattr(answer_cache, "coalesced_requests", 0)
+
+
+def test_concurrent_identical_queries_share_one_run(fresh_cache):
+    chain = SlowChain()
+    results = asyncio.run(ask_concurrently(chain, ["What is Wakanda?", "what is wakanda", "WHAT IS WAKANDA!"]))
+
+    assert chain.calls == 1
+    assert all(result is results[0] for result in results)
+    assert answer_cache.get_cache_stats()["coalesced"] == 2
+    assert answer_cache.inflight_requests == {}
+
+
+def test_errors_reach_every_waiter_and_are_not_cached(fresh_cache):
+    chain = SlowChain(error=RuntimeError("LLM down"))
+    results = asyncio.run(ask_concurrently(chain, ["where is pikachu", "Where is Pikachu?"]))
+
+    assert chain.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert answer_cache.get_cached_answer("where is pikachu") is None
+    assert answer_cache.inflight_requests == {}
+
+
+def test_a_disconnecting_caller_does_not_cancel_the_others(fresh_cache):
+    chain = SlowChain()
+
+    async def ask():
+        first = asyncio.create_task(answer_cache.get_or_cache_qa_result("who is ash", chain))
+        second = asyncio.create_task(answer_cache.get_or_cache_qa_result("Who is Ash?", chain))
+        while chain.calls == 0:
+            await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        chain.release.set()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(ask())
+
+    assert isinstance(first, asyncio.CancelledError)
+    assert second == {"result": "answer to who is ash", "source_documents": []}
+    assert chain.calls == 1
+    assert answer_cache.get_cached_answer("who is ash")["result"] == "answer to who is ash"
+    assert answer_cache.inflight_requests == {}
+
+
+def test_cache_lookups_do_not_block_the_event_loop(fresh_cache, monkeypatch):
+    lookup_threads = []
+    get_exact = answer_cache.qa_cache.get_exact
+
+    def recording_get_exact(query):
+        lookup_threads.append(threading.current_thread())
+        return get_exact(query)
+
+    monkeypatch.setattr(answer_cache.qa_cache, "get_exact", recording_get_exact)
+    answer_cache.set_cached_answer("Where is Pikachu?", {"result": "In Kanto.", "source_documents": []})
+
+    async def ask():
+        return (await answer_cache.lookup_cached_answer("where is pikachu"),
+                await answer_cache.get_or_cache_qa_result("where is pikachu", SlowChain()))
+
+    cached, result = asyncio.run(ask())
+
+    assert cached == result == {"result": "In Kanto.", "source_documents": []}
+    assert len(lookup_threads) == 2 and threading.main_thread() not in lookup_threads
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.language_models.llms import LLM
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers import chain
+from ..PdfBot.helpers.chain import build_qa_chain
+from ..PdfBot.helpers.llm import LLMBusyError, LLMScheduler
+
+
+class SlowAsyncLLM(LLM):
+    """Answers after a network-like delay, tracking which threads it was called from."""
+    delay: float = 0.2
+    threads: set = set()
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-async"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        raise AssertionError("the async path must not fall back to the sync call")
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        self.threads.add(threading.get_ident())
+        await asyncio.sleep(self.delay)
+        return prompt.rsplit("Q:", 1)[-1].strip()
+
+
+class AsyncRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        raise AssertionError("the async path must not fall back to the sync retriever")
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any) -> List[Document]:
+        return [Document(page_content=f"About {query}.", metadata={"source": "a.pdf", "page": 1})]
+
+
+def test_prompt_stuffs_documents_and_question():
+    pipeline = build_qa_chain(SlowAsyncLLM(), AsyncRetriever())
+    prompt = pipeline.format_prompt("Where?", [Document(page_content="One."), Document(page_content="Two.")])
+    assert "One.\n\nTwo." in prompt
+    assert prompt.rstrip().endswith("Q: Where?\nA:")
+
+
+def test_retrieved_documents_are_packed_once_per_request(monkeypatch):
+    calls = []
+    pack_context = chain.pack_context
+
+    def counting_pack_context(*args, **kwargs):
+        calls.append(args)
+        return pack_context(*args, **kwargs)
+
+    monkeypatch.setattr(chain, "pack_context", counting_pack_context)
+    pipeline = build_qa_chain(SlowAsyncLLM(delay=0), AsyncRetriever(), scheduler=None)
+
+    result = asyncio.run(pipeline.ainvoke("Kanto"))
+
+    assert len(calls) == 1
+    assert result["source_documents"][0].page_content == "About Kanto."
+
+
+def test_concurrent_requests_do_not_hold_threads():
+    llm = SlowAsyncLLM(threads=set())
+    pipeline = build_qa_chain(llm, AsyncRetriever(), scheduler=None)
+
+    async def run_many():
+        return await asyncio.gather(*(pipeline.ainvoke(f"question {i}") for i in range(200)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_many())
+
+    # 200 requests waiting 0.2s each overlap on the event loop instead of queueing for threads
+    assert time.perf_counter() - started < 2
+    assert len(llm.threads) == 1
+    assert results[7]["source_documents"][0].page_content == "About question 7."
+    assert set(results[7]) == {"query", "result", "source_documents"}
+
+
+def test_scheduler_bounds_generations_and_rejects_overflow():
+    scheduler = LLMScheduler(max_concurrency=2, max_queue_size=3, queue_timeout=5)
+    pipeline = build_qa_chain(SlowAsyncLLM(delay=0.05), AsyncRetriever(), scheduler=scheduler)
+
+    async def run_many():
+        return await asyncio.gather(*(pipeline.ainvoke(f"q{i}") for i in range(8)), return_exceptions=True)
+
+    results = asyncio.run(run_many())
+    assert sum(isinstance(result, LLMBusyError) for result in results) == 3
+    assert scheduler.get_stats()["admitted"] == 5
@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from ..PdfBot.helpers.context import estimate_tokens, pack_context, render_context
+from ..PdfBot.helpers.ingestion import split_documents
+
+PAGE_TEXT = " ".join(f"Sentence number {i} about Kanto." for i in range(60))
+METADATA = {"source": "kanto.pdf", "path": "kanto.pdf", "title": "Pokemon Guide", "author": "Oak", "subject": ""}
+
+
+def make_chunks() -> list:
+    pages = [Document(page_content=PAGE_TEXT, metadata={**METADATA, "page": page}) for page in (1, 2)]
+    return split_documents(pages, chunk_size=400, chunk_overlap=100)
+
+
+def test_metadata_is_emitted_once_per_source():
+    context = render_context(make_chunks())
+
+    assert context.count("Title: Pokemon Guide") == 1
+    assert context.count("Author: Oak") == 1
+    assert context.startswith("Source: kanto.pdf\nTitle: Pokemon Guide\nAuthor: Oak\n\n[Page 1]\n")
+
+
+def test_adjacent_chunks_of_a_page_are_merged():
+    chunks = make_chunks()
+    context = render_context(list(reversed(chunks)))
+
+    # Consecutive chunks overlap; merged, every page reads as the original text exactly once
+    assert context.count(PAGE_TEXT) == 2
+    assert context.index("[Page 1]") < context.index("[Page 2]")
+
+
+def test_chunks_of_different_sections_are_not_merged():
+    sections = [Document(page_content=text, metadata={"source": "notes.md", "path": "notes.md", "page": None,
+                                                      "section": section})
+                for section, text in enumerate(("Kanto has many gyms and lions.", "Johto has more gyms and more."))]
+    chunks = split_documents(sections, chunk_size=400, chunk_overlap=100)
+
+    context = render_context(list(reversed(chunks)))
+
+    assert context.index("Kanto has many gyms and lions.") < context.index("Johto has more gyms and more.")
+
+
+def test_packing_respects_the_budget_by_relevance():
+    chunks = make_chunks()
+    small = Document(page_content="Pikachu lives in Viridian Forest.", metadata={"source": "forest.pdf", "page": 3})
+    ranked = [chunks[0], chunks[5], small, chunks[1]]
+
+    budget = estimate_tokens(render_context([chunks[0], small])) + 5
+    packed = pack_context(ranked, max_tokens=budget)
+
+    assert packed["documents"] == [chunks[0], small]
+    assert packed["tokens"] <= budget
+    assert "Viridian Forest" in packed["context"]
+
+
+def test_oversized_top_chunk_is_truncated():
+    chunks = make_chunks()
+    packed = pack_context(chunks, max_tokens=30)
+
+    assert len(packed["documents"]) == 1
+    assert 0 < packed["tokens"] <= 30
+    assert packed["context"].startswith("Source: kanto.pdf")
+
+
+def test_nothing_is_packed_when_not_even_a_source_header_fits():
+    packed = pack_context(make_chunks(), max_tokens=2)
+
+    assert packed == {"context": "", "documents": [], "tokens": 0}
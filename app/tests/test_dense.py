@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ..PdfBot.helpers.dense import DenseIndex, build_dense_index, load_dense_index, update_dense_index, \
+    is_dense_index_valid, normalize_vectors
+
+DOCS = [
+    Document(page_content=f"Chunk number {i}.", metadata={"chunk_id": str(i), "source": f"doc{i % 3}.pdf"})
+    for i in range(6)
+]
+
+
+def random_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    scores = normalize_vectors(vectors) @ normalize_vectors(query)
+    return list(np.argsort(-scores, kind="stable")[:k])
+
+
+def recall(found: list, expected: list) -> float:
+    return len(set(found) & set(expected)) / len(expected)
+
+
+def test_exact_search_matches_brute_force():
+    vectors, queries = random_vectors(500), random_vectors(20, seed=1)
+    index = DenseIndex.build(vectors, quantize=False, num_lists=0)
+
+    for query in queries:
+        rows, scores = index.search(query, k=10)
+        assert rows == exact_top_k(vectors, query, 10)
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_batch_search_matches_single_queries():
+    vectors, queries = random_vectors(500), random_vectors(20, seed=1)
+    for quantize in (False, True):
+        index = DenseIndex.build(vectors, quantize=quantize, num_lists=0)
+        for (rows, scores), query in zip(index.search_batch(queries, k=10), queries):
+            expected_rows, expected_scores = index.search(query, k=10)
+            assert rows == expected_rows
+            assert np.allclose(scores, expected_scores, atol=1e-5)
+
+
+def test_int8_quantization_keeps_recall():
+    vectors, queries = random_vectors(2000), random_vectors(50, seed=1)
+    index = DenseIndex.build(vectors, quantize=True, num_lists=0)
+
+    assert index.vectors.dtype == np.int8
+    mean_recall = np.mean([recall(index.search(query, k=10)[0], exact_top_k(vectors, query, 10))
+                           for query in queries])
+    assert mean_recall >= 0.9
+
+
+def test_ivf_search_probes_a_subset_with_high_recall():
+    # Clustered data, as real embeddings are
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 32))
+    vectors = (centers[rng.integers(0, 20, 4000)] + 0.3 * rng.standard_normal((4000, 32))).astype(np.float32)
+    queries = vectors[:50] + 0.05 * rng.standard_normal((50, 32)).astype(np.float32)
+
+    index = DenseIndex.build(vectors, quantize=False, num_lists=40, nprobe=8)
+    assert index.is_ivf and index.list_offsets[-1] == len(vectors)
+
+    mean_recall = np.mean([recall(index.search(query, k=10)[0], exact_top_k(vectors, query, 10))
+                           for query in queries])
+    assert mean_recall >= 0.9
+    # Probing every list is exact
+    assert index.search(queries[0], k=10, nprobe=40)[0] == exact_top_k(vectors, queries[0], 10)
+
+
+def test_persisted_index_round_trip(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in DOCS]))
+
+    build_dense_index(DOCS, vectors, str(tmp_path), embeddings, index_version="v1")
+    retriever = load_dense_index(str(tmp_path), embeddings)
+    retriever.k = 1
+
+    results = retriever.invoke(DOCS[4].page_content)
+    assert [doc.metadata["chunk_id"] for doc in results] == ["4"]
+    assert isinstance(retriever.index.vectors, np.memmap)
+    assert is_dense_index_valid(str(tmp_path), "v1")
+    assert not is_dense_index_valid(str(tmp_path), "v2")
+
+
+def test_update_matches_full_rebuild(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in DOCS]))
+    build_dense_index(DOCS[:4], vectors[:4], str(tmp_path), embeddings)
+
+    retriever = update_dense_index(str(tmp_path), ["1", "unknown"], DOCS[4:], vectors[4:], embeddings,
+                                   index_version="v2")
+    kept = [0, 2, 3, 4, 5]
+    expected = DenseIndex.build(vectors[kept], quantize=False, num_lists=0)
+
+    assert retriever.chunk_store.ids == ["0", "2", "3", "4", "5"]
+    assert np.allclose(retriever.index.vectors, expected.vectors)
+    assert is_dense_index_valid(str(tmp_path), "v2")
+
+
+def test_failed_update_leaves_the_previous_index_intact(tmp_path, monkeypatch):
+    directory = str(tmp_path / "dense")
+    embeddings = DeterministicFakeEmbedding(size=16)
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in DOCS]))
+    build_dense_index(DOCS[:4], vectors[:4], directory, embeddings, index_version="v1")
+
+    def crash(self, directory, index_version=None):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DenseIndex, "save", crash)
+    with pytest.raises(OSError):
+        update_dense_index(directory, ["1"], DOCS[4:], vectors[4:], embeddings, index_version="v2")
+
+    retriever = load_dense_index(directory, embeddings)
+    assert retriever.chunk_store.ids == ["0", "1", "2", "3"]
+    assert len(retriever.index) == 4
+    assert is_dense_index_valid(directory, "v1")
+    assert sorted(os.listdir(tmp_path)) == ["dense"]
@@ -0,0 +1,99 @@
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.constants import LazyEmbeddings
+from ..PdfBot.helpers import embedding
+from ..PdfBot.helpers.embedding import write_chunks_in_batches
+from ..PdfBot.helpers.snapshots import SnapshotRetriever, publish_snapshot
+from ..PdfBot.helpers.sparse import build_sparse_index
+
+
+class RecordingVectorStore:
+    def __init__(self):
+        self.batches = []
+
+    def add_texts(self, texts, metadatas, ids):
+        self.batches.append(ids)
+
+
+class EmptyRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query, *, run_manager):
+        return []
+
+
+def chunks(path, count):
+    return [Document(page_content=f"{path} {i}", metadata={"path": path, "chunk_id": f"{path}-{i}"})
+            for i in range(count)]
+
+
+def test_chunks_are_written_in_batches_and_files_committed_when_complete():
+    store = RecordingVectorStore()
+    committed = []
+    ingested = [("a.pdf", chunks("a.pdf", 3)), ("broken.pdf", None), ("empty.pdf", []), ("b.pdf", chunks("b.pdf", 2))]
+
+    result = write_chunks_in_batches(store, ingested, batch_size=2, on_files_committed=committed.append)
+
+    assert store.batches == [["a.pdf-0", "a.pdf-1"], ["a.pdf-2", "b.pdf-0"], ["b.pdf-1"]]
+    assert committed == [{"empty.pdf": []}, {"a.pdf": ["a.pdf-0", "a.pdf-1", "a.pdf-2"]}, {"b.pdf": ["b.pdf-0", "b.pdf-1"]}]
+    assert result["failed"] == ["broken.pdf"]
+    assert result["num_chunks"] == 5
+
+
+def test_lazy_embeddings_build_the_model_once_on_first_use(monkeypatch):
+    built = []
+
+    class FakeHuggingFaceEmbeddings:
+        def __init__(self, model_name, **kwargs):
+            built.append(model_name)
+
+        def embed_query(self, text):
+            return [1.0]
+
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", SimpleNamespace(
+        HuggingFaceEmbeddings=FakeHuggingFaceEmbeddings
+    ))
+    model = LazyEmbeddings("tiny-model")
+    assert not model.is_loaded
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(model.embed_query, ["query"] * 16)) == [[1.0]] * 16
+    assert built == ["tiny-model"]
+
+
+def test_startup_sync_joins_the_one_another_worker_is_running(tmp_path, monkeypatch, capsys):
+    lock_path, snapshots = str(tmp_path / "sync.lock"), str(tmp_path / "snapshots")
+    build_sparse_index(chunks("a.pdf", 2), str(tmp_path / "sparse_index"))
+    live = publish_snapshot({"sparse_index": str(tmp_path / "sparse_index")}, "v1", snapshots)
+    retriever = SnapshotRetriever(retriever=EmptyRetriever(), directory=live, index_version="v1")
+
+    def sync_documents(vector_db):
+        raise AssertionError("the documents were already synced by the other worker")
+
+    monkeypatch.setattr(embedding, "load_manifest", lambda path: {"files": {}})
+    monkeypatch.setattr(embedding, "sync_documents", sync_documents)
+    monkeypatch.setattr(embedding, "build_snapshot_retriever", lambda *args: EmptyRetriever())
+    monkeypatch.setattr(embedding, "set_index_version", lambda version: None)
+    code = f"import fcntl; f = open({lock_path!r}, 'a'); fcntl.flock(f, fcntl.LOCK_EX); print('locked', flush=True); " \
+           "input()"
+    worker = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert worker.stdout.readline().strip() == "locked"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(embedding.reindex_documents, retriever, None, "chroma", "none", snapshots,
+                                 join_running_sync=True, lock_path=lock_path)
+        output = ""
+        while "Waiting for its snapshot" not in output:
+            output += capsys.readouterr().out
+            time.sleep(0.01)
+        published = publish_snapshot({"sparse_index": str(tmp_path / "sparse_index")}, "v2", snapshots)
+        worker.communicate("\n")
+        report = future.result(timeout=10)
+
+    assert report == {"joined": True, "index_version": "v2", "swapped": True}
+    assert retriever.directory == published and retriever.index_version == "v2"
@@ -0,0 +1,67 @@
+import time
+
+from ..PdfBot.helpers.history import ChatHistoryStore, is_valid_session_id, new_session_id
+
+
+def add_turns(store, session_id, count, text="answer"):
+    for i in range(count):
+        store.append(session_id, user=f"question {i}", agent=text, sources=[])
+
+
+def test_sessions_are_isolated():
+    store = ChatHistoryStore()
+    add_turns(store, "alice", 2)
+    add_turns(store, "bob", 1)
+
+    assert len(store.get_page("alice")[0]) == 2
+    assert [turn["user"] for turn in store.get_page("bob")[0]] == ["question 0"]
+    assert store.get_page("carol") == ([], None)
+
+
+def test_ring_buffer_keeps_latest_turns():
+    store = ChatHistoryStore(max_turns_per_session=3)
+    add_turns(store, "alice", 5)
+
+    turns, _ = store.get_page("alice")
+    assert [turn["id"] for turn in turns] == [3, 4, 5]
+    assert store.get_stats()["chars"] == sum(len(t["user"]) + len(t["agent"]) for t in turns)
+
+
+def test_cursor_pagination_walks_back_through_history():
+    store = ChatHistoryStore()
+    add_turns(store, "alice", 5)
+
+    latest, cursor = store.get_page("alice", limit=2)
+    assert [turn["id"] for turn in latest] == [4, 5] and cursor == 4
+    older, cursor = store.get_page("alice", before=cursor, limit=2)
+    assert [turn["id"] for turn in older] == [2, 3] and cursor == 2
+    oldest, cursor = store.get_page("alice", before=cursor, limit=2)
+    assert [turn["id"] for turn in oldest] == [1] and cursor is None
+
+
+def test_global_cap_drops_least_recently_active_sessions():
+    store = ChatHistoryStore(max_total_chars=100)
+    add_turns(store, "alice", 1, text="a" * 40)
+    add_turns(store, "bob", 1, text="b" * 40)
+    store.get_page("alice")  # Alice is now more recently active than Bob
+    add_turns(store, "carol", 1, text="c" * 40)
+
+    assert store.get_page("bob") == ([], None)
+    assert len(store.get_page("alice")[0]) == len(store.get_page("carol")[0]) == 1
+    assert store.get_stats()["chars"] <= 100
+
+
+def test_idle_sessions_expire():
+    store = ChatHistoryStore(idle_seconds=0.05)
+    add_turns(store, "alice", 1)
+    time.sleep(0.1)
+    add_turns(store, "bob", 1)
+
+    assert store.get_stats()["sessions"] == 1
+    assert store.get_page("alice") == ([], None)
+
+
+def test_session_ids():
+    assert is_valid_session_id(new_session_id())
+    assert not is_valid_session_id("../../etc")
+    assert not is_valid_session_id(None)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers.hybrid import build_hybrid_retriever, reciprocal_rank_fusion
+
+
+def chunk(chunk_id: str, text: str = None) -> Document:
+    return Document(page_content=text or f"Text of chunk {chunk_id}.", metadata={"chunk_id": chunk_id})
+
+
+class ListRetriever(BaseRetriever):
+    """Returns a fixed ranking after a delay, in both the sync and the async API."""
+    documents: List[Document]
+    delay: float = 0.0
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.delay)
+        return self.documents
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any) -> List[Document]:
+        await asyncio.sleep(self.delay)
+        return self.documents
+
+
+def test_fusion_merges_overlapping_chunks():
+    bm25 = [chunk("a"), chunk("b"), chunk("c")]
+    vector = [chunk("b"), chunk("d"), chunk("a")]
+
+    fused = reciprocal_rank_fusion([bm25, vector], [0.5, 0.5], k=10, rrf_k=60)
+
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["b", "a", "d", "c"]
+
+
+def test_fusion_deduplicates_identical_content_under_other_ids():
+    bm25 = [chunk("a", "Same text."), chunk("b")]
+    vector = [chunk("copy-of-a", "Same text."), chunk("c")]
+
+    fused = reciprocal_rank_fusion([bm25, vector], [0.5, 0.5], k=10)
+
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["a", "b", "c"]
+
+
+def test_fusion_applies_weights():
+    bm25, vector = [chunk("a")], [chunk("b")]
+    assert reciprocal_rank_fusion([bm25, vector], [0.2, 0.8], k=1)[0].metadata["chunk_id"] == "b"
+
+
+def test_hybrid_retriever_returns_exactly_k_unique_chunks():
+    bm25 = ListRetriever(documents=[chunk(c) for c in "abcdef"])
+    vector = ListRetriever(documents=[chunk(c) for c in "bacgfh"])
+    retriever = build_hybrid_retriever({"bm25": bm25, "vector": vector}, weights=[0.5, 0.5], k=6)
+
+    for documents in [retriever.invoke("q"), asyncio.run(retriever.ainvoke("q"))]:
+        ids = [doc.metadata["chunk_id"] for doc in documents]
+        assert len(ids) == 6 == len(set(ids))
+
+
+def test_sub_retrievers_run_concurrently_and_are_timed():
+    slow = {name: ListRetriever(documents=[chunk(name)], delay=0.3) for name in ["bm25", "vector"]}
+    retriever = build_hybrid_retriever(slow, weights=[0.5, 0.5], k=2)
+
+    for search in [lambda: retriever.invoke("q"), lambda: asyncio.run(retriever.ainvoke("q"))]:
+        started = time.perf_counter()
+        assert len(search()) == 2
+        assert time.perf_counter() - started < 0.5
+
+    stats = retriever.get_stats()
+    assert set(stats) == {"bm25", "vector", "fusion", "total"}
+    assert stats["bm25"]["calls"] == 2 and stats["bm25"]["seconds_avg"] >= 0.3
+    assert stats["total"]["seconds_max"] < 0.5
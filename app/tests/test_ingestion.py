@@ -0,0 +1,62 @@
+import time
+
+import fitz
+
+from ..PdfBot.helpers import ingestion
+from ..PdfBot.helpers.ingestion import iter_ingested_documents
+
+
+def make_pdf(path, text):
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), text)
+    pdf.set_metadata({"title": "Synthetic", "author": "Tests"})
+    pdf.save(str(path))
+    return str(path)
+
+
+def slow_ingest(full_path, root_dir):
+    time.sleep(30)
+
+
+def hang_on_slow_files(full_path, root_dir):
+    if "slow" in full_path:
+        time.sleep(30)
+    return []
+
+
+def test_parallel_ingestion_skips_corrupt_files(tmp_path):
+    good = make_pdf(tmp_path / "good.pdf", "Pikachu lives in Kanto.")
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+
+    results = dict(iter_ingested_documents({"good.pdf": good, "bad.pdf": str(bad)}, str(tmp_path), max_workers=2))
+
+    assert results["bad.pdf"] is None
+    [chunk] = results["good.pdf"]
+    assert "Pikachu lives in Kanto." in chunk.page_content
+    assert chunk.metadata["title"] == "Synthetic"
+    assert chunk.metadata["author"] == "Tests"
+    assert chunk.metadata["path"] == "good.pdf"
+    assert chunk.metadata["chunk_id"]
+
+
+def test_stuck_file_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "ingest_document", slow_ingest)
+    path = make_pdf(tmp_path / "slow.pdf", "Slow")
+
+    start = time.monotonic()
+    results = list(iter_ingested_documents({"slow.pdf": path}, str(tmp_path), max_workers=2, file_timeout=1))
+
+    assert results == [("slow.pdf", None)]
+    assert time.monotonic() - start < 10
+
+
+def test_stuck_files_do_not_starve_the_remaining_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "ingest_document", hang_on_slow_files)
+    paths = {name: make_pdf(tmp_path / name, name) for name in ("a-slow.pdf", "b-slow.pdf", "c.pdf", "d.pdf")}
+
+    start = time.monotonic()
+    results = dict(iter_ingested_documents(paths, str(tmp_path), max_workers=2, file_timeout=1))
+
+    assert results == {"a-slow.pdf": None, "b-slow.pdf": None, "c.pdf": [], "d.pdf": []}
+    assert time.monotonic() - start < 10
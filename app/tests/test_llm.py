@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from ..PdfBot.helpers.llm import LLMBusyError, LLMScheduler
+
+
+async def hold_slot(scheduler, order, name, release):
+    async with scheduler.slot():
+        order.append(name)
+        await release.wait()
+
+
+def test_concurrency_limit_and_fifo_handover():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2, max_queue_size=10, queue_timeout=5)
+        release, order = asyncio.Event(), []
+        tasks = [asyncio.create_task(hold_slot(scheduler, order, name, release)) for name in "abcd"]
+        await asyncio.sleep(0.05)
+        assert (scheduler.running, scheduler.queued, order) == (2, 2, ["a", "b"])
+
+        release.set()
+        await asyncio.gather(*tasks)
+        return scheduler, order
+
+    scheduler, order = asyncio.run(scenario())
+    assert order == ["a", "b", "c", "d"]
+    stats = scheduler.get_stats()
+    assert (stats["running"], stats["queued"], stats["admitted"]) == (0, 0, 4)
+    assert stats["wait_seconds_max"] > 0
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_size=1, queue_timeout=5)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold_slot(scheduler, [], name, release)) for name in "ab"]
+        await asyncio.sleep(0.05)
+        assert scheduler.is_full()
+        with pytest.raises(LLMBusyError):
+            await scheduler.acquire()
+        release.set()
+        await asyncio.gather(*tasks)
+        return scheduler
+
+    assert asyncio.run(scenario()).stats["rejected"] == 1
+
+
+def test_deadline_passes_while_queued():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_size=5, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold_slot(scheduler, [], "a", release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMBusyError):
+            await scheduler.acquire()
+        assert scheduler.queued == 0
+        release.set()
+        await holder
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.stats["timed_out"] == 1
+    assert scheduler.running == 0
@@ -0,0 +1,130 @@
+import zipfile
+
+import pytest
+from langchain_core.documents import Document
+
+from ..PdfBot.helpers import loaders
+from ..PdfBot.helpers.ingestion import compute_chunk_id, find_all_documents, find_all_pdfs, find_document_paths, \
+    iter_ingested_documents
+from ..PdfBot.helpers.loaders import DOCUMENT_LOADERS, DocumentLoader, get_loader, register_loader
+from ..PdfBot.helpers.metrics import LOADED_FILES
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+CORE = ('<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/">'
+        '<dc:title>Kanto Guide</dc:title><dc:creator>Oak</dc:creator></cp:coreProperties>')
+
+
+def make_docx(path, body):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+        archive.writestr("docProps/core.xml", CORE)
+    return str(path)
+
+
+def paragraph(text, style=None, page_break=False):
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    brk = '<w:r><w:br w:type="page"/></w:r>' if page_break else ""
+    return f"<w:p>{properties}{brk}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def load(path, root):
+    return list(get_loader(str(path)).lazy_load(str(path), str(root)))
+
+
+def test_markdown_is_split_at_headings_outside_code_blocks(tmp_path):
+    path = tmp_path / "guide.md"
+    path.write_text("# Kanto\nPallet Town.\n```\n# not a heading\n```\n## Gyms\nBrock is first.\n")
+
+    docs = load(path, tmp_path)
+
+    assert [doc.metadata["section"] for doc in docs] == [0, 1]
+    assert "# not a heading" in docs[0].page_content
+    assert docs[1].page_content.startswith("## Gyms")
+    assert docs[0].metadata["title"] == "Kanto"
+    assert docs[0].metadata["path"] == "guide.md"
+
+
+def test_long_text_is_streamed_in_bounded_sections(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Pikachu uses Thunderbolt.\n" * 1000)
+
+    docs = load(path, tmp_path)
+
+    assert len(docs) > 1
+    assert all(len(doc.page_content) <= 8100 for doc in docs)
+    assert sum(doc.page_content.count("Pikachu") for doc in docs) == 1000
+
+
+def test_html_keeps_visible_text_and_head_metadata(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text(
+        "<html><head><title>Pokedex</title><meta name='author' content='Dexter'><style>p {}</style></head>"
+        "<body><script>var x = 1;</script><h1>Pikachu</h1><p>Electric&nbsp;type.</p>"
+        "<h2>Eevee</h2><p>Normal type.</p></body></html>"
+    )
+
+    docs = load(path, tmp_path)
+
+    assert [doc.page_content for doc in docs] == ["Pikachu\n\nElectric\xa0type.", "Eevee\n\nNormal type."]
+    assert docs[0].metadata["title"] == "Pokedex"
+    assert docs[0].metadata["author"] == "Dexter"
+
+
+def test_docx_is_loaded_by_page_and_heading(tmp_path):
+    path = make_docx(tmp_path / "guide.docx", paragraph("Intro", "Title") + paragraph("Pallet Town.")
+                     + paragraph("Gyms", "Heading1", page_break=True) + paragraph("Brock is first."))
+
+    docs = load(path, tmp_path)
+
+    assert [(doc.metadata["page"], doc.page_content) for doc in docs] == [
+        (0, "Intro\nPallet Town."), (1, "Gyms\nBrock is first.")
+    ]
+    assert docs[0].metadata["title"] == "Kanto Guide"
+    assert docs[0].metadata["author"] == "Oak"
+
+
+def test_only_registered_formats_are_found_and_lock_files_are_skipped(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.txt", "sub/b.MD", "c.docx", "~$c.docx", ".hidden.txt", "image.png"):
+        (tmp_path / name).write_bytes(b"")
+
+    assert sorted(find_document_paths(str(tmp_path))) == ["a.txt", "c.docx", "sub/b.MD"]
+
+
+def test_sections_get_distinct_chunk_ids():
+    first = Document(page_content="Same text.", metadata={"path": "notes.txt", "page": None, "section": 0})
+    second = Document(page_content="Same text.", metadata={"path": "notes.txt", "page": None, "section": 1})
+
+    assert compute_chunk_id(first) != compute_chunk_id(second)
+
+
+def test_registered_loaders_feed_the_ingestion_pipeline(tmp_path, monkeypatch):
+    class CsvLoader(DocumentLoader):
+        extensions = (".csv",)
+        format = "csv"
+
+        def lazy_load(self, full_path, root_dir):
+            with open(full_path) as f:
+                for index, row in enumerate(f):
+                    yield Document(page_content=row.replace(",", " "),
+                                   metadata={"source": "pokemon.csv", "path": "pokemon.csv", "section": index})
+
+    (tmp_path / "pokemon.csv").write_text("Pikachu,Electric\nEevee,Normal\n")
+    monkeypatch.setattr(loaders, "DOCUMENT_LOADERS", dict(DOCUMENT_LOADERS))
+    register_loader(CsvLoader())
+    loaded_before = LOADED_FILES.get(format="csv", status="loaded")
+
+    results = dict(iter_ingested_documents(find_document_paths(str(tmp_path)), str(tmp_path), max_workers=1))
+
+    assert [chunk.page_content for chunk in results["pokemon.csv"]] == ["Pikachu Electric", "Eevee Normal"]
+    assert LOADED_FILES.get(format="csv", status="loaded") == loaded_before + 1
+
+
+def test_find_all_pdfs_is_a_deprecated_alias_of_find_all_documents(tmp_path):
+    (tmp_path / "notes.txt").write_text("Pikachu uses Thunderbolt.")
+
+    with pytest.deprecated_call():
+        docs = find_all_pdfs(str(tmp_path))
+
+    assert [doc.page_content for doc in docs] == [doc.page_content for doc in find_all_documents(str(tmp_path))]
@@ -0,0 +1,31 @@
+import os
+
+from ..PdfBot.helpers.manifest import build_manifest_entry, diff_against_manifest, new_manifest
+
+
+def write(path, content):
+    with open(path, "w") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_diff_detects_added_changed_removed_and_touched(tmp_path):
+    same, edited, gone = tmp_path / "same.pdf", tmp_path / "edited.pdf", tmp_path / "gone.pdf"
+    manifest = new_manifest()
+    for path in (same, edited, gone):
+        manifest["files"][path.name] = build_manifest_entry(write(path, path.name), ["chunk"])
+
+    write(edited, "new content")
+    os.utime(same, (0, 0))
+    os.remove(gone)
+    added = write(tmp_path / "added.pdf", "added")
+
+    changes = diff_against_manifest(manifest, {
+        "same.pdf": str(same), "edited.pdf": str(edited), "added.pdf": added
+    })
+
+    assert changes["added"] == ["added.pdf"]
+    assert changes["changed"] == ["edited.pdf"]
+    assert changes["removed"] == ["gone.pdf"]
+    assert changes["touched"] == ["same.pdf"]
+    assert changes["unchanged"] == []
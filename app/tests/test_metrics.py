@@ -0,0 +1,94 @@
+import asyncio
+import pstats
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers.chain import build_qa_chain
+from ..PdfBot.helpers.metrics import Counter, Histogram, MetricsRegistry, PROMPT_TOKENS, STAGE_SECONDS, \
+    render_metrics, track_stage
+from ..PdfBot.helpers.profiling import ProfilingMiddleware
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.documents
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test durations.", [0.1, 1], ["stage"])
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="a")
+    registry.counter("test_total", "Test count.", ["result"]).inc(result='say "hi"')
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{stage="a"} 3.65' in lines
+    assert 'test_seconds_count{stage="a"} 4' in lines
+    assert 'test_total{result="say \\"hi\\""} 1' in lines
+
+
+def test_labels_must_match():
+    counter = Counter("labelled_total", "Test count.", ["result"])
+    histogram = Histogram("plain_seconds", "Test durations.", [1])
+    for call in (lambda: counter.inc(), lambda: histogram.observe(1, stage="a")):
+        try:
+            call()
+        except ValueError:
+            continue
+        raise AssertionError("Expected a ValueError")
+
+
+def test_track_stage_records_failures_too():
+    before = STAGE_SECONDS.get_count(stage="test_failure")
+    try:
+        with track_stage("test_failure"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert STAGE_SECONDS.get_count(stage="test_failure") == before + 1
+
+
+def test_pipeline_records_stages():
+    documents = [Document(page_content="Wakanda is in Africa.", metadata={"source": "wakanda.pdf", "page": 2})]
+    qa_chain = build_qa_chain(FakeListLLM(responses=["In Africa."]), StaticRetriever(documents=documents),
+                              scheduler=None)
+    stages = ["retrieval", "prompt", "generation"]
+    before = {stage: STAGE_SECONDS.get_count(stage=stage) for stage in stages}
+    prompts_before = PROMPT_TOKENS.get_count()
+
+    asyncio.run(qa_chain.ainvoke("Where is Wakanda?"))
+
+    assert all(STAGE_SECONDS.get_count(stage=stage) == before[stage] + 1 for stage in stages)
+    assert PROMPT_TOKENS.get_count() == prompts_before + 1
+    assert 'pdfbot_stage_seconds_count{stage="generation"}' in render_metrics()
+
+
+def test_profiled_request_writes_stats(tmp_path):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"pong": sum(range(1000))}
+
+    app.add_middleware(ProfilingMiddleware, directory=str(tmp_path), enabled=True)
+    with TestClient(app) as client:
+        assert client.get("/ping").json() == {"pong": 499500}
+        assert not list(tmp_path.iterdir())
+        assert client.get("/ping?profile=true").status_code == 200
+
+    profiles = list(tmp_path.glob("*-GET-ping-*.prof"))
+    assert len(profiles) == 1
+    assert any(function[2] == "ping" for function in pstats.Stats(str(profiles[0])).stats)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ..PdfBot.constants import PROMPT_TEMPLATE_PDF_QA
+from ..PdfBot.helpers.ollama_pool import OllamaPool
+
+
+class StubOllama:
+    """Minimal HTTP server mimicking Ollama's /api/version and (streamed) /api/generate endpoints."""
+
+    def __init__(self, name, delay=0.0, port=0):
+        self.name = name
+        self.delay = delay
+        self.generations = 0
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json_lines(self, lines):
+                body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.send_json_lines([{"version": "0.0.0"}])
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.generations += 1
+                stub.requests.append(request)
+                time.sleep(stub.delay)
+                words = [f"{stub.name} ", "says ", "hi"]
+                # Like Ollama's prompt cache: only the part of the prompt not shared with the previous one is evaluated
+                previous = stub.requests[-2]["prompt"] if len(stub.requests) > 1 else ""
+                shared = len(os.path.commonprefix([previous, request["prompt"]]))
+                done = {"model": request["model"], "created_at": "2024-01-01T00:00:00Z", "response": "", "done": True,
+                        "prompt_eval_count": len(request["prompt"]) - shared, "prompt_eval_duration": 2_000_000,
+                        "eval_count": len(words), "eval_duration": 3_000_000, "load_duration": 0,
+                        "total_duration": 5_000_000}
+                if request.get("stream", True):
+                    self.send_json_lines([
+                        {"model": request["model"], "created_at": "2024-01-01T00:00:00Z", "response": word,
+                         "done": False} for word in words
+                    ] + [done])
+                else:
+                    self.send_json_lines([{**done, "response": "".join(words)}])
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def unused_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def stubs():
+    servers = [StubOllama("a", delay=0.1), StubOllama("b", delay=0.1)]
+    yield servers
+    for server in servers:
+        server.close()
+
+
+def test_requests_are_balanced_by_in_flight_count(stubs):
+    pool = OllamaPool(base_urls=[stub.url for stub in stubs], model="mistral")
+
+    async def run_many():
+        return await asyncio.gather(*(pool.ainvoke(f"q{i}") for i in range(6)))
+
+    answers = asyncio.run(run_many())
+    assert [stub.generations for stub in stubs] == [3, 3]
+    assert sorted(set(answers)) == ["a says hi", "b says hi"]
+    assert all(backend["in_flight"] == 0 for backend in pool.get_stats())
+
+
+def test_unreachable_node_is_evicted_and_retried_elsewhere(stubs):
+    down_url = f"http://127.0.0.1:{unused_port()}"
+    pool = OllamaPool(base_urls=[down_url, stubs[0].url], model="mistral")
+
+    assert pool.invoke("hello") == "a says hi"
+    assert "".join(pool.stream("hello")) == "a says hi"
+    down = pool.get_stats()[0]
+    assert down["healthy"] is False and down["failures"] == 1
+
+    # Evicted nodes are skipped until a health probe finds them reachable again
+    assert asyncio.run(pool.ainvoke("hello")) == "a says hi"
+    assert pool.get_stats()[0]["requests"] == 1
+
+
+def test_health_probe_readmits_recovered_node(stubs):
+    port = unused_port()
+    pool = OllamaPool(base_urls=[f"http://127.0.0.1:{port}", stubs[0].url], model="mistral")
+    asyncio.run(pool.check_health())
+    assert [backend.healthy for backend in pool.backends] == [False, True]
+
+    recovered = StubOllama("c", port=port)
+    try:
+        asyncio.run(pool.check_health())
+        assert [backend.healthy for backend in pool.backends] == [True, True]
+    finally:
+        recovered.close()
+
+
+def test_all_nodes_down_raises_connection_error():
+    pool = OllamaPool(base_urls=[f"http://127.0.0.1:{unused_port()}"], model="mistral")
+    with pytest.raises(ConnectionError):
+        pool.invoke("hello")
+
+
+def test_requests_share_options_keep_alive_and_prompt_prefix(stubs):
+    pool = OllamaPool(base_urls=[stubs[0].url], model="mistral", keep_alive=-1,
+                      options={"temperature": 0, "num_ctx": 4096, "num_batch": 32})
+    prompts = [PROMPT_TEMPLATE_PDF_QA.format(context=f"Context {i}.", question=f"Question {i}?") for i in range(2)]
+
+    assert asyncio.run(pool.ainvoke(prompts[0])) == "a says hi"
+    assert "".join(pool.stream(prompts[1], stop=["Q:"])) == "a says hi"
+
+    first, second = stubs[0].requests
+    assert first["keep_alive"] == second["keep_alive"] == -1
+    assert first["options"]["num_ctx"] == 4096 and first["options"]["num_batch"] == 32
+    assert second["options"]["stop"] == ["Q:"]
+    assert "config" not in first["options"]
+
+    # The whole instruction block is a prefix shared by both prompts
+    prefix = os.path.commonprefix([first["prompt"], second["prompt"]])
+    assert prefix.endswith("Context:\nContext ")
+
+    timings = pool.get_timings()
+    assert timings["requests"] == 2
+    assert timings["recent"][0]["prompt_eval_count"] == len(prompts[0])
+    assert timings["recent"][1]["prompt_eval_count"] == len(prompts[1]) - len(prefix)
+    assert timings["avg_prompt_eval_ms"] == 2.0 and timings["avg_eval_ms"] == 3.0
@@ -0,0 +1,42 @@
+from ..PdfBot.core import app
+from ..PdfBot.helpers.readiness import Readiness
+
+
+def test_ready_once_every_expected_component_is_warm():
+    readiness = Readiness()
+    assert not readiness.is_ready()
+    assert not readiness.get_status()["ready"]
+
+    readiness.expect("embedding_model")
+    readiness.warm_up_in_background("index_snapshot", lambda: None).join()
+    assert not readiness.is_ready()
+    assert readiness.get_status()["components"]["index_snapshot"]["status"] == "ready"
+
+    readiness.set_ready("embedding_model")
+    assert readiness.get_status()["ready"]
+
+
+def test_failed_warm_up_keeps_the_worker_unready():
+    readiness = Readiness()
+
+    def warm_up():
+        raise OSError("model weights not found")
+
+    readiness.warm_up_in_background("embedding_model", warm_up).join()
+
+    status = readiness.get_status()
+    assert not status["ready"]
+    assert status["components"]["embedding_model"]["status"] == "failed"
+    assert status["components"]["embedding_model"]["error"] == "model weights not found"
+
+
+def test_the_app_expects_its_components_before_their_warm_ups_start(monkeypatch):
+    for warm_up, expected in ((True, ["embedding_model", "index_snapshot"]), (False, ["index_snapshot"])):
+        monkeypatch.setattr(app, "readiness", Readiness())
+        monkeypatch.setattr(app, "WARM_UP_EMBEDDING_MODEL", warm_up)
+
+        app.create_app()
+
+        status = app.readiness.get_status()
+        assert not status["ready"]
+        assert sorted(status["components"]) == expected
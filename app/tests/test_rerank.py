@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers.rerank import LexicalReranker, Reranker, RerankingRetriever, create_reranker
+
+TEXTS = [
+    "The weather in Kanto is mild all year.",
+    "Pikachu is an electric Pokemon that evolves into Raichu.",
+    "Trainers in Kanto collect badges.",
+    "Raichu is the evolution of Pikachu.",
+]
+
+
+class FixedRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.documents
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: Any) -> List[Document]:
+        return self.documents
+
+
+class SlowReranker(Reranker):
+    """Scores by text length, sleeping per batch, and records the batch sizes."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.batches = []
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return [float(len(text)) for text in texts]
+
+
+def documents() -> List[Document]:
+    return [Document(page_content=text, metadata={"chunk_id": str(i)}) for i, text in enumerate(TEXTS)]
+
+
+def test_lexical_reranker_prefers_rare_query_terms():
+    scores = LexicalReranker().score("How does Pikachu evolve into Raichu?", TEXTS)
+    assert scores[0] == 0.0
+    assert max(scores) in (scores[1], scores[3])
+    assert scores[1] > scores[2]
+
+
+def test_retriever_keeps_top_n_in_both_apis():
+    retriever = RerankingRetriever(retriever=FixedRetriever(documents=documents()),
+                                   reranker=create_reranker("lexical"), top_n=2)
+
+    for ranked in [retriever.invoke("Pikachu Raichu"), asyncio.run(retriever.ainvoke("Pikachu Raichu"))]:
+        assert {doc.metadata["chunk_id"] for doc in ranked} == {"1", "3"}
+    assert retriever.get_stats()["rerank"]["calls"] == 2
+
+
+def test_latency_budget_stops_scoring_and_keeps_retrieval_order():
+    reranker = SlowReranker(delay=0.1)
+    retriever = RerankingRetriever(retriever=FixedRetriever(documents=documents()), reranker=reranker,
+                                   top_n=4, batch_size=1, latency_budget=0.15)
+
+    ranked = retriever.invoke("anything")
+
+    # Two batches fit into the budget: both are ranked by score, the rest follow unscored
+    assert reranker.batches == [1, 1]
+    assert [doc.metadata["chunk_id"] for doc in ranked] == ["1", "0", "2", "3"]
+    assert retriever.get_stats()["rerank"]["over_budget"] == 1
+
+
+def test_disabled_reranker():
+    assert create_reranker("none") is None
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers.snapshots import SnapshotRetriever, publish_snapshot, get_current_snapshot, \
+    read_snapshot_version, remove_snapshots, warm_up_snapshot
+from ..PdfBot.helpers.sparse import build_sparse_index, load_sparse_index, update_sparse_index
+
+DOCS = [
+    Document(page_content="Pikachu is an electric Pokemon.", metadata={"chunk_id": "a", "source": "kanto.pdf"}),
+    Document(page_content="Wakanda is a fictional country.", metadata={"chunk_id": "b", "source": "wakanda.pdf"}),
+    Document(page_content="Data science uses statistics and Python.", metadata={"chunk_id": "c", "source": "ds.pdf"}),
+]
+
+
+class NamedRetriever(BaseRetriever):
+    name: str
+    gate: object = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if self.gate is not None:
+            self.gate.wait()
+        return [Document(page_content=self.name)]
+
+
+def test_published_snapshot_is_not_changed_by_later_updates(tmp_path):
+    working = str(tmp_path / "sparse_index")
+    snapshots = str(tmp_path / "snapshots")
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text('{"files": {}}')
+    build_sparse_index(DOCS, working)
+
+    directory = publish_snapshot({"sparse_index": working, "manifest.json": str(manifest)}, "v1", snapshots)
+    update_sparse_index(working, ["b"], [Document(page_content="Ash lives in Kanto.", metadata={"chunk_id": "d"})])
+
+    assert get_current_snapshot(snapshots) == directory
+    assert read_snapshot_version(directory) == "v1"
+    assert open(os.path.join(directory, "manifest.json")).read() == '{"files": {}}'
+    frozen = load_sparse_index(os.path.join(directory, "sparse_index"))
+    assert [doc.metadata["chunk_id"] for doc in frozen.invoke("Wakanda")] == ["b"]
+    assert frozen.invoke("Kanto") == []
+    assert warm_up_snapshot(directory) > 0
+    assert not [name for name in os.listdir(snapshots) if name.startswith(".")]
+
+
+def test_remove_snapshots_keeps_the_given_ones(tmp_path):
+    working = str(tmp_path / "sparse_index")
+    snapshots = str(tmp_path / "snapshots")
+    build_sparse_index(DOCS, working)
+    old = publish_snapshot({"sparse_index": working}, "v1", snapshots)
+    new = publish_snapshot({"sparse_index": working}, "v2", snapshots)
+    os.makedirs(os.path.join(snapshots, ".partial-crashed"))
+
+    removed = remove_snapshots([new], snapshots)
+
+    assert sorted(removed) == sorted([".partial-crashed", os.path.basename(old)])
+    assert get_current_snapshot(snapshots) == new
+
+
+def test_swap_lets_in_flight_retrievals_finish_on_the_old_snapshot(tmp_path):
+    old_directory, new_directory = tmp_path / "old", tmp_path / "new"
+    old_directory.mkdir()
+    new_directory.mkdir()
+    gate = threading.Event()
+    retriever = SnapshotRetriever(
+        retriever=NamedRetriever(name="old", gate=gate), directory=str(old_directory), index_version="v1"
+    )
+
+    results = []
+    in_flight = threading.Thread(target=lambda: results.append(retriever.invoke("q")[0].page_content))
+    in_flight.start()
+    while retriever.get_index_stats()["in_flight"] == 0:
+        time.sleep(0.01)
+
+    retriever.swap(NamedRetriever(name="new"), str(new_directory), "v2")
+    assert retriever.invoke("q")[0].page_content == "new"
+    assert old_directory.exists()
+    assert retriever.get_index_stats()["retired_in_use"] == 1
+
+    gate.set()
+    in_flight.join()
+    assert results == ["old"]
+    assert not old_directory.exists()
+    assert new_directory.exists()
+    assert retriever.get_index_stats() | {"reindex": None} == {
+        "snapshot": "new", "index_version": "v2", "in_flight": 0, "retired_in_use": 0, "swaps": 1, "reindex": None
+    }
+    assert asyncio.run(retriever.ainvoke("q"))[0].page_content == "new"
+
+
+def test_only_one_reindex_runs_at_a_time():
+    gate, calls = threading.Event(), []
+    retriever = SnapshotRetriever(retriever=NamedRetriever(name="old"))
+
+    def rebuild():
+        calls.append(1)
+        gate.wait()
+        return {"swapped": True}
+
+    retriever.rebuild = rebuild
+    assert retriever.start_reindex()
+    assert not retriever.start_reindex()
+    assert retriever.get_index_stats()["reindex"]["running"]
+
+    gate.set()
+    while retriever.get_index_stats()["reindex"]["running"]:
+        time.sleep(0.01)
+    assert calls == [1]
+    assert retriever.get_index_stats()["reindex"]["report"] == {"swapped": True}
+
+
+def test_failed_reindex_keeps_serving_and_reports_the_error():
+    retriever = SnapshotRetriever(retriever=NamedRetriever(name="old"), index_version="v1")
+
+    def rebuild():
+        raise RuntimeError("disk full")
+
+    retriever.rebuild = rebuild
+    assert retriever.start_reindex()
+    while retriever.get_index_stats()["reindex"]["running"]:
+        time.sleep(0.01)
+
+    assert retriever.get_index_stats()["reindex"]["error"] == "disk full"
+    assert retriever.invoke("q")[0].page_content == "old"
+
+
+def test_snapshots_held_by_another_process_are_not_removed(tmp_path):
+    working = str(tmp_path / "sparse_index")
+    snapshots = str(tmp_path / "snapshots")
+    build_sparse_index(DOCS, working)
+    old = publish_snapshot({"sparse_index": working}, "v1", snapshots)
+    new = publish_snapshot({"sparse_index": working}, "v2", snapshots)
+    code = f"import fcntl, time; f = open({os.path.join(old, 'snapshot.lock')!r}); fcntl.flock(f, fcntl.LOCK_SH); " \
+           "print('held', flush=True); time.sleep(30)"
+    worker = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    try:
+        assert worker.stdout.readline().strip() == "held"
+        retriever = SnapshotRetriever(retriever=NamedRetriever(name="old"), directory=old)
+        retriever.swap(NamedRetriever(name="new"), new, "v2")
+
+        assert remove_snapshots([new], snapshots) == []
+        assert os.path.isdir(old)
+    finally:
+        worker.kill()
+        worker.wait()
+
+    assert remove_snapshots([new], snapshots) == [os.path.basename(old)]
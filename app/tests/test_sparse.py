@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+from rank_bm25 import BM25Okapi
+
+from ..PdfBot.helpers.sparse import SparseIndex, build_sparse_index, load_sparse_index, tokenize, update_sparse_index
+
+DOCS = [
+    Document(page_content="Pikachu is an electric Pokemon.", metadata={"chunk_id": "a", "source": "kanto.pdf"}),
+    Document(page_content="Wakanda is a fictional country.", metadata={"chunk_id": "b", "source": "wakanda.docx"}),
+    Document(page_content="Data science uses statistics and Python.", metadata={"chunk_id": "c", "source": "ds.pdf"}),
+    Document(page_content="Ash trains Pikachu in Kanto.", metadata={"chunk_id": "d", "source": "kanto.pdf"}),
+]
+
+
+def test_scores_match_rank_bm25():
+    index = SparseIndex.build(doc.page_content for doc in DOCS)
+    reference = BM25Okapi([tokenize(doc.page_content) for doc in DOCS])
+
+    for query in ["pikachu", "Where is Wakanda?", "python statistics kanto"]:
+        expected = reference.get_scores(tokenize(query))
+        assert np.allclose(index.get_scores(query), expected, atol=1e-5)
+
+
+def test_search_skips_unmatched_documents():
+    index = SparseIndex.build(doc.page_content for doc in DOCS)
+    assert index.search("Wakanda", k=10) == [1]
+    assert index.search("unrelated words", k=10) == []
+
+
+def test_persisted_index_round_trip(tmp_path):
+    build_sparse_index(DOCS, str(tmp_path))
+    retriever = load_sparse_index(str(tmp_path))
+    retriever.k = 1
+
+    results = retriever.invoke("Wakanda country")
+    assert [doc.metadata["chunk_id"] for doc in results] == ["b"]
+    assert results[0].page_content == DOCS[1].page_content
+    assert isinstance(retriever.index.posting_docs, np.memmap)
+
+
+def test_update_matches_full_rebuild(tmp_path):
+    build_sparse_index(DOCS[:3], str(tmp_path))
+    added = [Document(page_content="Kanto is a region.", metadata={"chunk_id": "e", "source": "kanto.pdf"})]
+
+    retriever = update_sparse_index(str(tmp_path), ["b", "unknown"], added)
+    expected = SparseIndex.build(doc.page_content for doc in [DOCS[0], DOCS[2], added[0]])
+
+    assert retriever.chunk_store.ids == ["a", "c", "e"]
+    assert retriever.chunk_store.get_text(2) == "Kanto is a region."
+    for query in ["kanto region", "python", "pokemon"]:
+        assert np.allclose(retriever.index.get_scores(query), expected.get_scores(query), atol=1e-5)
+
+
+def test_replayed_update_replaces_chunks_instead_of_duplicating_them(tmp_path):
+    directory = str(tmp_path / "sparse")
+    build_sparse_index(DOCS[:3], directory)
+    added = [Document(page_content="Kanto is a region.", metadata={"chunk_id": "e", "source": "kanto.pdf"})]
+
+    update_sparse_index(directory, [], added)
+    retriever = update_sparse_index(directory, [], added)
+
+    assert retriever.chunk_store.ids == ["a", "b", "c", "e"]
+    assert len(retriever.index) == 4
+    assert sorted(os.listdir(tmp_path)) == ["sparse"]
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake import FakeStreamingListLLM
+from langchain_core.retrievers import BaseRetriever
+
+from ..PdfBot.helpers import cache as answer_cache
+from ..PdfBot.helpers import chat
+from ..PdfBot.helpers.chain import build_qa_chain
+from ..PdfBot.helpers.history import ChatHistoryStore
+from ..PdfBot.helpers.ingestion import split_documents
+from ..PdfBot.helpers.loaders import get_loader
+from ..PdfBot.helpers.semantic_cache import SemanticCache
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.documents
+
+
+SESSION_ID = "test-session-0123456789"
+
+
+def collect_events(query, qa_chain):
+    async def collect():
+        return [event async for event in chat.stream_qa_events(query, qa_chain, SESSION_ID)]
+
+    events = []
+    for raw in asyncio.run(collect()):
+        name, data = raw.strip().split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+@pytest.fixture
+def qa_chain(monkeypatch):
+    monkeypatch.setattr(answer_cache, "qa_cache", SemanticCache(DeterministicFakeEmbedding(size=8), 10, 60, 0.99))
+    monkeypatch.setattr(chat, "chat_history", ChatHistoryStore())
+    documents = [Document(page_content="Wakanda is in Africa.", metadata={"source": "wakanda.pdf", "page": 2})]
+    return build_qa_chain(FakeStreamingListLLM(responses=["In Africa."]), StaticRetriever(documents=documents))
+
+
+def test_sources_are_sent_before_tokens(qa_chain):
+    events = collect_events("Where is Wakanda?", qa_chain)
+
+    assert events[0] == ("sources", {"query": "Where is Wakanda?", "sources": ["wakanda.pdf (pages 2)"]})
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert len(tokens) > 1 and "".join(tokens) == "In Africa."
+    assert events[-1][0] == "done" and events[-1][1]["answer"] == "In Africa."
+    turns, _ = chat.chat_history.get_page(SESSION_ID)
+    assert turns[-1]["agent"] == "In Africa."
+
+
+def test_finished_stream_populates_answer_cache(qa_chain):
+    collect_events("Where is Wakanda?", qa_chain)
+    assert answer_cache.get_cached_answer("where is wakanda")["result"] == "In Africa."
+
+    replay = collect_events("where is wakanda", qa_chain)
+    assert [name for name, _ in replay] == ["sources", "token", "done"]
+
+
+def test_answers_from_text_files_keep_their_sources(qa_chain, tmp_path):
+    path = tmp_path / "wakanda.txt"
+    path.write_text("Wakanda is in Africa.\n")
+    documents = split_documents(list(get_loader(str(path)).lazy_load(str(path), str(tmp_path))))
+    qa_chain.retriever = StaticRetriever(documents=documents)
+
+    response = asyncio.run(chat.safe_run_qa("Where is Wakanda?", qa_chain))
+
+    assert response["sources"] == ["wakanda.txt (sections 0)"]
+    assert not response["answer"].endswith(chat.NO_SOURCES_WARNING)
+
+
+def test_invalid_query_ends_with_error(qa_chain):
+    assert collect_events("   ", qa_chain) == [("error", {"error": "⚠️ Query cannot be empty."})]
+
+
+def test_concurrent_streams_of_the_same_question_share_one_generation(qa_chain, monkeypatch):
+    monkeypatch.setattr(answer_cache, "inflight_requests", {})
+    monkeypatch.setattr(answer_cache, "inflight_streams", {})
+    qa_chain.llm = FakeStreamingListLLM(responses=["In Africa."], sleep=0.01)
+    generations = []
+    astream = qa_chain.astream
+
+    def counting_astream(query, documents):
+        generations.append(query)
+        return astream(query, documents)
+
+    monkeypatch.setattr(qa_chain, "astream", counting_astream)
+
+    async def collect(query):
+        return [event async for event in chat.stream_qa_events(query, qa_chain, SESSION_ID)]
+
+    async def main():
+        return await asyncio.gather(collect("Where is Wakanda?"), collect("where is wakanda"))
+
+    first, second = asyncio.run(main())
+
+    assert len(generations) == 1
+    for events in (first, second):
+        assert "wakanda.pdf (pages 2)" in events[0]
+        assert '"answer": "In Africa."' in events[-1]
+    assert answer_cache.inflight_requests == {} and answer_cache.inflight_streams == {}
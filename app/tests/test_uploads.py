@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import List
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from ..PdfBot.helpers.uploads import IngestionQueue, handle_upload
+
+PDF = b"%PDF-1.4\n%fake\n"
+
+
+def make_client(queue: IngestionQueue) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/documents")
+    async def upload(files: List[UploadFile] = File(...)):
+        return await handle_upload(files, queue)
+
+    return TestClient(app)
+
+
+def make_queue(tmp_path, ingest, **kwargs) -> IngestionQueue:
+    return IngestionQueue(
+        ingest, staging_directory=str(tmp_path / "staging"), uploads_directory=str(tmp_path / "docs" / "uploads"),
+        documents_directory=str(tmp_path / "docs"), **kwargs
+    )
+
+
+def wait_until_finished(queue: IngestionQueue, job_id: str) -> dict:
+    while (job := queue.get_job(job_id))["status"] in ("queued", "running"):
+        time.sleep(0.01)
+    return job
+
+
+def test_uploaded_pdfs_are_moved_into_the_documents_folder_and_ingested(tmp_path):
+    ingested = []
+
+    def ingest():
+        ingested.append(sorted(os.listdir(tmp_path / "docs" / "uploads")))
+        return {"failed": [os.path.join("uploads", "broken.pdf")]}
+
+    queue = make_queue(tmp_path, ingest)
+    response = make_client(queue).post("/documents", files=[
+        ("files", ("../report.pdf", PDF, "application/pdf")), ("files", ("broken.pdf", PDF, "application/pdf"))
+    ])
+
+    assert response.status_code == 202
+    assert response.json()["files"] == ["report.pdf", "broken.pdf"]
+    job = wait_until_finished(queue, response.json()["id"])
+    assert ingested == [["broken.pdf", "report.pdf"]]
+    assert job["status"] == "failed"
+    assert job["failed"] == ["broken.pdf"]
+    assert os.listdir(tmp_path / "staging") == []
+
+
+def test_files_of_unsupported_or_mismatched_formats_are_rejected(tmp_path):
+    queue = make_queue(tmp_path, lambda: {"failed": []})
+    client = make_client(queue)
+
+    for name, content in (("setup.exe", PDF), ("fake.pdf", b"hello"), ("fake.docx", b"hello"),
+                          ("~$report.docx", b"PK\x03\x04")):
+        assert client.post("/documents", files=[("files", (name, content, "application/octet-stream"))]) \
+            .status_code == 400
+    assert os.listdir(tmp_path / "staging") == []
+    assert queue.get_stats()["queued"] == 0
+
+    assert client.post("/documents", files=[("files", ("notes.txt", b"hello", "text/plain"))]).status_code == 202
+
+
+def test_queued_jobs_are_ingested_together_and_a_full_queue_is_rejected(tmp_path):
+    gate, calls = threading.Event(), []
+
+    def ingest():
+        calls.append(sorted(os.listdir(tmp_path / "docs" / "uploads")))
+        gate.wait()
+        return {"failed": []}
+
+    queue = make_queue(tmp_path, ingest, max_queued=2)
+    client = make_client(queue)
+    first = client.post("/documents", files=[("files", ("a.pdf", PDF, "application/pdf"))]).json()
+    while queue.get_job(first["id"])["status"] != "running":
+        time.sleep(0.01)
+
+    second = client.post("/documents", files=[("files", ("b.pdf", PDF, "application/pdf"))]).json()
+    third = client.post("/documents", files=[("files", ("c.pdf", PDF, "application/pdf"))]).json()
+    rejected = client.post("/documents", files=[("files", ("d.pdf", PDF, "application/pdf"))])
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"]
+    assert queue.get_job(third["id"])["position"] == 2
+
+    gate.set()
+    assert [wait_until_finished(queue, job["id"])["status"] for job in (first, second, third)] == ["done"] * 3
+    assert calls == [["a.pdf"], ["a.pdf", "b.pdf", "c.pdf"]]
+
+
+def test_an_upload_does_not_replace_a_different_document_of_the_same_name(tmp_path):
+    queue = make_queue(tmp_path, lambda: {"failed": []})
+    client = make_client(queue)
+    jobs = [client.post("/documents", files=[("files", ("report.pdf", content, "application/pdf"))]).json()
+            for content in (PDF, PDF, PDF + b"v2")]
+
+    finished = [wait_until_finished(queue, job["id"]) for job in jobs]
+
+    renamed = f"report-{jobs[2]['id'][:8]}.pdf"
+    assert [job["renamed"] for job in finished] == [{}, {}, {"report.pdf": renamed}]
+    assert [job["status"] for job in finished] == ["done"] * 3
+    assert sorted(os.listdir(tmp_path / "docs" / "uploads")) == sorted(["report.pdf", renamed])
+    assert (tmp_path / "docs" / "uploads" / "report.pdf").read_bytes() == PDF
+
+
+def test_files_sharing_a_name_in_one_upload_are_rejected(tmp_path):
+    queue = make_queue(tmp_path, lambda: {"failed": []})
+
+    response = make_client(queue).post("/documents", files=[
+        ("files", ("report.pdf", PDF, "application/pdf")), ("files", ("sub/report.pdf", PDF + b"v2", "application/pdf"))
+    ])
+
+    assert response.status_code == 400
+    assert "report.pdf" in response.json()["error"]
+    assert os.listdir(tmp_path / "staging") == []
+    assert queue.get_stats()["queued"] == 0